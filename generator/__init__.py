@@ -0,0 +1,566 @@
+"""
+Library API for generating javascript-clients tests from OpenAPI specs.
+
+The Generator object keeps the compiled templates and the shared document store alive between specs, so tooling
+can generate for many specs in one process without paying a cold start for each. The extraction caches of a spec
+are dropped once its generation finishes.
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import repeat
+from multiprocessing import util
+
+import chevron
+from chevron.tokenizer import tokenize
+
+from spec_download import download_specfile, DocumentStore, DownloadPolicy
+from target_conversion import (
+    build_test_target,
+    build_imports,
+    build_test_cases,
+    hoist_shared_fixtures,
+    ApiClientTarget,
+    document_caches_scope,
+    ExtractionResult,
+    GenerationLimits,
+    LimitHit,
+    LimitTracker,
+    PruneReport,
+    prune_spec,
+    seed_uuids,
+    share_schema_work,
+    validate_spec,
+    SpecValidationError,
+)
+from target_conversion.pruning import HTTP_VERBS
+from target_conversion.spec_diff import SpecDiff
+from generator.metrics import SpecMetrics, ref_stats_snapshot
+from generator.shared_spec import SharedSpec, SharedSpecView, attach_spec
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TEMPLATE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "test_template.mustache",
+)
+
+
+def compile_template(file_path) -> list[tuple[str, str]]:
+    """Tokenizes the mustache template once so it can be rendered any number of times"""
+    with open(file_path, "r") as f:
+        return list(tokenize(f.read()))
+
+
+def render_template(file_path, template_data: dict, dest_file: str | None = None):
+    """Substitutes the data into the mustache template and produces a test file"""
+    render_compiled_template(compile_template(file_path), template_data, dest_file)
+
+
+def render_compiled_template(
+    compiled_template: list[tuple[str, str]],
+    template_data: dict,
+    dest_file: str | None = None,
+) -> str:
+    """Substitutes the data into an already tokenized mustache template"""
+    rendered_template = chevron.render(compiled_template, template_data)
+    write_output(rendered_template, dest_file)
+    return rendered_template
+
+
+def write_output(rendered_template: str, dest_file: str | None):
+    """Writes rendered source to the destination file, or stdout when there is none"""
+    if dest_file:
+        with open(dest_file, "wt") as output_file:
+            output_file.write(rendered_template)
+    else:
+        # No file? -> stdout
+        print(rendered_template)
+
+
+class TemplateArgumentError(Exception):
+    pass
+
+
+def parse_template_args(
+    templates: list[str] | None,
+    out_file: str | None,
+    out_dir: str | None,
+    parallel: bool = False,
+) -> dict[str, str | None]:
+    """
+    Works out where each template's output goes from the --template/--out_file/--out_dir arguments.
+
+    Templates are given as "template_file" or "template_file=output_file"; without an explicit output file the
+    output is named after the template (minus ".mustache") inside out_dir, or goes to stdout.
+    :param parallel: whether the templates are rendered concurrently, so only one of them may go to stdout
+    :raises TemplateArgumentError: for a template given twice, or concurrent templates sharing stdout
+    """
+    if not templates:
+        return {DEFAULT_TEMPLATE: out_file}
+
+    template_outputs = {}
+    for template_arg in templates:
+        template_file, _, dest_file = template_arg.partition("=")
+        if template_file in template_outputs:
+            raise TemplateArgumentError(
+                f"Template {template_file} is given more than once; render it once per run"
+            )
+        if dest_file == "":
+            dest_file = out_file if len(templates) == 1 else None
+        if dest_file is None and out_dir:
+            dest_file = os.path.join(
+                out_dir, os.path.basename(template_file).removesuffix(".mustache")
+            )
+        template_outputs[template_file] = dest_file
+    to_stdout = [template for template, dest in template_outputs.items() if not dest]
+    if parallel and len(to_stdout) > 1:
+        raise TemplateArgumentError(
+            f"Templates rendered in parallel would interleave on stdout: {', '.join(to_stdout)}; give them "
+            f"output files or --out_dir"
+        )
+    return template_outputs
+
+
+def get_operation_keys(spec: dict) -> list[tuple[str, str]]:
+    """The (path, verb) of every operation in the spec, in spec order"""
+    return [
+        (path, verb)
+        for path in spec["paths"]
+        # Path items can also hold shared "parameters", "summary", etc.
+        for verb in spec["paths"][path].keys()
+        if verb in HTTP_VERBS
+    ]
+
+
+def extract(spec: dict, limits: LimitTracker | None = None) -> ExtractionResult:
+    """Builds the test targets and import data for every path and verb in the spec"""
+    # Scan through all the paths and verbs building test target info along the way
+    test_targets = [
+        build_test_target(spec, path, verb, limits=limits)
+        for path, verb in get_operation_keys(spec)
+    ]
+    return assemble_extraction(spec, test_targets)
+
+
+def extract_parallel(
+    spec: dict, limits: LimitTracker | None = None, workers: int = 2
+) -> ExtractionResult:
+    """
+    Like extract, with the operations split between worker processes.
+
+    The spec is put in shared memory once, instead of being pickled for every worker. Workers build their
+    request objects independently, so operations in different workers do not share request declarations (and
+    their UUIDs) the way they do within one process.
+    """
+    if limits is None:
+        limits = LimitTracker()
+    operations = get_operation_keys(spec)
+    # Contiguous chunks, a few per worker, so results come back in spec order
+    chunk_size = max(1, -(-len(operations) // (workers * 4)))
+    chunks = [
+        operations[i : i + chunk_size] for i in range(0, len(operations), chunk_size)
+    ]
+    with SharedSpec(spec) as shared_spec:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=attach_worker_spec,
+            initargs=(shared_spec.name,),
+        ) as executor:
+            results = list(
+                executor.map(
+                    extract_operations,
+                    chunks,
+                    repeat(limits.limits),
+                    repeat(limits.started),
+                )
+            )
+
+    test_targets = []
+    for chunk_targets, chunk_hits in results:
+        test_targets.extend(chunk_targets)
+        for hit in chunk_hits:
+            if hit not in limits.hits:
+                limits.hits.append(hit)
+    return assemble_extraction(spec, test_targets)
+
+
+# The spec a worker process extracts from, attached once when the worker starts
+_worker_spec: SharedSpecView | None = None
+
+
+def attach_worker_spec(name: str):
+    global _worker_spec
+    _worker_spec = attach_spec(name)
+    # Detaches when the worker process exits; multiprocessing runs these finalizers, but not atexit handlers
+    util.Finalize(_worker_spec, _worker_spec.close, exitpriority=10)
+
+
+def extract_operations(
+    operations: list[tuple[str, str]], limits: GenerationLimits, started: float
+) -> (list[ApiClientTarget], list[LimitHit]):
+    """Builds the test targets of some operations in a worker process"""
+    tracker = LimitTracker(limits, started=started)
+    test_targets = [
+        build_test_target(_worker_spec, path, verb, limits=tracker)
+        for path, verb in operations
+    ]
+    return test_targets, tracker.hits
+
+
+def assemble_extraction(
+    spec: dict, test_targets: list[ApiClientTarget]
+) -> ExtractionResult:
+    """Adds the import data for the test targets of a spec"""
+    api_title = spec["info"]["title"]
+    api_version = spec["info"]["version"]
+    resolved_deps = [
+        resolved
+        for test_target in test_targets
+        for resolved in test_target.resolved_params
+    ]
+    import_classes = build_imports(
+        api_title,
+        api_version=f"{api_version.upper().rstrip('.0')}",
+        test_target_data=test_targets,
+        resolved=resolved_deps,
+    )
+    return ExtractionResult(api_title, api_version, import_classes, test_targets)
+
+
+def build_render_data(
+    extraction: ExtractionResult,
+    port,
+    all_responses: bool = False,
+    response_assertions: bool = True,
+    shared_fixtures: bool = True,
+) -> dict:
+    """
+    Converts the extracted data into the format expected by the template
+    :param shared_fixtures: declare request objects used by several tests once, at module level
+    """
+    test_data = [
+        test_case
+        for test_target in extraction.test_targets
+        for test_case in build_test_cases(
+            test_target, all_responses, response_assertions
+        )
+    ]
+    fixtures = []
+    if shared_fixtures:
+        fixtures, test_data = hoist_shared_fixtures(test_data)
+    return {
+        "api_title": extraction.api_title,
+        "api_title_lower": extraction.api_title.lower(),
+        "api_version": extraction.api_version,
+        "import_data": extraction.import_data,
+        "port": port,
+        "shared_fixtures": fixtures,
+        "test_data": test_data,
+    }
+
+
+def build_diff_report(spec_diff: SpecDiff) -> dict:
+    """Lists the tests affected by a spec diff, identified the same way as in the generated source"""
+
+    def describe(test_target: ApiClientTarget) -> dict:
+        return {
+            "test": test_target.summary,
+            "operation_id": test_target.operation_id,
+            "path": test_target.url_path,
+            "verb": test_target.verb,
+        }
+
+    affected = {(t.url_path, t.verb): t for t in spec_diff.affected_targets}
+    return {
+        "added": [describe(affected[key]) for key in spec_diff.added_operations],
+        "changed": [describe(affected[key]) for key in spec_diff.changed_operations],
+        "removed": [describe(target) for target in spec_diff.removed_targets],
+        "changed_components": spec_diff.changed_components,
+    }
+
+
+@dataclass
+class GenerationResult(object):
+    """What generating the tests for one spec produced"""
+
+    spec_url: str
+    extraction: ExtractionResult
+    prune_report: PruneReport
+    limits: LimitTracker
+    # template file -> rendered source
+    rendered: dict[str, str] = field(default_factory=dict)
+    metrics: SpecMetrics | None = None
+
+
+class Generator(object):
+    """
+    Reusable test generator: owns the compiled templates, the document store for external $refs and the
+    options used for every spec, plus the spec most recently loaded and its metrics.
+    """
+
+    def __init__(
+        self,
+        templates: list[str] | None = None,
+        port=3001,
+        cache_dir: str | None = None,
+        limits: GenerationLimits | None = None,
+        all_responses: bool = False,
+        response_assertions: bool = True,
+        parallel: bool = False,
+        validate: bool = True,
+        shared_fixtures: bool = True,
+        extract_workers: int = 1,
+        download_policy: DownloadPolicy | None = None,
+        uuid_seed: int | None = None,
+    ):
+        """
+        :param templates: mustache templates to render, compiled once here
+        :param port: destination port for the API client requests
+        :param cache_dir: directory for caching documents referenced by external $refs
+        :param limits: bounds on the extraction work per spec
+        :param all_responses: also generate tests for other documented responses and request body examples
+        :param response_assertions: assert the shape of response bodies, not just the status
+        :param parallel: render multiple templates concurrently, in separate processes
+        :param validate: reject specs missing anything the extraction needs before doing any work on them
+        :param shared_fixtures: declare request objects used by several tests once, at module level
+        :param extract_workers: processes to extract each spec with, sharing the spec through shared memory
+        :param download_policy: timeouts, retries and per-host concurrency for downloading specs
+        :param uuid_seed: generate the same UUIDs for every extraction of a spec (not with extract_workers)
+        """
+        self.templates = {
+            template_file: compile_template(template_file)
+            for template_file in (templates or [DEFAULT_TEMPLATE])
+        }
+        self.port = port
+        self.download_policy = download_policy
+        self.store = DocumentStore(cache_dir, policy=download_policy)
+        self.limits = limits if limits is not None else GenerationLimits()
+        self.all_responses = all_responses
+        self.response_assertions = response_assertions
+        self.parallel = parallel
+        self.validate = validate
+        self.shared_fixtures = shared_fixtures
+        self.extract_workers = extract_workers
+        self.uuid_seed = uuid_seed
+        self.spec: dict | None = None
+        self.prune_report: PruneReport | None = None
+        self.limit_tracker: LimitTracker | None = None
+        self.metrics: SpecMetrics | None = None
+
+    def load(self, spec_url: str) -> dict:
+        """Downloads the spec (and any documents it references) and prunes it down to what extraction reads"""
+        self.metrics = SpecMetrics(spec_url)
+        self.spec, self.prune_report = self.fetch(spec_url, self.metrics)
+        return self.spec
+
+    def fetch(
+        self, spec_url: str, metrics: SpecMetrics | None = None
+    ) -> (dict, PruneReport):
+        """
+        Downloads, validates and prunes a spec without making it the loaded one
+        :raises SpecValidationError: listing every problem found in the spec
+        """
+        if metrics is None:
+            metrics = SpecMetrics(spec_url)
+        store_stats = dict(self.store.stats)
+        with metrics.timed("download"):
+            spec = download_specfile(
+                spec_url, store=self.store, policy=self.download_policy
+            )
+        # Concurrent fetches through the same store are counted by every spec being fetched at the time
+        metrics.add_document_stats(store_stats, self.store.stats)
+        # The unpruned spec's $ref index is only needed until it has been pruned
+        with document_caches_scope(spec):
+            if self.validate:
+                with metrics.timed("validate"):
+                    problems = validate_spec(spec)
+                if problems:
+                    raise SpecValidationError(problems)
+            with metrics.timed("prune"):
+                pruned, prune_report = prune_spec(spec)
+        logger.info(
+            "Pruned spec",
+            extra={
+                "spec_url": spec_url,
+                "components_dropped": len(prune_report.components_dropped),
+                "bytes_before": prune_report.bytes_before,
+                "bytes_after": prune_report.bytes_after,
+            },
+        )
+        return pruned, prune_report
+
+    def extract(self, spec: dict | None = None) -> ExtractionResult:
+        """Extracts the test targets from the given spec, or from the last loaded one"""
+        if spec is None:
+            spec = self.spec
+        self.limit_tracker = LimitTracker(self.limits)
+        return self._extract(spec, self.limit_tracker, self.metrics)
+
+    def _extract(
+        self, spec: dict, limits: LimitTracker, metrics: SpecMetrics | None
+    ) -> ExtractionResult:
+        if metrics is None:
+            metrics = SpecMetrics("")
+        ref_stats = ref_stats_snapshot(spec)
+        with metrics.timed("extract"):
+            if self.extract_workers > 1:
+                extraction = extract_parallel(spec, limits, self.extract_workers)
+            elif self.uuid_seed is not None:
+                # Seeded in the extracting thread, so concurrent generations do not draw from each other's sequence
+                seed_uuids(self.uuid_seed)
+                try:
+                    extraction = extract(spec, limits)
+                finally:
+                    seed_uuids(None)
+            else:
+                extraction = extract(spec, limits)
+        metrics.operations += len(extraction.test_targets)
+        metrics.add_ref_stats(ref_stats, ref_stats_snapshot(spec))
+        for hit in limits.hits:
+            logger.warning(
+                "Limit reached; placeholder values used",
+                extra={
+                    "limit": hit.limit,
+                    "operation_id": hit.operation_id,
+                    "detail": hit.detail,
+                },
+            )
+        return extraction
+
+    def build_render_data(self, extraction: ExtractionResult) -> dict:
+        return build_render_data(
+            extraction,
+            self.port,
+            all_responses=self.all_responses,
+            response_assertions=self.response_assertions,
+            shared_fixtures=self.shared_fixtures,
+        )
+
+    def render(
+        self,
+        extraction: ExtractionResult,
+        dest_files: dict[str, str | None] | None = None,
+        metrics: SpecMetrics | None = None,
+    ) -> dict[str, str]:
+        """
+        Renders every template against the same extracted data
+        :param dest_files: template file -> file to write the output to; templates not listed are only returned
+        :param metrics: where to count the time and bytes written, by default the metrics of the loaded spec
+        :return: template file -> rendered source
+        """
+        if metrics is None:
+            metrics = self.metrics if self.metrics is not None else SpecMetrics("")
+        with metrics.timed("render"):
+            render_data = self.build_render_data(extraction)
+            templates = list(self.templates)
+            compiled = [self.templates[template] for template in templates]
+            if not self.parallel or len(templates) == 1:
+                sources = [chevron.render(tokens, render_data) for tokens in compiled]
+            else:
+                # Rendering is CPU-bound pure Python, so it is spread over processes rather than threads
+                with ProcessPoolExecutor(max_workers=len(templates)) as executor:
+                    sources = list(
+                        executor.map(chevron.render, compiled, repeat(render_data))
+                    )
+            rendered = dict(zip(templates, sources))
+            if dest_files is not None:
+                for template, source in rendered.items():
+                    if template in dest_files:
+                        write_output(source, dest_files[template])
+        if dest_files is not None:
+            metrics.bytes_written += sum(
+                len(source.encode("utf-8"))
+                for template, source in rendered.items()
+                if template in dest_files
+            )
+        return rendered
+
+    def generate(
+        self, spec_url: str, dest_files: dict[str, str | None] | None = None
+    ) -> GenerationResult:
+        """Loads, extracts and renders a single spec"""
+        metrics = SpecMetrics(spec_url)
+        spec, prune_report = self.fetch(spec_url, metrics)
+        return self._generate(spec_url, spec, prune_report, metrics, dest_files)
+
+    def _generate(
+        self,
+        spec_url: str,
+        spec: dict,
+        prune_report: PruneReport,
+        metrics: SpecMetrics,
+        dest_files: dict[str, str | None] | None,
+    ) -> GenerationResult:
+        limits = LimitTracker(self.limits)
+        # The spec's caches live as long as its generation, so they are neither evicted by specs generated
+        # concurrently nor kept in memory afterwards
+        with document_caches_scope(spec):
+            extraction = self._extract(spec, limits, metrics)
+            rendered = self.render(extraction, dest_files, metrics)
+        logger.info(
+            "Generated tests",
+            extra={"spec_url": spec_url, "operations": metrics.operations},
+        )
+        return GenerationResult(
+            spec_url=spec_url,
+            extraction=extraction,
+            prune_report=prune_report,
+            limits=limits,
+            rendered=rendered,
+            metrics=metrics,
+        )
+
+    def generate_versions(
+        self, jobs: dict[str, dict[str, str | None]]
+    ) -> dict[str, GenerationResult]:
+        """
+        Generates for the versions of one API, building the code for schemas they have in common only once.
+
+        Every version is loaded before extracting any of them; each still gets its own output, with the imports
+        and API prefix of its own info.version.
+        :param jobs: spec url of each version -> (template file -> output file)
+        """
+        loaded = {}
+        for spec_url in jobs:
+            metrics = SpecMetrics(spec_url)
+            spec, prune_report = self.fetch(spec_url, metrics)
+            loaded[spec_url] = (spec, prune_report, metrics)
+        specs = [spec for spec, _, _ in loaded.values()]
+        with document_caches_scope(*specs):
+            shared_schemas = share_schema_work(specs)
+            logger.info(
+                "Sharing schemas between versions",
+                extra={"versions": len(loaded), "shared_schemas": shared_schemas},
+            )
+            return {
+                spec_url: self._generate(spec_url, *loaded[spec_url], jobs[spec_url])
+                for spec_url in loaded
+            }
+
+    def generate_many(
+        self, jobs: dict[str, dict[str, str | None]], workers: int = 1
+    ) -> dict[str, GenerationResult | Exception]:
+        """
+        Generates for many specs, sharing the compiled templates and document store between them.
+
+        A failing spec does not stop the others; its exception is returned in place of its result.
+        :param jobs: spec url -> (template file -> output file)
+        :param workers: number of specs processed concurrently
+        """
+
+        def run(spec_url: str) -> GenerationResult | Exception:
+            try:
+                return self.generate(spec_url, jobs[spec_url])
+            except Exception as e:
+                logger.error(
+                    "Generation failed", extra={"spec_url": spec_url, "error": str(e)}
+                )
+                return e
+
+        if workers <= 1:
+            return {spec_url: run(spec_url) for spec_url in jobs}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return dict(zip(jobs, executor.map(run, list(jobs))))
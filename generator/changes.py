@@ -0,0 +1,103 @@
+"""
+Git-aware regeneration: works out which outputs a range of commits affects, so only those are regenerated.
+
+A manifest maps each spec file in the repository to the output file(s) generated from it:
+
+    {
+      "specs/notifications/v2.json": "packages/notifications/tests/notifications.test.ts",
+      "specs/rbac/v1.json": {"test_template.mustache": "packages/rbac/tests/rbac.test.ts"}
+    }
+
+Spec and output paths are relative to repo_dir, the repository root or a subdirectory of it; templates, as
+with --template, are relative to the working directory. A spec is regenerated when it changed in the revision
+range, or when a template it is rendered with did.
+"""
+
+import json
+import logging
+import os
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeDetectionError(Exception):
+    pass
+
+
+def load_manifest(file_path: str, default_template: str) -> dict[str, dict[str, str]]:
+    """
+    Reads a manifest, normalized to spec path -> (template file -> output file)
+    :param default_template: template for specs mapped to a single output file
+    """
+    try:
+        with open(file_path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ChangeDetectionError(f"Cannot read manifest {file_path}: {e}") from e
+    if not isinstance(manifest, dict):
+        raise ChangeDetectionError(f"Manifest {file_path} must be an object")
+
+    normalized = {}
+    for spec_path, outputs in manifest.items():
+        if isinstance(outputs, str):
+            outputs = {default_template: outputs}
+        if not isinstance(outputs, dict) or not all(
+            isinstance(dest, str) for dest in outputs.values()
+        ):
+            raise ChangeDetectionError(
+                f"Manifest entry for {spec_path} must be an output file or a template -> output file object"
+            )
+        normalized[os.path.normpath(spec_path)] = outputs
+    return normalized
+
+
+def changed_files(revision_range: str, repo_dir: str = ".") -> set[str]:
+    """
+    Paths of the files under repo_dir changed in a revision range (e.g. main...HEAD), relative to repo_dir,
+    which may be a subdirectory of the repository
+    """
+    try:
+        result = subprocess.run(
+            # -z keeps non-ASCII paths as they are instead of quoting them (core.quotePath)
+            ["git", "diff", "--name-only", "-z", "--no-renames", "--relative"]
+            + [revision_range, "--"],
+            cwd=repo_dir,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        stderr = getattr(e, "stderr", "") or ""
+        raise ChangeDetectionError(
+            f"Cannot list the files changed in {revision_range}: {stderr.strip() or e}"
+        ) from e
+    return {os.path.normpath(path) for path in result.stdout.split("\0") if path}
+
+
+def affected_jobs(
+    manifest: dict[str, dict[str, str]], changed: set[str], repo_dir: str = "."
+) -> dict[str, dict[str, str]]:
+    """
+    Picks the manifest entries to regenerate, as Generator.generate_many jobs with paths under repo_dir.
+
+    Specs deleted in the range have nothing to regenerate from and are left out.
+    """
+    jobs = {}
+    for spec_path, outputs in manifest.items():
+        templates_changed = any(
+            os.path.normpath(os.path.relpath(template, repo_dir)) in changed
+            for template in outputs
+        )
+        if spec_path not in changed and not templates_changed:
+            continue
+        spec_file = os.path.join(repo_dir, spec_path)
+        if not os.path.isfile(spec_file):
+            logger.info(
+                "Spec was deleted; nothing to regenerate", extra={"spec": spec_path}
+            )
+            continue
+        jobs[spec_file] = {
+            template: os.path.join(repo_dir, dest) for template, dest in outputs.items()
+        }
+    return jobs
@@ -0,0 +1,77 @@
+"""
+Per-spec counters and timings for batch runs, written as JSON for scraping into dashboards.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+
+from target_conversion.ref_handling import get_ref_index, get_ref_stats
+
+
+@dataclass
+class SpecMetrics(object):
+    """What generating the tests for one spec cost"""
+
+    spec_url: str
+    operations: int = 0
+    # Distinct component schemas looked up through $refs
+    schemas_resolved: int = 0
+    # $ref lookups answered by the per-spec index, and those that had to walk the spec
+    ref_cache_hits: int = 0
+    ref_cache_misses: int = 0
+    # Documents referenced by external $refs found in the document store, and those fetched
+    document_cache_hits: int = 0
+    document_cache_misses: int = 0
+    bytes_written: int = 0
+    # Seconds spent per stage: download, validate, prune, extract, render
+    durations: dict[str, float] = field(default_factory=dict)
+
+    @contextmanager
+    def timed(self, stage: str):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.durations[stage] = (
+                self.durations.get(stage, 0.0) + time.monotonic() - started
+            )
+
+    def add_ref_stats(self, before: dict[str, int], after: dict[str, int]):
+        """Adds the $ref lookups made between two snapshots of a spec's ref stats (see ref_stats_snapshot)"""
+        self.ref_cache_hits += after["hits"] - before["hits"]
+        self.ref_cache_misses += after["misses"] - before["misses"]
+        self.schemas_resolved += after["schemas_resolved"] - before["schemas_resolved"]
+
+    def add_document_stats(self, before: dict[str, int], after: dict[str, int]):
+        """Adds the document store lookups made between two snapshots of its stats"""
+        self.document_cache_hits += (after["memory_hits"] - before["memory_hits"]) + (
+            after["disk_hits"] - before["disk_hits"]
+        )
+        self.document_cache_misses += after["fetches"] - before["fetches"]
+
+
+def ref_stats_snapshot(spec: dict) -> dict[str, int]:
+    """
+    The $ref lookups made against the spec so far. They are cumulative over everything extracted from the
+    spec, so a single extraction is measured by the difference between snapshots taken before and after it
+    """
+    stats = get_ref_stats(spec)
+    return {
+        "hits": stats.get("hits", 0),
+        "misses": stats.get("misses", 0),
+        "schemas_resolved": sum(
+            1
+            for pointer in get_ref_index(spec)
+            if pointer.startswith("/components/schemas/")
+        ),
+    }
+
+
+def write_metrics(file_path: str, metrics: list[SpecMetrics]):
+    """Writes the metrics of every spec in the run to a JSON file"""
+    with open(file_path, "wt") as f:
+        json.dump(
+            {"specs": [asdict(spec_metrics) for spec_metrics in metrics]}, f, indent=2
+        )
@@ -0,0 +1,140 @@
+"""
+A parsed spec stored once in shared memory, for extraction workers in other processes.
+
+The spec is serialized into a single multiprocessing.shared_memory buffer: an offset index followed by the JSON
+of every path item and component. Workers attach to the buffer by name without copying it, and get a read-only
+Mapping over the spec that only decodes the path items and components actually looked up, so per-worker memory
+stays flat however many workers there are.
+"""
+
+import json
+import struct
+from collections.abc import Mapping
+from multiprocessing import shared_memory
+
+from target_conversion.validation import json_pointer
+
+# Containers whose children are indexed individually; everything below them is stored as one JSON document
+INDEXED_CONTAINERS = ["", "/paths", "/components"]
+HEADER_LENGTH = struct.Struct("<Q")
+
+
+class SharedSpec(object):
+    """
+    Owner of the shared memory holding a spec. Use as a context manager, or call close() when the workers are
+    done, so the memory is released.
+    """
+
+    def __init__(self, spec: dict):
+        nodes = {}
+        chunks = []
+        offset = 0
+
+        def add(pointer: str, value):
+            nonlocal offset
+            if isinstance(value, dict) and is_indexed(pointer):
+                nodes[pointer] = {"keys": list(value.keys())}
+                for key, child in value.items():
+                    add(pointer + json_pointer(key), child)
+                return
+            chunk = json.dumps(value, separators=(",", ":")).encode("utf-8")
+            nodes[pointer] = [offset, len(chunk)]
+            chunks.append(chunk)
+            offset += len(chunk)
+
+        add("", spec)
+        header = json.dumps({"nodes": nodes}, separators=(",", ":")).encode("utf-8")
+        data_start = HEADER_LENGTH.size + len(header)
+
+        self.memory = shared_memory.SharedMemory(create=True, size=data_start + offset)
+        buffer = self.memory.buf
+        HEADER_LENGTH.pack_into(buffer, 0, len(header))
+        buffer[HEADER_LENGTH.size : data_start] = header
+        position = data_start
+        for chunk in chunks:
+            buffer[position : position + len(chunk)] = chunk
+            position += len(chunk)
+
+    @property
+    def name(self) -> str:
+        """What workers pass to attach_spec"""
+        return self.memory.name
+
+    def close(self):
+        self.memory.close()
+        self.memory.unlink()
+
+    def __enter__(self) -> "SharedSpec":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def is_indexed(pointer: str) -> bool:
+    """Whether the children of the node are stored (and decoded) individually, e.g. each of /components/schemas"""
+    return pointer in INDEXED_CONTAINERS or (
+        pointer.startswith("/components/") and pointer.count("/") == 2
+    )
+
+
+class SharedSpecView(Mapping):
+    """Read-only view of a spec in shared memory; path items and components are decoded on first access"""
+
+    def __init__(
+        self, memory: shared_memory.SharedMemory, pointer: str = "", root=None
+    ):
+        self._memory = memory
+        self._pointer = pointer
+        self._root = root if root is not None else self
+        if root is None:
+            (header_length,) = HEADER_LENGTH.unpack_from(memory.buf, 0)
+            header_end = HEADER_LENGTH.size + header_length
+            self._nodes = json.loads(
+                bytes(memory.buf[HEADER_LENGTH.size : header_end])
+            )["nodes"]
+            self._data_start = header_end
+            self._decoded = {}
+        self._keys = self._root._nodes[pointer]["keys"]
+
+    def _child(self, pointer: str):
+        root = self._root
+        if pointer in root._decoded:
+            return root._decoded[pointer]
+        node = root._nodes[pointer]
+        if isinstance(node, dict):
+            value = SharedSpecView(self._memory, pointer, root)
+        else:
+            offset, length = node
+            start = root._data_start + offset
+            value = json.loads(bytes(self._memory.buf[start : start + length]))
+        root._decoded[pointer] = value
+        return value
+
+    def __getitem__(self, key):
+        pointer = self._pointer + json_pointer(key)
+        if pointer not in self._root._nodes:
+            raise KeyError(key)
+        return self._child(pointer)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def close(self):
+        """Detaches from the shared memory (without releasing it, which is up to the SharedSpec)"""
+        self._memory.close()
+
+    def __enter__(self) -> "SharedSpecView":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def attach_spec(name: str) -> SharedSpecView:
+    """Attaches to a spec shared by another process, without copying it. Close the view when done with it."""
+    # Workers share the creating process's resource tracker, so attaching does not make them owners
+    return SharedSpecView(shared_memory.SharedMemory(name=name))
@@ -0,0 +1,233 @@
+"""
+A lightweight local mock of the API described by a spec, for running generated tests without the real backend.
+
+Every route answers with the status code the generated test expects (or the one asked for with a
+"Prefer: code=..." header) and a body that conforms to the documented response schema. Responses are rendered to bytes once, up front, so serving a request is a regex match and a write.
+"""
+
+import asyncio
+import json
+import re
+from dataclasses import dataclass, field
+
+from target_conversion import ApiClientTarget
+from target_conversion.media_types import select_media, JSON
+from target_conversion.ref_handling import get_ref_from_spec
+
+REASON_PHRASES = {
+    200: "OK",
+    201: "Created",
+    202: "Accepted",
+    204: "No Content",
+    400: "Bad Request",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "Not Found",
+    409: "Conflict",
+    500: "Internal Server Error",
+}
+
+# Sample values for string formats, so mocked bodies pass format validation in the clients
+STRING_FORMAT_SAMPLES = {
+    "uuid": "00000000-0000-0000-0000-000000000000",
+    "date": "2024-01-01",
+    "date-time": "2024-01-01T00:00:00Z",
+    "time": "00:00:00",
+    "email": "user@example.com",
+    "uri": "https://example.com",
+}
+
+
+@dataclass
+class MockRoute(object):
+    """A single mocked operation with its complete, pre-rendered HTTP response"""
+
+    verb: str
+    path_pattern: re.Pattern
+    response: bytes
+    # Responses for every documented status code, selected with a "Prefer: code=404" request header
+    responses_by_code: dict[str, bytes] = field(default_factory=dict)
+
+
+def sample_from_schema(full_spec: dict, schema: dict | None, seen_refs=()):
+    """
+    Produces a JSON value that conforms to the schema, preferring examples from the spec.
+    :param seen_refs: refs already being expanded, used to cut cycles in recursive schemas
+    """
+    if schema is None:
+        return None
+    ref = schema.get("$ref", None)
+    if ref is not None:
+        if ref in seen_refs:
+            return None
+        return sample_from_schema(
+            full_spec, get_ref_from_spec(full_spec, ref), seen_refs + (ref,)
+        )
+
+    if "example" in schema:
+        return schema["example"]
+    if schema.get("examples", None):
+        return schema["examples"][0]
+    if schema.get("enum", None):
+        return schema["enum"][0]
+    if schema.get("allOf", None):
+        result = {}
+        for sub_schema in schema["allOf"]:
+            value = sample_from_schema(full_spec, sub_schema, seen_refs)
+            if isinstance(value, dict):
+                result.update(value)
+        return result
+    for key in ["oneOf", "anyOf"]:
+        if schema.get(key, None):
+            return sample_from_schema(full_spec, schema[key][0], seen_refs)
+
+    schema_type = schema.get("type", None)
+    if schema_type == "object" or "properties" in schema:
+        result = {}
+        for name, prop in schema.get("properties", {}).items():
+            value = sample_from_schema(full_spec, prop, seen_refs)
+            if value is not None or name in schema.get("required", []):
+                result[name] = value
+        return result
+    elif schema_type == "array":
+        item = sample_from_schema(full_spec, schema.get("items", None), seen_refs)
+        return [] if item is None else [item]
+    elif schema_type == "string":
+        return STRING_FORMAT_SAMPLES.get(schema.get("format", None), "string")
+    elif schema_type == "integer":
+        return int(schema.get("minimum", 0))
+    elif schema_type == "number":
+        return schema.get("minimum", 0)
+    elif schema_type == "boolean":
+        return True
+    return None
+
+
+def build_response(full_spec: dict, test_target: ApiClientTarget, code: str) -> bytes:
+    """Renders the complete HTTP response for one of the documented status codes of the test target"""
+    status = int(code)
+    operation = full_spec["paths"][test_target.url_path][test_target.verb]
+    response = operation.get("responses", {}).get(code, {})
+    if "$ref" in response:
+        response = get_ref_from_spec(full_spec, response["$ref"])
+
+    body = b""
+    headers = []
+    media = select_media(response.get("content", None))
+    if media is not None and status != 204:
+        value = sample_from_schema(full_spec, media.schema)
+        if media.handler is JSON:
+            body = json.dumps(value).encode("utf-8")
+        else:
+            body = ("" if value is None else str(value)).encode("utf-8")
+        # Media type ranges like */* cannot be sent as a Content-Type
+        media_type = media.media_type
+        if "*" in media_type:
+            media_type = "application/json" if media.handler is JSON else "text/plain"
+        headers.append(f"Content-Type: {media_type}")
+
+    return render_http_response(status, body, headers)
+
+
+def render_http_response(status: int, body: bytes, headers: list[str]) -> bytes:
+    """Renders the status line, headers and body of an HTTP/1.1 response"""
+    reason = REASON_PHRASES.get(status, "Unknown")
+    head = [f"HTTP/1.1 {status} {reason}", *headers, f"Content-Length: {len(body)}"]
+    return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+
+
+def build_routes(
+    full_spec: dict, test_targets: list[ApiClientTarget], base_path: str
+) -> list[MockRoute]:
+    """
+    Builds a route per test target; templated path segments like {id} match any value.
+    :param base_path: path prefix of the API, e.g. /api/notifications/v2.0
+    """
+    routes = []
+    for test_target in test_targets:
+        pattern = re.sub(
+            r"\\{[^/]+?\\}", "[^/]+", re.escape(base_path + test_target.url_path)
+        )
+        routes.append(
+            MockRoute(
+                verb=test_target.verb.upper(),
+                path_pattern=re.compile(pattern),
+                response=build_response(
+                    full_spec, test_target, test_target.expected_response
+                ),
+                responses_by_code={
+                    code: build_response(full_spec, test_target, code)
+                    for code in test_target.responses
+                    if code.isdigit()
+                },
+            )
+        )
+    # Paths with the most literal characters win, e.g. /bundles/facets over /bundles/{name}
+    routes.sort(key=lambda route: -len(route.path_pattern.pattern.replace("[^/]+", "")))
+    return routes
+
+
+NOT_FOUND_RESPONSE = render_http_response(404, b"", [])
+PREFER_CODE = re.compile(r"code=(\d+)")
+
+
+class MockApiServer(object):
+    """asyncio HTTP server answering with the pre-rendered response of the matching route"""
+
+    def __init__(self, routes: list[MockRoute]):
+        self.routes = routes
+
+    def find_response(
+        self, verb: str, path: str, preferred_code: str | None = None
+    ) -> bytes:
+        path = path.split("?", 1)[0]
+        for route in self.routes:
+            if route.verb == verb and route.path_pattern.fullmatch(path):
+                return route.responses_by_code.get(preferred_code, route.response)
+        return NOT_FOUND_RESPONSE
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                verb, path, _ = request_line.decode("latin-1").split(" ", 2)
+
+                # Headers are only needed to skip over the request body and pick the preferred response
+                content_length = 0
+                keep_alive = True
+                preferred_code = None
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    if name.strip().lower() == "content-length":
+                        content_length = int(value.strip())
+                    elif name.strip().lower() == "connection":
+                        keep_alive = value.strip().lower() != "close"
+                    elif name.strip().lower() == "prefer":
+                        match = PREFER_CODE.search(value)
+                        preferred_code = match.group(1) if match else None
+                if content_length:
+                    await reader.readexactly(content_length)
+
+                writer.write(self.find_response(verb, path, preferred_code))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str, port: int) -> asyncio.Server:
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def serve_forever(self, host: str, port: int):
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
@@ -1,28 +1,214 @@
+import functools
+import gzip
+import hashlib
 import json
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import BinaryIO
+from urllib.parse import urljoin, urlparse
+from urllib.request import url2pathname
 
 import requests
+import urllib3
 
+from target_conversion.ref_handling import register_document, split_ref
 
-def download_specfile(url: str):
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DownloadPolicy(object):
+    """How specs and the documents they reference are fetched over HTTP"""
+
+    # Seconds allowed for connecting, and between bytes of the response once connected
+    connect_timeout: float = 5.0
+    read_timeout: float = 30.0
+    # Further attempts after a connection error, timeout or retryable status (e.g. 503)
+    retries: int = 3
+    # Delay before the first retry, doubled for each further one up to max_backoff, with full jitter
+    backoff: float = 0.5
+    max_backoff: float = 8.0
+    # Concurrent downloads from the same host
+    max_per_host: int = 4
+
+
+default_download_policy = DownloadPolicy()
+
+# Statuses worth another attempt; any other error status fails at once
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+# Errors worth another attempt, including those raised while streaming the body (urllib3 read timeouts)
+RETRYABLE_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    urllib3.exceptions.HTTPError,
+)
+
+# Limits concurrent downloads per (host, max_per_host), shared by every thread of the process
+_host_slots: dict[tuple[str, int], threading.BoundedSemaphore] = {}
+_host_slots_lock = threading.Lock()
+
+
+def host_slots(url: str, policy: DownloadPolicy) -> threading.BoundedSemaphore:
+    key = (urlparse(url).netloc, policy.max_per_host)
+    with _host_slots_lock:
+        slots = _host_slots.get(key, None)
+        if slots is None:
+            slots = threading.BoundedSemaphore(policy.max_per_host)
+            _host_slots[key] = slots
+    return slots
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, requests.HTTPError):
+        return (
+            error.response is not None
+            and error.response.status_code in RETRYABLE_STATUSES
+        )
+    return isinstance(error, RETRYABLE_ERRORS)
+
+
+def backoff_delay(attempt: int, policy: DownloadPolicy) -> float:
+    """Seconds to wait before retrying after the given (0 based) attempt"""
+    return random.uniform(0, min(policy.max_backoff, policy.backoff * 2**attempt))
+
+
+def with_retries(url: str, policy: DownloadPolicy, download):
+    """
+    Calls download() until it succeeds, retrying transient failures with exponential backoff. Only one of the
+    host's slots is held per attempt, not while backing off. The last error is raised as it is.
+    """
+    attempt = 0
+    while True:
+        try:
+            with host_slots(url, policy):
+                return download()
+        except Exception as e:
+            if attempt >= policy.retries or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt, policy)
+            logger.warning(
+                "Download failed; retrying",
+                extra={
+                    "spec_url": url,
+                    "attempt": attempt + 1,
+                    "delay": round(delay, 3),
+                    "error": str(e),
+                },
+            )
+            time.sleep(delay)
+            attempt += 1
+
+
+def download_specfile(
+    url: str,
+    store: "DocumentStore | None" = None,
+    policy: DownloadPolicy | None = None,
+):
+    """
+    Downloads a spec and the documents it references
+    :raises SpecDownloadError: caused by the original error of the last attempt
+    """
     try:
-        return get_spec(url)
-    except Exception:
-        print("Something went wrong while downloading spec from URL")
-        raise SpecDownloadError
+        spec = get_spec(url, policy)
+    except Exception as e:
+        logger.warning(
+            "Something went wrong while downloading spec from URL",
+            extra={"spec_url": url, "error": repr(e)},
+        )
+        raise SpecDownloadError(f"Could not download spec from {url}: {e}") from e
 
+    # Pull in any documents referenced by external/relative $refs
+    if store is None:
+        store = default_document_store
+    store.resolve_external_refs(spec, url)
+    return spec
 
-def get_spec(url) -> dict:
-    """Get the openapi spec from an url"""
-    resp = requests.get(url)
 
-    if "yaml" in url:
-        result = convert_yaml_to_json(resp.text)
-    elif "json" in url:
-        result = json.loads(resp.text)
+def get_spec(url, policy: DownloadPolicy | None = None) -> dict:
+    """
+    Get the openapi spec from an url or a local file path.
+
+    Documents compressed with gzip or zstd (".gz"/".zst" extension, or a Content-Encoding the HTTP client does
+    not decode itself) are decompressed as they are read, straight into the parser. HTTP downloads follow the
+    timeouts, retries and per-host limit of the policy.
+    """
+    parsed_url = urlparse(url)
+    document_name, extension = os.path.splitext(parsed_url.path)
+    compression = COMPRESSED_EXTENSIONS.get(extension, None)
+    if compression is None:
+        document_name = url
+    if "yaml" in document_name:
+        parse = parse_yaml_stream
+    elif "json" in document_name:
+        parse = json.load
     else:
-        raise SpecDownloadError
+        raise SpecDownloadError(f"{url} is neither a JSON nor a YAML document")
+
+    if parsed_url.scheme in ["http", "https"]:
+        if policy is None:
+            policy = default_download_policy
+
+        def download() -> dict:
+            with requests.get(
+                url,
+                stream=True,
+                timeout=(policy.connect_timeout, policy.read_timeout),
+            ) as resp:
+                resp.raise_for_status()
+                # urllib3 decodes gzip/deflate (and zstd, when zstandard is installed) transfer encodings
+                resp.raw.decode_content = True
+                encoding = resp.headers.get("Content-Encoding", "").strip().lower()
+                stream = resp.raw
+                if encoding == "zstd" and not content_decoded(resp, encoding):
+                    stream = decompressing_stream(stream, encoding)
+                # A .json.gz served with Content-Encoding: gzip is compressed once, not twice
+                if compression is not None and compression != encoding:
+                    stream = decompressing_stream(stream, compression)
+                return parse(stream)
+
+        return with_retries(url, policy, download)
+
+    file_path = url2pathname(parsed_url.path) if parsed_url.scheme == "file" else url
+    with open(file_path, "rb") as f:
+        return parse(decompressing_stream(f, compression))
 
-    return result
+
+# File extensions of compressed documents
+COMPRESSED_EXTENSIONS = {
+    ".gz": "gzip",
+    ".gzip": "gzip",
+    ".zst": "zstd",
+    ".zstd": "zstd",
+}
+
+
+def decompressing_stream(stream: BinaryIO, compression: str | None) -> BinaryIO:
+    """Wraps a binary stream so reading from it yields the decompressed document"""
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=stream)
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise SpecDownloadError(
+                "Reading zstd compressed specs requires the zstandard package"
+            ) from e
+        return zstandard.ZstdDecompressor().stream_reader(stream)
+    return stream
+
+
+def parse_yaml_stream(stream: BinaryIO) -> dict:
+    return convert_yaml_to_json(stream.read().decode("utf-8"))
+
+
+def content_decoded(resp: requests.Response, encoding: str) -> bool:
+    """Whether urllib3 already decodes the given Content-Encoding for this response"""
+    return encoding in getattr(resp.raw, "CONTENT_DECODERS", [])
 
 
 class SpecDownloadError(Exception):
@@ -32,3 +218,111 @@ class SpecDownloadError(Exception):
 def convert_yaml_to_json(file_data: str) -> dict:
     """Convert a YAML spec file to a JSON spec file"""
     raise NotImplementedError
+
+
+class DocumentStore(object):
+    """
+    Shared store for documents referenced by external $refs (e.g. "common.json#/components/schemas/Error").
+
+    Each document is fetched at most once per store: it is kept in memory and, when a cache directory is
+    given, on disk so that later runs do not need the network at all.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | None = None,
+        fetch=None,
+        policy: DownloadPolicy | None = None,
+    ):
+        self.cache_dir = cache_dir
+        self.fetch = (
+            fetch if fetch is not None else functools.partial(get_spec, policy=policy)
+        )
+        # Documents whose external refs have all been resolved
+        self.documents: dict[str, dict] = {}
+        # Documents still having their external refs resolved, by the thread holding the lock
+        self._loading: dict[str, dict] = {}
+        # Held while documents are loaded, so specs generated in concurrent threads fetch each one only once. It
+        # is reentrant because loading a document loads the documents it references.
+        self._lock = threading.RLock()
+        # How each requested document was found: in memory, in the cache directory, or fetched
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "fetches": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, stat: str):
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def _cache_path(self, url: str) -> str:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def get(self, url: str) -> dict:
+        """Gets the document at the given absolute url, fetching it only if it is not cached"""
+        document = self.documents.get(url, None)
+        if document is not None:
+            self._count("memory_hits")
+            return document
+
+        with self._lock:
+            # Loaded by another thread while waiting for the lock, or referenced back by a document being loaded
+            document = self.documents.get(url, self._loading.get(url, None))
+            if document is not None:
+                self._count("memory_hits")
+                return document
+
+            if self.cache_dir and os.path.isfile(self._cache_path(url)):
+                self._count("disk_hits")
+                with open(self._cache_path(url), "r") as f:
+                    document = json.load(f)
+            else:
+                self._count("fetches")
+                try:
+                    document = self.fetch(url)
+                except Exception as e:
+                    raise SpecDownloadError(
+                        f"Unable to fetch referenced document {url}"
+                    ) from e
+                if self.cache_dir:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    with open(self._cache_path(url), "wt") as f:
+                        json.dump(document, f)
+
+            # Visible before resolving so that documents referencing each other do not loop forever
+            self._loading[url] = document
+            register_document(url, document)
+            try:
+                self.resolve_external_refs(document, url, is_root=False)
+            finally:
+                del self._loading[url]
+            self.documents[url] = document
+            return document
+
+    def resolve_external_refs(self, document: dict, base_url: str, is_root=True):
+        """
+        Rewrites every non-local $ref in the document to an absolute url and loads the referenced documents.
+
+        Local refs ("#/...") are left alone in the root spec; in external documents they are made absolute so
+        that they keep pointing into the document they were written in.
+        """
+        pending = [document]
+        while pending:
+            cur = pending.pop()
+            if isinstance(cur, list):
+                pending.extend(cur)
+                continue
+            if not isinstance(cur, dict):
+                continue
+            ref = cur.get("$ref", None)
+            if isinstance(ref, str):
+                document_url, pointer = split_ref(ref)
+                if document_url != "" or not is_root:
+                    absolute_url = urljoin(base_url, document_url)
+                    cur["$ref"] = f"{absolute_url}#{pointer}"
+                    if document_url != "":
+                        self.get(absolute_url)
+            pending.extend(cur.values())
+
+
+# Store shared by every download in this process, so common documents are fetched once per batch
+default_document_store = DocumentStore()
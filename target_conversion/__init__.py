@@ -2,16 +2,78 @@
 Code for converting information from the openapi spec into target format for template substitution.
 """
 
+import random
+import threading
 import uuid
+from collections import Counter
 from dataclasses import dataclass
+from functools import lru_cache
 
-from target_conversion.data_modeling import RequestBodyParameter, ApiClientTarget
+from target_conversion.data_modeling import (
+    RequestBodyParameter,
+    ApiClientTarget,
+    ExtractionResult,
+)
 
 from target_conversion.ref_handling import (
+    document_caches_scope,
+    get_document_cache,
     get_base_object_from_ref,
+    get_ref_from_spec,
+    get_ref_info,
+    get_schema_fingerprint,
     ref_is_basic_type_alias,
+    share_document_cache,
+    RefInfo,
+    SCHEMAS_PREFIX,
+)
+from target_conversion.ref_handling import (
+    get_request_body_parameters_from_ref,
+    copy_parameter_data,
+    BASIC_TYPES,
+)
+from target_conversion.pruning import prune_spec, PruneReport
+from target_conversion.intermediate import dump_ir, load_ir, IntermediateFormatError
+from target_conversion.naming import (
+    operation_names,
+    OperationNames,
+    InvalidOperationIdError,
+)
+from target_conversion.cases import build_test_cases, hoist_shared_fixtures
+from target_conversion.assertions import build_response_assertions
+from target_conversion.limits import (
+    DEFAULT_MAX_REF_DEPTH,
+    GenerationLimits,
+    LimitHit,
+    LimitTracker,
+    placeholder_object,
+    placeholder_value,
+)
+from target_conversion.codegen import (
+    Node,
+    Raw,
+    Literal,
+    Property,
+    ObjectLiteral,
+    Const,
+    serialize,
+    JS_IDENTIFIER,
+    js_property_name,
+)
+from target_conversion.media_types import (
+    get_media_type_handler,
+    register_media_type,
+    select_media,
+    MediaTypeHandler,
+    SelectedMedia,
+    JSON,
+)
+from target_conversion.validation import (
+    validate_spec,
+    json_pointer,
+    ValidationProblem,
+    SpecValidationError,
 )
-from target_conversion.ref_handling import get_request_body_parameters_from_ref
 
 
 class Spec(object):
@@ -28,52 +90,57 @@ class Spec(object):
         :param ref:
         :return:
         """
-        split_ref = ref.split("/")
-        split_ref.remove("#")
-        cur = self.spec_data
-        for tier in split_ref:
-            cur = cur.get(tier)
-        return cur
+        return get_ref_from_spec(self.spec_data, ref)
 
 
 def build_test_target(
-    full_spec: dict, path_value: str, verb_value: str
+    full_spec: dict,
+    path_value: str,
+    verb_value: str,
+    limits: LimitTracker | None = None,
 ) -> ApiClientTarget:
     """
     Builds a TestTarget based on the information about an endpoint found in the spec
     :param full_spec: dict with all the openapi spec info
     :param path_value: endpoint path
     :param verb_value: http verb
+    :param limits: limits on the extraction work, shared by all the endpoints of the spec
     :return:
     """
     lookup_base = full_spec["paths"][path_value][verb_value]
-    try:
-        # If the request has a request body, gather the name as CamelCase for use later
-        request_schema = lookup_base["requestBody"]["content"]["application/json"][
-            "schema"
-        ]["$ref"]
-        parameter_schema = lookup_base["requestBody"]["content"]["application/json"][
-            "schema"
-        ]["$ref"]
-        request_schema_class = request_schema.split("/")[-1]
-    except KeyError:
-        request_schema = ""
-        request_schema_class = ""
-        parameter_schema = ""
+    if limits is not None:
+        limits.operation_id = lookup_base.get("operationId", None)
+    request_media = select_media(lookup_base.get("requestBody", {}).get("content"))
+
+    # If the request has a request body, gather the name as CamelCase for use later
+    request_schema = ref_of(request_media.schema) if request_media is not None else ""
+    parameter_schema = request_schema
+    request_schema_class = (
+        get_ref_info(full_spec, request_schema).base_name if request_schema else ""
+    )
 
-    try:
-        # If the request has a response body schema, gather that info
-        response_schema = lookup_base["responses"]["200"]["content"][
-            "application/json"
-        ]["schema"]["$ref"]
-        response_schema_class = response_schema.split("/")[-1]
-    except KeyError:
-        response_schema = ""
-        response_schema_class = ""
+    # If the request has a response body schema, gather that info
+    ok_response = lookup_base["responses"].get("200", None)
+    response_media = (
+        select_media(ok_response.get("content", None))
+        if isinstance(ok_response, dict)
+        else None
+    )
+    response_schema = (
+        ref_of(response_media.schema) if response_media is not None else ""
+    )
+    response_schema_class = (
+        get_ref_info(full_spec, response_schema).base_name if response_schema else ""
+    )
 
-    request_class = convert_operation_id_to_classname(lookup_base["operationId"])
+    request_class = operation_names(lookup_base["operationId"]).class_name
     req_body_parameters = get_request_body_parameters(full_spec, path_value, verb_value)
-    url_parameters = get_url_embedded_parameters(full_spec, path_value, verb_value)
+    # Path parameters are always needed; query, header and cookie parameters only when required
+    url_parameters = [
+        param
+        for param in get_operation_parameters(full_spec, path_value, verb_value)
+        if param.location == "path" or param.required
+    ]
 
     # determine if all param values from a request body are required on the request
     try:
@@ -82,12 +149,20 @@ def build_test_target(
         include_all = False
 
     dependent_param_str, api_client_param_str, resolved_params = build_param_string(
-        full_spec, req_body_parameters, url_parameters, include_all=include_all
+        full_spec,
+        req_body_parameters,
+        url_parameters,
+        include_all=include_all,
+        limits=limits,
+        media_handler=request_media.handler if request_media is not None else None,
     )
 
     # Each "Request" object has a "Params" object
     parameter_class = (
-        (get_base_object_from_ref(parameter_schema).removesuffix("Request") + "Params")
+        (
+            get_ref_info(full_spec, parameter_schema).base_name.removesuffix("Request")
+            + "Params"
+        )
         if parameter_schema != ""
         else ""
     )
@@ -100,6 +175,29 @@ def build_test_target(
             expected_response = code
             break
 
+    # Response table, so extra test cases per status code need no further spec lookups
+    responses = {}
+    for code, response in lookup_base["responses"].items():
+        if "$ref" in response:
+            response = get_ref_from_spec(full_spec, response["$ref"]) or {}
+        media = select_media(response.get("content", None))
+        responses[code] = media.schema if media is not None else None
+
+    request_body_examples = {}
+    # Examples of structured bodies replace the request object, so only JSON ones are valid object literals
+    request_media_data = (
+        request_media.data
+        if request_media is not None and request_media.handler is JSON
+        else {}
+    )
+    for name, example in request_media_data.get("examples", {}).items():
+        if "$ref" in example:
+            example = get_ref_from_spec(full_spec, example["$ref"]) or {}
+        if "value" in example:
+            request_body_examples[name] = example["value"]
+    if "example" in request_media_data:
+        request_body_examples.setdefault("example", request_media_data["example"])
+
     test_target = ApiClientTarget(
         url_path=path_value,
         verb=verb_value,
@@ -116,10 +214,31 @@ def build_test_target(
         parameter_dependent_objects=dependent_param_str,
         expected_response=expected_response,
         resolved_params=resolved_params,
+        responses=responses,
+        request_body_examples=request_body_examples,
+        request_media_type=(
+            request_media.media_type if request_media is not None else ""
+        ),
+        # Form fields are passed one by one, so there is no request object to import
+        request_import_class=(
+            (get_ref_info(full_spec, parameter_schema).import_name or "")
+            if parameter_schema and not request_media.handler.form_fields
+            else ""
+        ),
+        response_assertions={
+            code: build_response_assertions(full_spec, schema)
+            for code, schema in responses.items()
+        },
     )
     return test_target
 
 
+def ref_of(schema: dict | None) -> str:
+    """The $ref of a body schema, or "" for inline schemas"""
+    ref = schema.get("$ref", "") if isinstance(schema, dict) else ""
+    return ref if isinstance(ref, str) else ""
+
+
 def get_request_body_parameters(
     full_spec: dict, spec_path: str, spec_verb: str
 ) -> list[RequestBodyParameter]:
@@ -130,9 +249,18 @@ def get_request_body_parameters(
     if not has_req_body:
         return []
 
-    req_body_schema = full_spec["paths"][spec_path][spec_verb]["requestBody"][
-        "content"
-    ]["application/json"]["schema"]
+    request_body = full_spec["paths"][spec_path][spec_verb]["requestBody"]
+    request_media = select_media(request_body.get("content", None))
+    req_body_schema = request_media.schema if request_media is not None else None
+    if not isinstance(req_body_schema, dict):
+        # No media type we can generate a body for (e.g. application/xml)
+        return []
+    if request_media.handler.form_fields:
+        form_fields = get_form_fields(
+            full_spec, req_body_schema, request_body.get("required", False) is True
+        )
+        if form_fields is not None:
+            return form_fields
     # schema is typically either a $ref or a single item with a type declaration and other info
     is_ref = req_body_schema.get("$ref", None) is not None
     result = []
@@ -160,51 +288,95 @@ def get_request_body_parameters(
                 unique=item_unique,
                 ref=None,
                 example=None,
+                format=req_body_schema.get("format", None),
             )
         )
 
     return result
 
 
+def get_form_fields(
+    full_spec: dict, form_schema: dict, include_all: bool
+) -> list[RequestBodyParameter] | None:
+    """
+    Gets the fields of a form body (urlencoded or multipart), each passed to the client as a parameter of its own
+    :param include_all: include every field, not just the required ones
+    :return: None when the form schema is not an object, so the body is sent as a single value
+    """
+    ref = form_schema.get("$ref", None)
+    if ref is not None:
+        if get_ref_info(full_spec, ref).is_basic_type_alias:
+            return None
+        return get_request_body_parameters_from_ref(
+            full_spec, ref, include_optional=include_all
+        )
+    if form_schema.get("type", None) in BASIC_TYPES:
+        return None
+    properties = form_schema.get("properties", {})
+    names = list(properties) if include_all else form_schema.get("required", [])
+    return [copy_parameter_data(name, properties.get(name, {})) for name in names]
+
+
 @dataclass
 class URLEmbeddedParameter(object):
     """
-    Information about a param embedded in the url path
+    Information about a param embedded in the url path, or passed in the query string, a header or a cookie
     """
 
     name: str
-    schema: str | None
+    schema: dict | None
     type: str | None
     required: bool
+    # "path", "query", "header" or "cookie"
+    location: str = "path"
 
 
-def get_url_embedded_parameters(
+def get_operation_parameters(
     full_spec: dict, spec_path: str, spec_verb: str
 ) -> list[URLEmbeddedParameter]:
-    """Gets the list of any url-embedded parameters from the spec"""
-    result = []
-
-    parameters = full_spec["paths"][spec_path][spec_verb].get("parameters", None)
-    if parameters is None:
-        return result
+    """
+    Gets the list of all the parameters of an endpoint from the spec, whatever their location.
 
-    for param in parameters:
-        if param.get("in", None) == "path":
-            try:
-                schema_type = param.get("schema").get("type")
-            except KeyError:
-                schema_type = None
+    Parameters declared on the path item apply to every verb unless the operation overrides them, and
+    parameters given as a $ref (e.g. to #/components/parameters/limit) are resolved.
+    """
+    path_item = full_spec["paths"][spec_path]
+    declared = {}
+    for param in path_item.get("parameters", []) + path_item[spec_verb].get(
+        "parameters", []
+    ):
+        if "$ref" in param:
+            param = get_ref_from_spec(full_spec, param["$ref"])
+        declared[(param.get("name"), param.get("in", None))] = param
 
-            embedded_param = URLEmbeddedParameter(
+    result = []
+    for param in declared.values():
+        schema = param.get("schema", None)
+        schema_type = schema.get("type", None) if schema is not None else None
+        result.append(
+            URLEmbeddedParameter(
                 param.get("name"),
-                param.get("schema", None),
+                schema,
                 schema_type if schema_type is not None else param.get("type", None),
-                param.get("required"),
+                # path parameters are always required
+                param.get("required", param.get("in", None) == "path"),
+                param.get("in", None),
             )
-            result.append(embedded_param)
+        )
     return result
 
 
+def get_url_embedded_parameters(
+    full_spec: dict, spec_path: str, spec_verb: str
+) -> list[URLEmbeddedParameter]:
+    """Gets the list of any url-embedded parameters from the spec"""
+    return [
+        param
+        for param in get_operation_parameters(full_spec, spec_path, spec_verb)
+        if param.location == "path"
+    ]
+
+
 def build_param_imports(
     client_name, api_version, test_targets: list[ApiClientTarget]
 ) -> list[dict]:
@@ -212,11 +384,9 @@ def build_param_imports(
     import_data = []
     for test_target in test_targets:
         # e.g. "NotificationResourceV2CreateBehaviorGroupParams"
-        friendly_operation_id = camel_case(test_target.operation_id.replace("$", ""))
-        import_class = f"{friendly_operation_id}Params"
-        import_package = f"{friendly_operation_id}"
+        names = operation_names(test_target.operation_id)
         import_data.append(
-            {"importClass": import_class, "importPackage": import_package}
+            {"importClass": names.params_class, "importPackage": names.import_package}
         )
     return import_data
 
@@ -225,19 +395,19 @@ def build_request_imports(
     client_name, api_version, test_targets: list[ApiClientTarget]
 ) -> list[dict]:
     """
-    Build the import data needed for the Request object imports
+    Build the import data needed for the Request object imports, once per class even when several operations
+    send the same request object
     :return:
     """
-    import_data = []
-
-    for test_target in test_targets:
-        if test_target.parameter_class != "":
-            import_class = f"{test_target.parameter_class}".replace("Params", "Request")
-            import_package = "types"
-            import_data.append(
-                {"importClass": import_class, "importPackage": import_package}
-            )
-    return import_data
+    import_classes = dict.fromkeys(
+        test_target.request_import_class
+        for test_target in test_targets
+        if test_target.request_import_class != ""
+    )
+    return [
+        {"importClass": import_class, "importPackage": "types"}
+        for import_class in import_classes
+    ]
 
 
 def build_imports(
@@ -266,26 +436,45 @@ def build_imports(
     return imports
 
 
-def request_body_parameter_as_string(request_body_param: RequestBodyParameter) -> str:
+def request_body_parameter_as_string(
+    request_body_param: RequestBodyParameter, binary_files: bool = False
+) -> str:
     """
     Convert RequestBodyParameter object to a string like "name: value"
     :param request_body_param:
+    :param binary_files: send strings with format: binary as file contents, see MediaTypeHandler
     :return:
     """
+    node = request_body_parameter_node(request_body_param, binary_files)
+    return serialize(node) if node is not None else None
+
+
+def request_body_parameter_node(
+    request_body_param: RequestBodyParameter, binary_files: bool = False
+) -> Node | None:
+    """Builds the "name: value" property (or just the value, for unnamed parameters) of a basic type"""
     if request_body_param.type == "string":
-        if request_body_param.example:
-            value = f'"{request_body_param.example}"'
+        if binary_files and request_body_param.format == "binary":
+            value = Raw(BINARY_FILE_VALUE)
+        elif request_body_param.example:
+            value = Literal(str(request_body_param.example))
         else:
-            value = dummy_value_for_type("string")
+            value = Raw(dummy_value_for_type("string"))
     else:
-        value = dummy_value_for_type(
+        code = dummy_value_for_type(
             request_body_param.type, unique=request_body_param.unique
         )
+        value = Raw(code) if code is not None else None
 
-    if request_body_param.name:
-        return f"{request_body_param.name}: {value}"
-    else:
+    if not request_body_param.name:
         return value
+    return Property(
+        request_body_param.name, value if value is not None else Literal(None)
+    )
+
+
+# File contents sent for format: binary strings in multipart and binary request bodies
+BINARY_FILE_VALUE = 'new Blob([""])'
 
 
 def dummy_value_for_type(input_type: str, unique=False):
@@ -300,40 +489,153 @@ def dummy_value_for_type(input_type: str, unique=False):
         return "true"
     elif input_type == "string":
         return '""'
-    elif input_type == "number":
+    elif input_type in ["number", "integer"]:
         return "0"
     # "Object" is a special case that deserves further thought
     # elif input_type == "object":
     #     return "null"
 
 
+# Source of the UUIDs put into generated requests; seeded for reproducible output (e.g. golden snapshots). Kept
+# per thread, so specs generated concurrently each draw from their own sequence.
+_uuid_state = threading.local()
+
+
+def seed_uuids(seed: int | None):
+    """Makes the UUIDs generated in the current thread reproducible from the seed, or random again with None"""
+    _uuid_state.random = random.Random(seed) if seed is not None else None
+
+
+def generate_uuid() -> str:
+    uuid_random = getattr(_uuid_state, "random", None)
+    if uuid_random is None:
+        return str(uuid.uuid4())
+    return str(uuid.UUID(int=uuid_random.getrandbits(128), version=4))
+
+
 def build_dependent_param_string(
-    full_spec: dict, dependent_params: list[RequestBodyParameter], include_all=False
+    full_spec: dict,
+    dependent_params: list[RequestBodyParameter],
+    include_all=False,
+    limits: LimitTracker | None = None,
+    depth: int = 0,
 ) -> str:
-    """Builds a string representation for each item in the input list"""
-    dependent_params_strs = []
+    """
+    Builds the const declaration of the request object for each item in the input list
+
+    Objects nested deeper than the ref depth limit (e.g. in cyclic schemas), generated after the time budget ran
+    out, or larger than the literal size limit are replaced by an empty placeholder object. The size is also
+    tracked while the literal is built, so nested objects stop being expanded as soon as it is exceeded.
+
+    Each declaration is built once per spec and reused by every operation sending the same request object, so
+    identical requests (down to their generated UUIDs) can be shared between tests. Declarations are keyed by
+    the content of the schema, so specs sharing their caches (see share_schema_work) build each one only once.
+    """
+    cache = get_document_cache(full_spec, "request_objects")
+    cache_limits = (
+        (limits.limits.max_ref_depth, limits.limits.max_literal_size)
+        if limits is not None
+        else None
+    )
+    out: list[str] = []
     for dependent_param in dependent_params:
-        # determine the object name
-        base_str = get_base_object_from_ref(dependent_param.ref)
-        if base_str == "UUID":
-            dependent_params_strs += f'{dependent_param.name}: "{uuid.uuid4()}"'
-            continue
-        obj_name = f"{base_str[0].lower()}{base_str[1:]}"
-        dependent_param_str = f"""const {obj_name} : {base_str} = """
-        dependent_params_from_ref = get_request_body_parameters_from_ref(
-            full_spec, dependent_param.ref, include_optional=include_all
+        cache_key = (
+            get_schema_fingerprint(full_spec, dependent_param.ref),
+            include_all,
+            depth,
+            cache_limits,
         )
+        if cache_key in cache:
+            out.append(cache[cache_key])
+            continue
 
-        # If any of the params are not basic types we need to dive deeper
-        dependent_param_str += (
-            "{ " + render_params_as_string(full_spec, dependent_params_from_ref) + " };"
-        )
-        dependent_params_strs.append(dependent_param_str)
+        # determine the object name
+        base_str = get_ref_info(full_spec, dependent_param.ref).base_name
+        obj_name = f"{base_str[0].lower()}{base_str[1:]}"
 
-    return "".join(dependent_params_strs)
+        start = len(out)
+        reached_before = limits.times_reached if limits is not None else 0
+        if depth == 0 and limits is not None:
+            limits.start_literal()
+        Const(
+            obj_name,
+            base_str,
+            build_ref_value(
+                full_spec, dependent_param.ref, include_all, limits=limits, depth=depth
+            ),
+        ).write(out)
+        if (
+            depth == 0
+            and limits is not None
+            and sum(len(piece) for piece in out[start:])
+            > limits.limits.max_literal_size
+        ):
+            limits.record("max_literal_size", dependent_param.ref)
+            del out[start:]
+            placeholder_object(obj_name, base_str).write(out)
+
+        # Degraded declarations are left out of the cache so each operation records its own limit hits
+        if limits is None or limits.times_reached == reached_before:
+            cache[cache_key] = "".join(out[start:])
+
+    return "".join(out)
+
+
+def share_schema_work(specs: list[dict]) -> int:
+    """
+    Lets the specs (e.g. the live versions of one API) share the request objects and response assertions
+    generated for schemas that are identical between them
+    :return: the number of component schemas that are identical in more than one of the specs
+    """
+    for cache_name in ["request_objects", "response_assertions"]:
+        share_document_cache(specs, cache_name)
+    versions_per_schema = Counter(
+        get_schema_fingerprint(spec, f"{SCHEMAS_PREFIX}{json_pointer(name)[1:]}")
+        for spec in specs
+        for name in spec.get("components", {}).get("schemas", {})
+    )
+    return sum(1 for count in versions_per_schema.values() if count > 1)
 
 
-CUSTOM_UUID_REFS = ["#/components/schemas/UUID"]
+def build_ref_value(
+    full_spec: dict,
+    ref: str,
+    include_all=False,
+    limits: LimitTracker | None = None,
+    depth: int = 0,
+) -> Node:
+    """Builds the value for a $ref: an object literal for object schemas, a plain value for basic type aliases"""
+    ref_info = get_ref_info(full_spec, ref)
+    if ref_info.is_basic_type_alias:
+        return schema_value_node(full_spec, {"$ref": ref}, None)
+
+    max_ref_depth = (
+        limits.limits.max_ref_depth if limits is not None else DEFAULT_MAX_REF_DEPTH
+    )
+    if depth > max_ref_depth:
+        if limits is not None:
+            limits.record("max_ref_depth", ref)
+        return placeholder_value(ref_info.base_name)
+    if limits is not None and limits.time_exhausted():
+        limits.record("time_budget", ref)
+        return placeholder_value(ref_info.base_name)
+
+    dependent_params_from_ref = get_request_body_parameters_from_ref(
+        full_spec, ref, include_optional=include_all
+    )
+    # At least the braces, plus the name, separators and a minimal value for every property
+    literal_size = 4 + sum(
+        len(param.name or "") + 6 for param in dependent_params_from_ref
+    )
+    if limits is not None and not limits.grow_literal(literal_size):
+        limits.record("max_literal_size", ref)
+        return placeholder_value(ref_info.base_name)
+    # If any of the params are not basic types we need to dive deeper
+    return ObjectLiteral(
+        build_property_nodes(
+            full_spec, dependent_params_from_ref, limits=limits, depth=depth + 1
+        )
+    )
 
 
 def build_param_string(
@@ -341,6 +643,8 @@ def build_param_string(
     req_body_parameters: list[RequestBodyParameter] | None,
     url_parameters: list[URLEmbeddedParameter] | None,
     include_all: bool = False,
+    limits: LimitTracker | None = None,
+    media_handler: MediaTypeHandler | None = None,
 ) -> (str, str, list[str]):
     """Takes the parameter info extracted from the spec and produces:
 
@@ -361,90 +665,177 @@ def build_param_string(
     :param full_spec: object containing all the openapi spec in dict format
     :param req_body_parameters: RequestBodyParameter objects obtained from previous spec parsing
     :param url_parameters: "embedded" parameters for this endpoint, obtained from previous spec parsing
+    :param limits: limits on the extraction work, see build_dependent_param_string
+    :param media_handler: how the request body is sent; JSON when not given. The request body parameters of
+        forms are their fields (see get_form_fields), each passed to the client as a parameter of its own.
     :return:
     """
+    binary_files = media_handler is not None and media_handler.binary_files
 
     url_param_strs: list[str] = []
     resolved: list[str] = []
 
     if url_parameters is not None:
-        # URL parameters first
-        for url_param in url_parameters:
-            if url_param.schema.get("$ref", None) in CUSTOM_UUID_REFS:
-                url_param_strs.append(f'{url_param.name}: "{uuid.uuid4()}"')
-            else:
-                url_param_strs.append(
-                    f"{url_param.name}: {dummy_value_for_type(url_param.type)}"
-                )
+        # URL (and query/header/cookie) parameters first
+        url_param_strs = build_parameter_values(full_spec, url_parameters)
 
     dependent_params = []
 
     # request body parameters next
     req_param_strs: list[str] = []
-    if req_body_parameters is not None:
+    if (
+        req_body_parameters is not None
+        and media_handler is not None
+        and media_handler.form_fields
+        and all(param.name for param in req_body_parameters)
+    ):
+        # Form fields instead of a request object
+        if limits is not None:
+            limits.start_literal()
+        req_param_strs = [
+            serialize(node)
+            for node in build_property_nodes(
+                full_spec,
+                req_body_parameters,
+                limits=limits,
+                depth=1,
+                binary_files=binary_files,
+            )
+        ]
+    elif req_body_parameters is not None:
         for req_body_param in req_body_parameters:
             if req_body_param.ref != "" and req_body_param.ref is not None:
-                if ref_is_basic_type_alias(full_spec, req_body_param.ref):
+                ref_info = get_ref_info(full_spec, req_body_param.ref)
+                if ref_info.is_basic_type_alias:
                     # However, if the ref just points to an alias for a basic type, just resolve
                     # the alias and embed in the parm list
+                    # (the body is the value itself, whether or not the body is required)
                     resolved_req_body_param = get_request_body_parameters_from_ref(
-                        full_spec, req_body_param.ref, include_optional=include_all
+                        full_spec, req_body_param.ref, include_optional=True
                     )
                     # Resolved items do not need to have a class imported
-                    resolved.append(get_base_object_from_ref(req_body_param.ref))
+                    resolved.append(ref_info.base_name)
                     # Nasty hack to match the generator
                     resolved_req_body_param[0].name = "body"
                     req_param_strs.append(
-                        request_body_parameter_as_string(resolved_req_body_param[0])
+                        request_body_parameter_as_string(
+                            resolved_req_body_param[0], binary_files
+                        )
                     )
                 else:
                     # If this is a "real" ref we need to build a "dependent" param and put the
                     # instance name in the parameter list
                     dependent_params.append(req_body_param)
-                    req_object_name = get_base_object_from_ref(req_body_param.ref)
+                    req_object_name = ref_info.base_name
                     # need to lower case the first char
                     req_param_strs.append(
                         f"{req_object_name[0].lower()}{req_object_name[1:]}"
                     )
             else:
-                # custom for our spec
-                if req_body_param.ref in CUSTOM_UUID_REFS:
-                    req_param_strs.append(f"{req_body_param.name}: '{uuid.uuid4()}'")
-                else:
-                    # logic to return a typical "name: value" for the parameter
-                    req_param_strs.append(
-                        request_body_parameter_as_string(req_body_param)
-                    )
+                # logic to return a typical "name: value" for the parameter
+                req_param_strs.append(
+                    request_body_parameter_as_string(req_body_param, binary_files)
+                )
 
     dependent_params_str = build_dependent_param_string(
-        full_spec, dependent_params, include_all=include_all
+        full_spec, dependent_params, include_all=include_all, limits=limits
     )
 
     # assemble the final string
     return dependent_params_str, ", ".join(url_param_strs + req_param_strs), resolved
 
 
+def build_parameter_values(
+    full_spec: dict, parameters: list[URLEmbeddedParameter]
+) -> list[str]:
+    """Builds the "name: value" strings for all of an operation's parameters in one pass"""
+    return [
+        serialize(
+            Property(
+                param.name,
+                schema_value_node(
+                    full_spec,
+                    param.schema if param.schema is not None else {},
+                    param.type,
+                ),
+            )
+        )
+        for param in parameters
+    ]
+
+
+def schema_value_node(full_spec: dict, schema: dict, fallback_type: str | None) -> Node:
+    """
+    Builds a value for a schema of a basic type: a fresh UUID for uuid refs, else the first example or enum
+    value, else a dummy value for the type
+    """
+    ref = schema.get("$ref", None)
+    if ref is not None:
+        if get_ref_info(full_spec, ref).kind == "uuid":
+            return Literal(generate_uuid())
+        # e.g. a date or an enum declared under components/schemas
+        schema = get_ref_from_spec(full_spec, ref) or {}
+    if schema.get("examples", None):
+        return Literal(schema["examples"][0])
+    if schema.get("enum", None):
+        return Literal(schema["enum"][0])
+    code = dummy_value_for_type(
+        schema.get("type", fallback_type), unique=schema.get("uniqueItems", False)
+    )
+    return Raw(code) if code is not None else Literal(None)
+
+
 class InvalidInputDataError(Exception):
     pass
 
 
-def render_params_as_string(full_spec, parameters: list[RequestBodyParameter]) -> str:
+def render_params_as_string(
+    full_spec,
+    parameters: list[RequestBodyParameter],
+    limits: LimitTracker | None = None,
+    depth: int = 0,
+) -> str:
     """
     Takes a list of RequestBodyParameter objects and converts it to a string that can be
     substituted into the template for the specific test target.
+    """
+    if depth == 0 and limits is not None:
+        limits.start_literal()
+    return serialize(
+        build_property_nodes(full_spec, parameters, limits=limits, depth=depth), ", "
+    )
 
-    List is expected to contain items of primitive types, e.g. non-object
+
+def build_property_nodes(
+    full_spec,
+    parameters: list[RequestBodyParameter],
+    limits: LimitTracker | None = None,
+    depth: int = 0,
+    binary_files: bool = False,
+) -> list[Node]:
+    """
+    Builds the properties of an object literal; nested objects become inline object literals
+    :param binary_files: send strings with format: binary as file contents, see MediaTypeHandler
     """
     result = []
     for endpt_param in parameters:
         if endpt_param.type in ["object", None]:
-            param_string = build_dependent_param_string(full_spec, [endpt_param])
-            result.append(param_string)
+            if endpt_param.ref is None:
+                # Inline object schema, nothing to follow
+                value = ObjectLiteral()
+            else:
+                value = build_ref_value(
+                    full_spec, endpt_param.ref, limits=limits, depth=depth
+                )
+            result.append(
+                Property(endpt_param.name, value) if endpt_param.name else value
+            )
             continue
 
-        value = request_body_parameter_as_string(endpt_param)
-        result.append(value)
-    return ", ".join(result)
+        node = request_body_parameter_node(endpt_param, binary_files)
+        if node is not None:
+            result.append(node)
+    return result
 
 
 def convert_operation_id_to_classname(name_from_json: str):
@@ -452,16 +843,10 @@ def convert_operation_id_to_classname(name_from_json: str):
     Removes any _ or $ and capitalizes name appropriately; for use in reformatting operationId
     to use in JS import statements
     """
-    underscore_idx = name_from_json.index("_")
-    temp_str = list(name_from_json)
-    temp_str[underscore_idx + 1] = temp_str[underscore_idx + 1].upper()
-    return "".join(temp_str).replace("_", "").replace("$", "")
+    return operation_names(name_from_json).class_name
 
 
+@lru_cache(maxsize=None)
 def camel_case(name: str):
     """Takes a string_like_this and converts to StringLikeThis"""
-    result = ""
-    chunks = name.split("_")
-    for chunk in chunks:
-        result += chunk[0].upper() + chunk[1 : len(chunk)]
-    return result
+    return "".join(chunk[:1].upper() + chunk[1:] for chunk in name.split("_"))
@@ -0,0 +1,89 @@
+"""
+Code for generating Jest assertions on the shape of a response body from its schema.
+"""
+
+import json
+
+from target_conversion.ref_handling import (
+    get_document_cache,
+    get_ref_from_spec,
+    get_schema_fingerprint,
+)
+
+# JS typeof results for the basic schema types
+JS_TYPEOF = {
+    "string": "string",
+    "integer": "number",
+    "number": "number",
+    "boolean": "boolean",
+    "object": "object",
+}
+
+
+def resolve_schema(full_spec: dict, schema: dict | None) -> dict:
+    """Follows $refs until reaching an actual schema definition"""
+    seen = set()
+    while schema is not None and "$ref" in schema and schema["$ref"] not in seen:
+        seen.add(schema["$ref"])
+        schema = get_ref_from_spec(full_spec, schema["$ref"])
+    return schema if schema is not None else {}
+
+
+def type_assertion(full_spec: dict, schema: dict | None, accessor: str) -> str | None:
+    """Builds the assertion that the value at the accessor has the type declared by the schema"""
+    schema = resolve_schema(full_spec, schema)
+    if schema.get("nullable", False):
+        return None
+    schema_type = schema.get("type", None)
+    if isinstance(schema_type, list):
+        # OpenAPI 3.1 type lists: "null" among them is the same as nullable, and unions of several types are not
+        # asserted
+        if "null" in schema_type or len(schema_type) != 1:
+            return None
+        schema_type = schema_type[0]
+    if schema_type == "array":
+        return f"expect(Array.isArray({accessor})).toBe(true);"
+    if schema_type in JS_TYPEOF:
+        return f"expect(typeof {accessor}).toBe('{JS_TYPEOF[schema_type]}');"
+    return None
+
+
+def build_response_assertions(
+    full_spec: dict, schema: dict | None, accessor: str = "resp.data"
+) -> list[str]:
+    """
+    Builds assertions on the type of the response body and, for objects, on its required keys and their types.
+
+    Assertions are compiled once per schema (per $ref, or per inline schema) and the same list is returned to
+    every operation responding with that schema.
+    """
+    if schema is None:
+        return []
+    cache = get_document_cache(full_spec, "response_assertions")
+    cache_key = (
+        get_schema_fingerprint(full_spec, schema["$ref"])
+        if "$ref" in schema
+        else json.dumps(schema, sort_keys=True)
+    )
+    cache_key = f"{accessor}|{cache_key}"
+    if cache_key in cache:
+        return cache[cache_key]
+
+    assertions = []
+    top_level = type_assertion(full_spec, schema, accessor)
+    if top_level is not None:
+        assertions.append(top_level)
+
+    resolved = resolve_schema(full_spec, schema)
+    properties = resolved.get("properties", {})
+    for name in resolved.get("required", []):
+        key = json.dumps(name)
+        assertions.append(f"expect({accessor}).toHaveProperty([{key}]);")
+        prop_assertion = type_assertion(
+            full_spec, properties.get(name, None), f"{accessor}[{key}]"
+        )
+        if prop_assertion is not None:
+            assertions.append(prop_assertion)
+
+    cache[cache_key] = assertions
+    return assertions
@@ -0,0 +1,122 @@
+"""
+Code for turning test targets into the individual test cases substituted into the template.
+"""
+
+import json
+import re
+from collections import Counter
+
+from target_conversion.data_modeling import ApiClientTarget
+from target_conversion.naming import operation_names
+
+# Asks the server (e.g. the --serve_mock server, or Prism) for a specific documented response, and stops the
+# client from throwing on error status codes so the status can be asserted
+RESPONSE_VARIANT_OPTIONS = (
+    "{{ headers: {{ Prefer: 'code={code}' }}, validateStatus: () => true }}"
+)
+
+
+def build_test_cases(
+    test_target: ApiClientTarget,
+    all_responses: bool = False,
+    response_assertions: bool = True,
+) -> list[dict]:
+    """
+    Builds the template data for the tests of a single endpoint.
+
+    By default this is just the "happy path" test. With all_responses, one more test is added for every other
+    documented response (4xx, alternate 2xx) and for every request body example in the spec. All the cases share
+    the parameter literals already built for the test target.
+
+    With response_assertions, each case also checks the shape of the response body against the schema
+    documented for its status code.
+    """
+
+    def assertions_for(code: str) -> list[str]:
+        return (
+            test_target.response_assertions.get(code, []) if response_assertions else []
+        )
+
+    names = operation_names(test_target.operation_id)
+    happy_path = {
+        "endpoint_summary": test_target.summary,
+        "endpoint_operation": names.operation_method,
+        "endpoint_params": names.params_class,
+        "endpoint_param_values": test_target.parameter_api_client_call,
+        "endpoint_dependent_param_values": test_target.parameter_dependent_objects,
+        "expected_response": test_target.expected_response,
+        # e.g. multipart/form-data, for templates that set the request Content-Type themselves
+        "request_media_type": test_target.request_media_type,
+        "request_options": None,
+        "response_assertions": assertions_for(test_target.expected_response),
+    }
+    test_cases = [happy_path]
+    if not all_responses:
+        return test_cases
+
+    for code in test_target.responses:
+        if code == test_target.expected_response or not code.isdigit():
+            continue
+        test_cases.append(
+            happy_path
+            | {
+                "endpoint_summary": f"{test_target.summary} ({code} response)",
+                "expected_response": code,
+                "request_options": RESPONSE_VARIANT_OPTIONS.format(code=code),
+                "response_assertions": assertions_for(code),
+            }
+        )
+
+    # Request body examples replace the generated request object
+    if test_target.parameter_class != "" and test_target.parameter_dependent_objects:
+        request_class = test_target.request_schema_class
+        obj_name = f"{request_class[0].lower()}{request_class[1:]}"
+        for name, example in test_target.request_body_examples.items():
+            test_cases.append(
+                happy_path
+                | {
+                    "endpoint_summary": f"{test_target.summary} (example {name})",
+                    "endpoint_dependent_param_values": f"const {obj_name} : {request_class} = "
+                    f"{json.dumps(example)};",
+                }
+            )
+    return test_cases
+
+
+CONST_NAME = re.compile(r"const (\w+) :")
+
+
+def hoist_shared_fixtures(test_cases: list[dict]) -> (list[str], list[dict]):
+    """
+    Moves request object declarations used by more than one test case to module level.
+
+    Identical declarations are emitted once as shared fixtures and dropped from the test bodies, which keep
+    referring to them by name. A declaration is only hoisted if no other hoisted fixture already declares the
+    same name; test bodies may still declare their own object with a hoisted name, shadowing the fixture.
+    :return: the fixture declarations and the test cases without them
+    """
+    usage = Counter(
+        test_case["endpoint_dependent_param_values"]
+        for test_case in test_cases
+        if test_case["endpoint_dependent_param_values"]
+    )
+    fixtures = []
+    declared_names = set()
+    for declaration, count in usage.most_common():
+        if count < 2:
+            break
+        names = set(CONST_NAME.findall(declaration))
+        if names & declared_names:
+            continue
+        declared_names |= names
+        fixtures.append(declaration)
+
+    hoisted = set(fixtures)
+    return fixtures, [
+        (
+            test_case | {"endpoint_dependent_param_values": ""}
+            if test_case["endpoint_dependent_param_values"] in hoisted
+            else test_case
+        )
+        for test_case in test_cases
+    ]
@@ -0,0 +1,116 @@
+"""
+A small code model for the TypeScript emitted into the templates (imports are written by the templates themselves).
+
+Nodes are built once and serialized in a single pass: every node appends its pieces to a shared output buffer
+which is joined once at the end, so large nested request objects are not copied at every level. Values from
+the spec (examples, enums, names) are escaped by the nodes instead of being pasted into f-strings.
+"""
+
+import json
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+
+JS_IDENTIFIER = re.compile(r"[A-Za-z_$][A-Za-z0-9_$]*")
+
+
+def js_property_name(name: str) -> str:
+    """Quotes names that are not valid JS identifiers, e.g. header names like X-Request-Id"""
+    return name if JS_IDENTIFIER.fullmatch(name) else json.dumps(name)
+
+
+class Node(ABC):
+    """A piece of generated code"""
+
+    @abstractmethod
+    def write(self, out: list[str]):
+        """Appends the code of the node to the output buffer"""
+
+
+@dataclass
+class Raw(Node):
+    """Code emitted verbatim, e.g. `new Set<string>()` or a variable name"""
+
+    code: str
+
+    def write(self, out: list[str]):
+        out.append(self.code)
+
+
+@dataclass
+class Literal(Node):
+    """A JSON compatible value (string, number, boolean, null, array or object) from the spec"""
+
+    value: object
+
+    def write(self, out: list[str]):
+        out.append(json.dumps(self.value, ensure_ascii=False))
+
+
+@dataclass
+class Property(Node):
+    """A `name: value` entry of an object literal"""
+
+    name: str
+    value: Node
+
+    def write(self, out: list[str]):
+        out.append(js_property_name(self.name))
+        out.append(": ")
+        self.value.write(out)
+
+
+@dataclass
+class ObjectLiteral(Node):
+    """`{ a: 1, b }`; entries are properties or shorthand names"""
+
+    entries: list[Node] = field(default_factory=list)
+
+    def write(self, out: list[str]):
+        out.append("{ ")
+        write_joined(self.entries, ", ", out)
+        out.append(" }")
+
+
+@dataclass
+class Cast(Node):
+    """`value as TypeName`"""
+
+    value: Node
+    type_name: str
+
+    def write(self, out: list[str]):
+        self.value.write(out)
+        out.append(" as ")
+        out.append(self.type_name)
+
+
+@dataclass
+class Const(Node):
+    """`const name : TypeName = value;`"""
+
+    name: str
+    type_name: str
+    value: Node
+
+    def write(self, out: list[str]):
+        out.append(f"const {self.name} : {self.type_name} = ")
+        self.value.write(out)
+        out.append(";")
+
+
+def write_joined(nodes: list[Node], separator: str, out: list[str]):
+    for i, node in enumerate(nodes):
+        if i:
+            out.append(separator)
+        node.write(out)
+
+
+def serialize(nodes: Node | list[Node], separator: str = "") -> str:
+    """Serializes one node, or several separated by the separator, with a single join"""
+    out: list[str] = []
+    if isinstance(nodes, Node):
+        nodes.write(out)
+    else:
+        write_joined(nodes, separator, out)
+    return "".join(out)
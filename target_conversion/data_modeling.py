@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 @dataclass
@@ -13,6 +13,8 @@ class RequestBodyParameter(object):
     unique: bool | None
     aggregate_info: dict | None
     example: str | None
+    # e.g. "binary" for file contents, "uuid"
+    format: str | None = None
 
 
 @dataclass
@@ -38,3 +40,26 @@ class ApiClientTarget(object):
     parameter_dependent_objects: str
     expected_response: str
     resolved_params: list[str]
+    # Every documented status code mapped to the schema of its response body (None when there is no body)
+    responses: dict[str, dict | None] = field(default_factory=dict)
+    # Named examples of the request body from the spec
+    request_body_examples: dict[str, object] = field(default_factory=dict)
+    # Status code -> Jest assertions on the shape of that response's body
+    response_assertions: dict[str, list[str]] = field(default_factory=dict)
+    # Media type the request body is generated for, e.g. multipart/form-data; "" without a request body
+    request_media_type: str = ""
+    # Class imported for the request object, from the ref table; "" when the request body is not an imported object
+    request_import_class: str = ""
+
+
+@dataclass
+class ExtractionResult(object):
+    """
+    Everything extracted from a spec that the template rendering step needs; can be saved to and loaded from
+    an intermediate representation file so rendering does not need the spec
+    """
+
+    api_title: str
+    api_version: str
+    import_data: list[dict]
+    test_targets: list[ApiClientTarget]
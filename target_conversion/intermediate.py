@@ -0,0 +1,58 @@
+"""
+Code for saving extracted test targets to a JSON Lines intermediate representation (IR) and loading them back.
+
+The first line is a header with the API-wide data, every following line is one ApiClientTarget.
+"""
+
+import json
+from dataclasses import asdict
+
+from target_conversion.data_modeling import ApiClientTarget, ExtractionResult
+
+IR_VERSION = 1
+
+
+class IntermediateFormatError(Exception):
+    pass
+
+
+def dump_ir(file_path: str, extraction: ExtractionResult):
+    """Writes the extraction result to an IR file"""
+    header = {
+        "kind": "header",
+        "ir_version": IR_VERSION,
+        "api_title": extraction.api_title,
+        "api_version": extraction.api_version,
+        "import_data": extraction.import_data,
+    }
+    with open(file_path, "wt") as f:
+        f.write(json.dumps(header, separators=(",", ":")))
+        f.write("\n")
+        for test_target in extraction.test_targets:
+            f.write(json.dumps(asdict(test_target), separators=(",", ":")))
+            f.write("\n")
+
+
+def load_ir(file_path: str) -> ExtractionResult:
+    """Reads an IR file written by dump_ir"""
+    with open(file_path, "r") as f:
+        try:
+            header = json.loads(f.readline())
+        except json.JSONDecodeError as e:
+            raise IntermediateFormatError(f"{file_path} has no valid IR header") from e
+        if header.get("kind", None) != "header":
+            raise IntermediateFormatError(f"{file_path} has no valid IR header")
+        if header.get("ir_version", None) != IR_VERSION:
+            raise IntermediateFormatError(
+                f"{file_path} has IR version {header.get('ir_version')}, expected {IR_VERSION}"
+            )
+        test_targets = [
+            ApiClientTarget(**json.loads(line)) for line in f if line.strip()
+        ]
+
+    return ExtractionResult(
+        api_title=header["api_title"],
+        api_version=header["api_version"],
+        import_data=header["import_data"],
+        test_targets=test_targets,
+    )
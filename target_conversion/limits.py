@@ -0,0 +1,81 @@
+"""
+Code for bounding the work done while extracting test targets from pathological (deep, cyclic or huge) specs.
+"""
+
+import time
+from dataclasses import dataclass, field
+
+from target_conversion.codegen import Node, Cast, Const, Raw
+
+DEFAULT_MAX_REF_DEPTH = 16
+
+
+@dataclass
+class GenerationLimits(object):
+    """Configurable bounds on the extraction work"""
+
+    # How many nested $refs are expanded into an object literal before a placeholder is used
+    max_ref_depth: int = DEFAULT_MAX_REF_DEPTH
+    # Largest generated request object literal (in characters) per operation
+    max_literal_size: int = 64 * 1024
+    # Seconds the whole spec may take; operations extracted afterwards get placeholder values
+    time_budget: float | None = None
+
+
+@dataclass
+class LimitHit(object):
+    """Records an operation whose generated values were degraded because a limit was reached"""
+
+    operation_id: str | None
+    limit: str
+    detail: str
+
+
+@dataclass
+class LimitTracker(object):
+    """Limits plus the state needed to enforce them over the extraction of a whole spec"""
+
+    limits: GenerationLimits = field(default_factory=GenerationLimits)
+    started: float = field(default_factory=time.monotonic)
+    operation_id: str | None = None
+    hits: list[LimitHit] = field(default_factory=list)
+    # Times any limit was reached, including repeats of the same hit
+    times_reached: int = 0
+    # Running estimate of the characters in the request object literal being built, see grow_literal
+    literal_size: int = 0
+
+    def record(self, limit: str, detail: str):
+        self.times_reached += 1
+        hit = LimitHit(self.operation_id, limit, detail)
+        if hit not in self.hits:
+            self.hits.append(hit)
+
+    def time_exhausted(self) -> bool:
+        if self.limits.time_budget is None:
+            return False
+        return time.monotonic() - self.started > self.limits.time_budget
+
+    def start_literal(self):
+        self.literal_size = 0
+
+    def grow_literal(self, size: int) -> bool:
+        """
+        Adds to the size of the literal being built; False once it is over max_literal_size, so branching
+        (e.g. recursive) schemas stop being expanded instead of growing exponentially up to the ref depth limit
+        """
+        self.literal_size += size
+        return self.literal_size <= self.limits.max_literal_size
+
+    def hit_operations(self) -> list[str | None]:
+        """The operations that reached any limit, in the order they were extracted"""
+        return list(dict.fromkeys(hit.operation_id for hit in self.hits))
+
+
+def placeholder_value(base_str: str) -> Node:
+    """Empty object used in place of one that could not be generated within the limits"""
+    return Cast(Raw("{}"), base_str)
+
+
+def placeholder_object(obj_name: str, base_str: str) -> Node:
+    """Request object declaration used in place of one that could not be generated within the limits"""
+    return Const(obj_name, base_str, placeholder_value(base_str))
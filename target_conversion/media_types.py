@@ -0,0 +1,103 @@
+"""
+Code for choosing how the request and response bodies of each media type are handled.
+
+Handlers are registered per media type. A media type from the spec is matched exactly first, then by its
+structured syntax suffix (e.g. application/merge-patch+json is JSON), then by its type wildcard (e.g. text/*).
+The match for each media type string is computed once and cached, so picking the body of an operation is a
+dictionary lookup per media type it offers.
+
+The handler decides how the request body is generated: JSON bodies are declared as a request object passed to the
+client, form fields are passed to the client one by one, and multipart and binary bodies send files as Blobs.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+@dataclass(frozen=True)
+class MediaTypeHandler(object):
+    """How bodies of a family of media types are generated"""
+
+    # e.g. "json", "form", "multipart", "text"
+    name: str
+    # Preference when a body is documented in several media types; lower is preferred
+    priority: int
+    # Whether each property of the body schema is passed to the client as a parameter of its own (forms), rather
+    # than the whole body as one request object or value
+    form_fields: bool = False
+    # Whether strings with format: binary are sent as file contents (a Blob) rather than as text
+    binary_files: bool = False
+
+
+JSON = MediaTypeHandler("json", priority=0)
+FORM = MediaTypeHandler("form", priority=1, form_fields=True)
+MULTIPART = MediaTypeHandler(
+    "multipart", priority=2, form_fields=True, binary_files=True
+)
+TEXT = MediaTypeHandler("text", priority=3)
+BINARY = MediaTypeHandler("binary", priority=4, binary_files=True)
+
+# Exact media types, and wildcards like text/* or */* (also used for media type ranges in the spec itself)
+MEDIA_TYPE_HANDLERS: dict[str, MediaTypeHandler] = {
+    "application/json": JSON,
+    "application/x-www-form-urlencoded": FORM,
+    "multipart/form-data": MULTIPART,
+    "text/plain": TEXT,
+    "application/octet-stream": BINARY,
+    "text/*": TEXT,
+    "*/*": JSON,
+}
+# Structured syntax suffixes (RFC 6839), e.g. application/vnd.api+json
+SUFFIX_HANDLERS: dict[str, MediaTypeHandler] = {
+    "json": JSON,
+}
+
+
+def register_media_type(media_type: str, handler: MediaTypeHandler):
+    """Adds or replaces the handler of a media type (or wildcard, e.g. image/*)"""
+    MEDIA_TYPE_HANDLERS[media_type.lower()] = handler
+    get_media_type_handler.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def get_media_type_handler(media_type: str) -> MediaTypeHandler | None:
+    """The handler for a media type from the spec, or None when it is not supported"""
+    essence = media_type.partition(";")[0].strip().lower()
+    handler = MEDIA_TYPE_HANDLERS.get(essence, None)
+    if handler is not None:
+        return handler
+    main_type, _, subtype = essence.partition("/")
+    if "+" in subtype:
+        handler = SUFFIX_HANDLERS.get(subtype.rpartition("+")[2], None)
+        if handler is not None:
+            return handler
+    return MEDIA_TYPE_HANDLERS.get(f"{main_type}/*", None)
+
+
+@dataclass
+class SelectedMedia(object):
+    """The media type chosen for a request or response body, with its media type object from the spec"""
+
+    media_type: str
+    handler: MediaTypeHandler
+    # schema, example and examples of the media type
+    data: dict
+
+    @property
+    def schema(self) -> dict | None:
+        return self.data.get("schema", None)
+
+
+def select_media(content: dict | None) -> SelectedMedia | None:
+    """
+    Picks the supported media type of a body's content to generate from, preferring JSON over forms over
+    single values; None when no media type is supported
+    """
+    selected = None
+    for media_type, data in (content or {}).items():
+        handler = get_media_type_handler(media_type)
+        if handler is None or not isinstance(data, dict):
+            continue
+        if selected is None or handler.priority < selected.handler.priority:
+            selected = SelectedMedia(media_type, handler, data)
+    return selected
@@ -0,0 +1,58 @@
+"""
+Code for deriving the JS class, function and package names generated for each operationId.
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+# Characters separating the words of an operationId, e.g. "Resource$V2_createThing", "create-thing", "thing.create"
+OPERATION_ID_SEPARATORS = re.compile(r"[_\-.\s]+")
+# Anything else that cannot appear in a JS identifier is dropped
+NON_IDENTIFIER_CHARS = re.compile(r"[^A-Za-z0-9]")
+
+
+class InvalidOperationIdError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class OperationNames(object):
+    """All the names derived from a single operationId"""
+
+    # e.g. NotificationResourceV2CreateBehaviorGroup
+    class_name: str
+    # e.g. notificationResourceV2CreateBehaviorGroup, the API client function
+    operation_method: str
+    # e.g. NotificationResourceV2CreateBehaviorGroupParams
+    params_class: str
+    # e.g. NotificationResourceV2CreateBehaviorGroup, the package the Params class is imported from
+    import_package: str
+
+
+@lru_cache(maxsize=None)
+def operation_names(operation_id: str) -> OperationNames:
+    """
+    Derives every name needed for an operation from its operationId; computed once per operationId.
+
+    Words are split on _, -, . and whitespace, each word is capitalized and any other character that is not
+    valid in a JS identifier (e.g. $) is removed.
+    """
+    words = [
+        NON_IDENTIFIER_CHARS.sub("", word)
+        for word in OPERATION_ID_SEPARATORS.split(operation_id)
+    ]
+    class_name = "".join(word[0].upper() + word[1:] for word in words if word)
+    if class_name == "":
+        raise InvalidOperationIdError(
+            f"operationId {operation_id!r} does not contain any usable characters"
+        )
+    if class_name[0].isdigit():
+        class_name = f"Operation{class_name}"
+
+    return OperationNames(
+        class_name=class_name,
+        operation_method=f"{class_name[0].lower()}{class_name[1:]}",
+        params_class=f"{class_name}Params",
+        import_package=class_name,
+    )
@@ -0,0 +1,179 @@
+"""
+Code for slimming an openapi spec down to the parts the test target extraction actually reads.
+"""
+
+import json
+from dataclasses import dataclass, field
+
+from target_conversion.ref_handling import get_ref_from_spec, split_ref
+
+HTTP_VERBS = ["get", "put", "post", "delete", "options", "head", "patch", "trace"]
+
+# Fields of an operation that are read while building a test target
+OPERATION_FIELDS = ["summary", "operationId", "parameters", "requestBody", "responses"]
+
+# Fields of a parameter object that are read while building a test target
+PARAMETER_FIELDS = ["name", "in", "required", "schema", "type", "$ref"]
+
+# Fields of a schema object that never affect the generated output
+DROPPED_SCHEMA_FIELDS = ["description", "title", "externalDocs", "xml", "deprecated"]
+
+
+@dataclass
+class PruneReport(object):
+    """Summary of what was removed from a spec by prune_spec"""
+
+    operations: int = 0
+    components_kept: int = 0
+    components_dropped: list[str] = field(default_factory=list)
+    bytes_before: int = 0
+    bytes_after: int = 0
+
+
+def prune_spec(full_spec: dict) -> (dict, PruneReport):
+    """
+    Builds a copy of the spec containing only the operations in `paths`, the fields of those operations read
+    by build_test_target and the components reachable through their $ref closure.
+    :param full_spec: dict with all the openapi spec info
+    :return: the pruned spec and a report of how much was dropped
+    """
+    report = PruneReport()
+    pruned_paths = {}
+    pending_refs = []
+
+    for path, path_item in full_spec.get("paths", {}).items():
+        pruned_item = {}
+        if "parameters" in path_item:
+            pruned_item["parameters"] = prune_parameters(path_item["parameters"])
+        for verb, operation in path_item.items():
+            if verb not in HTTP_VERBS:
+                continue
+            report.operations += 1
+            pruned_item[verb] = prune_operation(operation)
+        collect_refs(pruned_item, pending_refs)
+        pruned_paths[path] = pruned_item
+
+    # Walk the $ref closure of all the operations, copying each reachable component once
+    pruned_components: dict[str, dict] = {}
+    seen = set()
+    while pending_refs:
+        ref = pending_refs.pop()
+        document_url, pointer = split_ref(ref)
+        if ref in seen or document_url != "":
+            # External documents are owned by the DocumentStore and are not part of this spec
+            continue
+        seen.add(ref)
+        tiers = pointer.strip("/").split("/")
+        if len(tiers) != 3 or tiers[0] != "components":
+            continue
+        component = get_ref_from_spec(full_spec, ref)
+        if component is None:
+            continue
+        component = prune_schema(component) if tiers[1] == "schemas" else component
+        pruned_components.setdefault(tiers[1], {})[tiers[2]] = component
+        collect_refs(component, pending_refs)
+
+    pruned_spec = {"paths": pruned_paths, "components": pruned_components}
+    if "openapi" in full_spec:
+        pruned_spec["openapi"] = full_spec["openapi"]
+    if "info" in full_spec:
+        pruned_spec["info"] = {
+            key: full_spec["info"][key]
+            for key in ["title", "version"]
+            if key in full_spec["info"]
+        }
+
+    for kind, components in full_spec.get("components", {}).items():
+        for name in components:
+            if name in pruned_components.get(kind, {}):
+                report.components_kept += 1
+            else:
+                report.components_dropped.append(f"#/components/{kind}/{name}")
+
+    report.bytes_before = len(json.dumps(full_spec))
+    report.bytes_after = len(json.dumps(pruned_spec))
+    return pruned_spec, report
+
+
+def prune_operation(operation: dict) -> dict:
+    """Keeps only the operation fields (and nested body/response fields) read during extraction"""
+    result = {key: operation[key] for key in OPERATION_FIELDS if key in operation}
+    if "parameters" in result:
+        result["parameters"] = prune_parameters(result["parameters"])
+    if "requestBody" in result:
+        request_body = result["requestBody"]
+        result["requestBody"] = {
+            key: request_body[key]
+            for key in ["required", "$ref"]
+            if key in request_body
+        }
+        if "content" in request_body:
+            result["requestBody"]["content"] = prune_content(request_body["content"])
+    if "responses" in result:
+        result["responses"] = {
+            code: (
+                {"content": prune_content(response["content"])}
+                if "content" in response
+                else {key: response[key] for key in ["$ref"] if key in response}
+            )
+            for code, response in result["responses"].items()
+        }
+    return result
+
+
+def prune_parameters(parameters: list[dict]) -> list[dict]:
+    """Keeps only the parameter fields read during extraction"""
+    return [
+        {
+            key: (prune_schema(param[key]) if key == "schema" else param[key])
+            for key in PARAMETER_FIELDS
+            if key in param
+        }
+        for param in parameters
+    ]
+
+
+def prune_content(content: dict) -> dict:
+    """Keeps only the schema and examples of each media type"""
+    return {
+        media_type: {
+            key: (prune_schema(media_data[key]) if key == "schema" else media_data[key])
+            for key in ["schema", "example", "examples"]
+            if key in media_data
+        }
+        for media_type, media_data in content.items()
+        if "schema" in media_data
+    }
+
+
+def prune_schema(schema):
+    """Copies a schema object without the documentation-only fields, recursing into sub-schemas"""
+    if not isinstance(schema, dict):
+        return schema
+    result = {}
+    for key, value in schema.items():
+        if key in DROPPED_SCHEMA_FIELDS:
+            continue
+        if key in ["properties", "patternProperties"] and isinstance(value, dict):
+            # Property names are arbitrary (e.g. a property called "description"), only prune their schemas
+            value = {name: prune_schema(prop) for name, prop in value.items()}
+        elif key in ["items", "additionalProperties", "not"]:
+            value = prune_schema(value)
+        elif key in ["allOf", "anyOf", "oneOf"] and isinstance(value, list):
+            value = [prune_schema(sub_schema) for sub_schema in value]
+        result[key] = value
+    return result
+
+
+def collect_refs(node, refs: list[str]):
+    """Appends every $ref value found anywhere in the node to the refs list"""
+    pending = [node]
+    while pending:
+        cur = pending.pop()
+        if isinstance(cur, dict):
+            ref = cur.get("$ref", None)
+            if isinstance(ref, str):
+                refs.append(ref)
+            pending.extend(cur.values())
+        elif isinstance(cur, list):
+            pending.extend(cur)
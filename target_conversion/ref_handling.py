@@ -1,16 +1,178 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+
 from target_conversion import RequestBodyParameter
 
 
+class UnresolvedRefError(Exception):
+    pass
+
+
+# External documents (e.g. "common.json") keyed by absolute URL; populated by the DocumentStore
+_external_documents: dict[str, dict] = {}
+
+# Per-document caches (e.g. the JSON pointer -> resolved object index). The document itself is kept alongside
+# its caches so that its id() cannot be reused by another dict while the entry is alive.
+_document_caches: OrderedDict[int, tuple[dict, dict[str, dict]]] = OrderedDict()
+# id() -> number of open document_caches_scope blocks using the document; these entries are never evicted
+_document_pins: dict[int, int] = {}
+# Held while the caches or their LRU order are read or updated, as specs may be generated in concurrent threads
+_document_caches_lock = threading.Lock()
+# Caches kept for documents used outside any document_caches_scope
+MAX_INDEXED_DOCUMENTS = 32
+
+
+def register_document(url: str, document: dict):
+    """Makes an external document available to $ref resolution under its absolute URL"""
+    _external_documents[url] = document
+
+
+def _document_entry(document: dict) -> tuple[dict, dict[str, dict]]:
+    """Gets (or creates) a document's caches and marks them most recently used; call with the lock held"""
+    entry = _document_caches.get(id(document))
+    if entry is None or entry[0] is not document:
+        entry = (document, {})
+        _document_caches[id(document)] = entry
+        excess = len(_document_caches) - MAX_INDEXED_DOCUMENTS
+        if excess > 0:
+            unpinned = [key for key in _document_caches if key not in _document_pins]
+            for key in unpinned[:excess]:
+                del _document_caches[key]
+    else:
+        _document_caches.move_to_end(id(document))
+    return entry
+
+
+@contextmanager
+def document_caches_scope(*documents: dict):
+    """
+    Keeps the caches of the documents for as long as the block runs, however many other documents are used
+    meanwhile, and drops them (and the reference to the documents) once no block is using them anymore
+    """
+    with _document_caches_lock:
+        for document in documents:
+            _document_pins[id(document)] = _document_pins.get(id(document), 0) + 1
+            _document_entry(document)
+    try:
+        yield
+    finally:
+        with _document_caches_lock:
+            for document in documents:
+                _document_pins[id(document)] -= 1
+                if _document_pins[id(document)] == 0:
+                    del _document_pins[id(document)]
+                    _document_caches.pop(id(document), None)
+
+
+def get_document_cache(document: dict, name: str) -> dict:
+    """Gets the named cache for data derived from a document, creating it on first use"""
+    with _document_caches_lock:
+        return _document_entry(document)[1].setdefault(name, {})
+
+
+def share_document_cache(documents: list[dict], name: str) -> dict:
+    """Makes the documents use a single named cache, for derived data keyed the same way whichever document it came from"""
+    shared = {}
+    with _document_caches_lock:
+        for document in documents:
+            _document_entry(document)[1][name] = shared
+    return shared
+
+
+def get_ref_index(document: dict) -> dict[str, dict | None]:
+    """Gets the pointer -> object lookup table for a document, creating it on first use"""
+    return get_document_cache(document, "refs")
+
+
+def get_ref_stats(document: dict) -> dict[str, int]:
+    """
+    Counts the $ref lookups made against a spec: "hits" were answered by the index, "misses" had to walk a
+    document
+    """
+    return get_document_cache(document, "ref_stats")
+
+
+def split_ref(ref: str) -> (str, str):
+    """Splits a $ref into its document part ("" for local refs) and its JSON pointer"""
+    document_url, _, pointer = ref.partition("#")
+    return document_url, pointer
+
+
 def get_ref_from_spec(full_spec: dict, ref: str) -> dict:
     """Given the spec info as a dict, get the definition object of the provided $ref"""
-    split_ref = ref.split("/")
-    split_ref.remove("#")
-    cur = full_spec
-    for tier in split_ref:
-        cur = cur.get(tier)
+    document_url, pointer = split_ref(ref)
+    if document_url == "":
+        document = full_spec
+    else:
+        document = _external_documents.get(document_url, None)
+        if document is None:
+            raise UnresolvedRefError(
+                f"{ref} points to a document that has not been loaded"
+            )
+
+    index = get_ref_index(document)
+    stats = get_ref_stats(full_spec)
+    try:
+        result = index[pointer]
+        stats["hits"] = stats.get("hits", 0) + 1
+        return result
+    except KeyError:
+        stats["misses"] = stats.get("misses", 0) + 1
+
+    cur = document
+    for tier in pointer.split("/"):
+        if tier == "":
+            continue
+        tier = tier.replace("~1", "/").replace("~0", "~")
+        if isinstance(cur, list):
+            cur = cur[int(tier)] if tier.isdigit() and int(tier) < len(cur) else None
+        elif cur is not None:
+            cur = cur.get(tier)
+    index[pointer] = cur
     return cur
 
 
+def iter_refs(value):
+    """Yields every $ref nested in a schema"""
+    if isinstance(value, dict):
+        for key, child in value.items():
+            if key == "$ref" and isinstance(child, str):
+                yield child
+            else:
+                yield from iter_refs(child)
+    elif isinstance(value, list):
+        for child in value:
+            yield from iter_refs(child)
+
+
+def get_schema_fingerprint(full_spec: dict, ref: str) -> str:
+    """
+    Content hash of the schema a $ref points to, together with every schema it references directly or not.
+
+    Refs with the same fingerprint generate the same code, even in different specs (e.g. versions of an API).
+    """
+    fingerprints = get_document_cache(full_spec, "schema_fingerprints")
+    if ref in fingerprints:
+        return fingerprints[ref]
+
+    closure = {}
+    pending = [ref]
+    while pending:
+        cur = pending.pop()
+        if cur not in closure:
+            closure[cur] = get_ref_from_spec(full_spec, cur)
+            pending.extend(iter_refs(closure[cur]))
+    content = json.dumps([ref, closure], sort_keys=True, separators=(",", ":"))
+    fingerprint = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    fingerprints[ref] = fingerprint
+    return fingerprint
+
+
 def get_request_body_parameters_from_ref(
     full_spec: dict, ref: str, include_optional=False
 ) -> list[RequestBodyParameter]:
@@ -27,27 +189,45 @@ def get_request_body_parameters_from_ref(
     :param include_optional: Flag to include all subfields and not just the required ones
     """
 
-    cur = get_ref_from_spec(full_spec, ref)
+    cur = get_ref_from_spec(full_spec, ref) or {}
+    # Schemas without a basic type are treated as objects, and objects may not declare any properties
+    properties = cur.get("properties", {})
 
     has_required = cur.get("required", False)
 
     if include_optional:
         # endpoint spec specified that the entire request body is required,
         # or we want to include all parameters for completeness
-        if cur["type"] == "object":
-            optional_or_required_params = list(cur["properties"].keys())
+        if cur.get("type", None) not in BASIC_TYPES:
+            optional_or_required_params = list(properties.keys())
         else:
             # non-object data like a string
             if cur.get("examples", None):
-                name = get_base_object_from_ref(ref)
+                name = get_ref_info(full_spec, ref).base_name
                 name = f"{name[0].lower()}{name[1:]}"
                 return [
                     RequestBodyParameter(
-                        name, cur["type"], None, None, None, cur.get("examples")[0]
+                        name,
+                        cur["type"],
+                        None,
+                        None,
+                        None,
+                        cur.get("examples")[0],
+                        format=cur.get("format", None),
                     )
                 ]
             else:
-                return [RequestBodyParameter(None, cur["type"], None, None, None, None)]
+                return [
+                    RequestBodyParameter(
+                        None,
+                        cur["type"],
+                        None,
+                        None,
+                        None,
+                        None,
+                        format=cur.get("format", None),
+                    )
+                ]
 
     elif has_required:
         # only required parameters
@@ -56,16 +236,17 @@ def get_request_body_parameters_from_ref(
         # all parameters are optional; none required!
         return []
 
+    # Required names that are not declared as properties are left untyped
     return [
-        copy_parameter_data(some_param, cur["properties"][some_param])
+        copy_parameter_data(some_param, properties.get(some_param, {}))
         for some_param in optional_or_required_params
     ]
 
 
+@lru_cache(maxsize=None)
 def get_base_object_from_ref(ref: str) -> str:
     """Given a $ref returns the name of the object at the end of the ref as a string"""
-    split_ref = ref.split("/")
-    return split_ref[-1]
+    return ref.rpartition("/")[2]
 
 
 def copy_parameter_data(name: str, parameter_data: dict) -> RequestBodyParameter:
@@ -78,15 +259,64 @@ def copy_parameter_data(name: str, parameter_data: dict) -> RequestBodyParameter
         else None
     )
     return RequestBodyParameter(
-        name, parameter_data.get("type", None), ref, unique, aggregate_info, None
+        name,
+        parameter_data.get("type", None),
+        ref,
+        unique,
+        aggregate_info,
+        None,
+        format=parameter_data.get("format", None),
     )
 
 
 BASIC_TYPES = ["string", "integer", "number", "boolean", "array"]
 
+SCHEMAS_PREFIX = "#/components/schemas/"
+
+
+@dataclass(frozen=True)
+class RefInfo(object):
+    """How the generated code treats a $ref"""
+
+    # "object", "uuid" (a string with format: uuid) or "alias" (any other basic type, including enums and arrays)
+    kind: str
+    # e.g. CreateBehaviorGroupRequest
+    base_name: str
+    # Class the generated code imports for the ref; None for refs resolved into plain values
+    import_name: str | None
+
+    @property
+    def is_basic_type_alias(self) -> bool:
+        return self.kind != "object"
+
+
+def classify_schema(ref: str, schema: dict | None) -> RefInfo:
+    """Classifies the schema a $ref points to"""
+    base_name = get_base_object_from_ref(ref)
+    schema_type = schema.get("type", None) if schema is not None else None
+    if schema_type not in BASIC_TYPES:
+        return RefInfo("object", base_name, base_name)
+    if schema_type == "string" and schema.get("format", None) == "uuid":
+        return RefInfo("uuid", base_name, None)
+    return RefInfo("alias", base_name, None)
+
+
+def get_ref_table(full_spec: dict) -> dict[str, RefInfo]:
+    """
+    Gets the ref -> RefInfo table of a spec. Refs are classified when first looked up, so schemas no operation
+    uses are never read (e.g. decoded from a spec in shared memory).
+    """
+    return get_document_cache(full_spec, "ref_table")
+
+
+def get_ref_info(full_spec: dict, ref: str) -> RefInfo:
+    """Looks up how the generated code treats a $ref"""
+    table = get_ref_table(full_spec)
+    info = table.get(ref, None)
+    if info is None:
+        info = table[ref] = classify_schema(ref, get_ref_from_spec(full_spec, ref))
+    return info
+
 
 def ref_is_basic_type_alias(full_spec: dict, ref: str) -> bool:
-    ref_obj = get_ref_from_spec(full_spec, ref)
-    if ref_obj.get("type", None) in BASIC_TYPES:
-        return True
-    return False
+    return get_ref_info(full_spec, ref).is_basic_type_alias
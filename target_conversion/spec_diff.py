@@ -0,0 +1,116 @@
+"""
+Code for working out which generated tests are affected by the changes between two versions of a spec.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+
+from target_conversion import build_test_target
+from target_conversion.data_modeling import ApiClientTarget
+from target_conversion.pruning import HTTP_VERBS, collect_refs
+from target_conversion.ref_handling import split_ref
+
+
+@dataclass
+class SpecDiff(object):
+    """Operations and components that differ between two specs, and the test targets they affect"""
+
+    added_operations: list[tuple[str, str]] = field(default_factory=list)
+    removed_operations: list[tuple[str, str]] = field(default_factory=list)
+    changed_operations: list[tuple[str, str]] = field(default_factory=list)
+    changed_components: list[str] = field(default_factory=list)
+    # Targets built from the new spec for added and changed operations
+    affected_targets: list[ApiClientTarget] = field(default_factory=list)
+    # Targets built from the old spec for removed operations
+    removed_targets: list[ApiClientTarget] = field(default_factory=list)
+
+
+def hash_subtree(node) -> str:
+    """Hashes a normalized (key-sorted, whitespace-free) serialization of a piece of the spec"""
+    normalized = json.dumps(node, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def get_operations(full_spec: dict) -> dict[tuple[str, str], dict]:
+    """Maps each (path, verb) to its operation, with any path-level parameters folded in"""
+    operations = {}
+    for path, path_item in full_spec.get("paths", {}).items():
+        for verb, operation in path_item.items():
+            if verb not in HTTP_VERBS:
+                continue
+            if "parameters" in path_item:
+                operation = dict(operation, path_parameters=path_item["parameters"])
+            operations[(path, verb)] = operation
+    return operations
+
+
+def get_component_hashes(full_spec: dict) -> dict[str, str]:
+    """Maps each component ref, e.g. #/components/schemas/UUID, to the hash of its own subtree"""
+    return {
+        f"#/components/{kind}/{name}": hash_subtree(component)
+        for kind, components in full_spec.get("components", {}).items()
+        for name, component in components.items()
+    }
+
+
+def get_local_refs(node) -> set[str]:
+    """Gets the refs into the same document found anywhere in the node"""
+    refs = []
+    collect_refs(node, refs)
+    return {ref for ref in refs if split_ref(ref)[0] == ""}
+
+
+def diff_specs(old_spec: dict, new_spec: dict) -> SpecDiff:
+    """
+    Compares two specs at the operation and component level.
+
+    Operations and components are compared by hash; a changed component marks every component that references
+    it (directly or transitively) as changed too, and every operation referencing any of those is affected.
+    """
+    result = SpecDiff()
+
+    old_hashes = get_component_hashes(old_spec)
+    new_hashes = get_component_hashes(new_spec)
+    changed = {
+        ref
+        for ref in old_hashes.keys() | new_hashes.keys()
+        if old_hashes.get(ref, None) != new_hashes.get(ref, None)
+    }
+
+    # Propagate changes to everything that depends on a changed component
+    dependents: dict[str, set[str]] = {}
+    for kind, components in new_spec.get("components", {}).items():
+        for name, component in components.items():
+            for ref in get_local_refs(component):
+                dependents.setdefault(ref, set()).add(f"#/components/{kind}/{name}")
+    pending = list(changed)
+    while pending:
+        for dependent in dependents.get(pending.pop(), ()):
+            if dependent not in changed:
+                changed.add(dependent)
+                pending.append(dependent)
+    result.changed_components = sorted(changed)
+
+    old_operations = get_operations(old_spec)
+    new_operations = get_operations(new_spec)
+    for key, operation in new_operations.items():
+        if key not in old_operations:
+            result.added_operations.append(key)
+        elif hash_subtree(operation) != hash_subtree(
+            old_operations[key]
+        ) or not changed.isdisjoint(get_local_refs(operation)):
+            result.changed_operations.append(key)
+    result.removed_operations = [
+        key for key in old_operations if key not in new_operations
+    ]
+
+    result.affected_targets = [
+        build_test_target(new_spec, path, verb)
+        for path, verb in result.added_operations + result.changed_operations
+    ]
+    result.removed_targets = [
+        build_test_target(old_spec, path, verb)
+        for path, verb in result.removed_operations
+    ]
+    return result
@@ -0,0 +1,214 @@
+"""
+Code for checking up front that a spec has everything the extraction relies on.
+
+Extraction fails with a bare KeyError on the first missing field, often after most of the work is done. The
+validation pass is a single walk over the operations and the schemas they reference, collecting every
+problem (with its JSON pointer) so a bad spec is rejected before any expensive work.
+"""
+
+import logging
+from dataclasses import dataclass
+
+from target_conversion.media_types import select_media
+from target_conversion.naming import operation_names, InvalidOperationIdError
+from target_conversion.pruning import HTTP_VERBS
+from target_conversion.ref_handling import get_ref_from_spec, UnresolvedRefError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ValidationProblem(object):
+    """Something the extraction needs that is missing or malformed at the given location"""
+
+    # JSON pointer to the offending node, e.g. /paths/~1bundles/get/summary
+    pointer: str
+    message: str
+
+    def __str__(self):
+        return f"{self.pointer or '/'}: {self.message}"
+
+
+class SpecValidationError(Exception):
+    def __init__(self, problems: list[ValidationProblem]):
+        super().__init__(
+            f"Spec has {len(problems)} problem(s): "
+            + "; ".join(str(problem) for problem in problems)
+        )
+        self.problems = problems
+
+
+def json_pointer(*segments) -> str:
+    """Builds a JSON pointer from raw segments, escaping ~ and / in each"""
+    return "".join(
+        "/" + str(segment).replace("~", "~0").replace("/", "~1") for segment in segments
+    )
+
+
+def validate_spec(full_spec: dict) -> list[ValidationProblem]:
+    """
+    Collects every problem that would make extraction fail or produce broken tests.
+    :return: the problems found, empty for a usable spec
+    """
+    problems: list[ValidationProblem] = []
+
+    def problem(message: str, *segments):
+        problems.append(ValidationProblem(json_pointer(*segments), message))
+
+    if not isinstance(full_spec, dict):
+        problem("spec must be an object")
+        return problems
+
+    info = full_spec.get("info", None)
+    if not isinstance(info, dict):
+        problem("missing info object", "info")
+    else:
+        for key in ["title", "version"]:
+            if not isinstance(info.get(key, None), str):
+                problem(f"missing {key} string", "info", key)
+
+    paths = full_spec.get("paths", None)
+    if not isinstance(paths, dict):
+        problem("missing paths object", "paths")
+        return problems
+
+    operation_ids: dict[str, str] = {}
+    for path, path_item in paths.items():
+        if not isinstance(path_item, dict):
+            problem("path item must be an object", "paths", path)
+            continue
+        validate_parameters(
+            full_spec, path_item.get("parameters", []), problem, "paths", path
+        )
+        for verb in HTTP_VERBS:
+            if verb not in path_item:
+                continue
+            location = ("paths", path, verb)
+            operation = path_item[verb]
+            if not isinstance(operation, dict):
+                problem("operation must be an object", *location)
+                continue
+
+            operation_id = operation.get("operationId", None)
+            if not isinstance(operation_id, str):
+                problem("missing operationId", *location, "operationId")
+            else:
+                try:
+                    operation_names(operation_id)
+                except InvalidOperationIdError as e:
+                    problem(str(e), *location, "operationId")
+                if operation_id in operation_ids:
+                    problem(
+                        f"operationId {operation_id!r} is already used by {operation_ids[operation_id]}",
+                        *location,
+                        "operationId",
+                    )
+                else:
+                    operation_ids[operation_id] = json_pointer(*location)
+            if not isinstance(operation.get("summary", None), str):
+                problem("missing summary", *location, "summary")
+
+            responses = operation.get("responses", None)
+            if not isinstance(responses, dict) or not responses:
+                problem("missing responses", *location, "responses")
+
+            request_body = operation.get("requestBody", None)
+            if request_body is not None and not isinstance(request_body, dict):
+                problem("request body is not an object", *location, "requestBody")
+            elif request_body is not None:
+                media = select_media(request_body.get("content", None))
+                if media is None:
+                    # Extraction generates no body for these, so they do not block the rest of the spec
+                    logger.warning(
+                        "Request body has no supported media type; generating the operation without one",
+                        extra={
+                            "operation": json_pointer(*location),
+                            "media_types": list(
+                                request_body.get("content", None) or {}
+                            ),
+                        },
+                    )
+                elif not isinstance(media.schema, dict):
+                    problem(
+                        "request body has no schema",
+                        *location,
+                        "requestBody",
+                        "content",
+                        media.media_type,
+                    )
+
+            validate_parameters(
+                full_spec,
+                operation.get("parameters", []),
+                problem,
+                *location,
+            )
+
+    problems.extend(validate_refs(full_spec))
+    return problems
+
+
+def validate_parameters(full_spec: dict, parameters, problem, *location):
+    """Checks every parameter (or parameter $ref) has a name and a location"""
+    if not isinstance(parameters, list):
+        problem("parameters must be an array", *location, "parameters")
+        return
+    for index, param in enumerate(parameters):
+        segments = (*location, "parameters", index)
+        if isinstance(param, dict) and "$ref" in param:
+            # Dangling refs are reported by validate_refs
+            param = resolve_ref(full_spec, param["$ref"])
+            if param is None:
+                continue
+        if not isinstance(param, dict):
+            problem("parameter must be an object", *segments)
+            continue
+        for key in ["name", "in"]:
+            if not isinstance(param.get(key, None), str):
+                problem(f"parameter is missing {key}", *segments)
+
+
+def resolve_ref(full_spec: dict, ref) -> dict | None:
+    if not isinstance(ref, str):
+        return None
+    try:
+        return get_ref_from_spec(full_spec, ref)
+    except UnresolvedRefError:
+        return None
+
+
+def validate_refs(full_spec: dict) -> list[ValidationProblem]:
+    """
+    Checks that every $ref reachable from the paths resolves. Components no operation uses are not checked,
+    since the extraction never reads them.
+    """
+    problems = []
+    pending = [(full_spec["paths"], "/paths")]
+    followed = set()
+    while pending:
+        node, pointer = pending.pop()
+        if isinstance(node, dict):
+            ref = node.get("$ref", None)
+            if ref is not None and ref not in followed:
+                followed.add(ref)
+                target = resolve_ref(full_spec, ref)
+                if target is None:
+                    problems.append(
+                        ValidationProblem(
+                            f"{pointer}/$ref", f"$ref {ref!r} does not resolve"
+                        )
+                    )
+                else:
+                    # Local targets are located by their pointer, others by the full url#pointer
+                    pending.append((target, ref[1:] if ref.startswith("#") else ref))
+            pending.extend(
+                (value, pointer + json_pointer(key))
+                for key, value in node.items()
+                if key != "$ref"
+            )
+        elif isinstance(node, list):
+            pending.extend(
+                (value, pointer + json_pointer(index))
+                for index, value in enumerate(node)
+            )
+    return problems
@@ -1,22 +1,35 @@
 import argparse
+import asyncio
+import json
+import logging
 import os
 
-import chevron
+from generator import (
+    Generator,
+    parse_template_args,
+    build_diff_report,
+    TemplateArgumentError,
+)
+from generator.changes import (
+    load_manifest,
+    changed_files,
+    affected_jobs,
+    ChangeDetectionError,
+)
+from generator.metrics import SpecMetrics, write_metrics
+from generator.structured_logging import configure_logging
+from mock_server import MockApiServer, build_routes
+from target_conversion.spec_diff import diff_specs
+from spec_download import SpecDownloadError, DownloadPolicy
+from target_conversion import (
+    dump_ir,
+    load_ir,
+    IntermediateFormatError,
+    GenerationLimits,
+    SpecValidationError,
+)
 
-from spec_download import download_specfile, SpecDownloadError
-from target_conversion import build_test_target, build_imports, ApiClientTarget
-
-
-def render_template(file_path, template_data: dict, dest_file: str | None = None):
-    """Substitutes the data into the mustache template and produces a test file"""
-    with open(file_path, "r") as f:
-        rendered_template = chevron.render(f, template_data)
-        if dest_file:
-            with open(dest_file, "wt") as output_file:
-                output_file.write(rendered_template)
-        else:
-            # No file? -> stdout
-            print(rendered_template)
+logger = logging.getLogger("test-generator")
 
 
 if __name__ == "__main__":
@@ -27,8 +40,34 @@ if __name__ == "__main__":
         epilog="Never trust an initial query editor",
     )
 
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
+        "--spec_url", help="URL of the OpenAPI spec file in JSON format"
+    )
+    source.add_argument(
+        "--ir_in",
+        help="Intermediate representation file to render from instead of a spec",
+    )
+    source.add_argument(
+        "--version_spec",
+        help="Spec of one live version of the API, as spec_url=output_file (split at the last =); give once per "
+        "version to generate them all in one run, sharing the work for schemas they have in common",
+        action="append",
+    )
+    source.add_argument(
+        "--changed_since",
+        help="Git revision range (e.g. main...HEAD); regenerate only the --manifest outputs of specs (or "
+        "templates) changed in it",
+    )
+    parser.add_argument(
+        "--manifest",
+        help="JSON file mapping each spec file in the repository to its output file(s), for --changed_since",
+        required=False,
+    )
     parser.add_argument(
-        "--spec_url", help="URL of the OpenAPI spec file in JSON format", required=True
+        "--repo_dir",
+        help="Directory of the git repository (its root or a subdirectory) the --manifest paths are relative to",
+        default=".",
     )
     parser.add_argument(
         "--out_file", help="File to write the generated test source to", required=False
@@ -36,71 +75,347 @@ if __name__ == "__main__":
     parser.add_argument(
         "--port", help="Destination port for the API client requests", default=3001
     )
+    parser.add_argument(
+        "--cache_dir",
+        help="Directory for caching documents referenced by external $refs",
+        required=False,
+    )
+    parser.add_argument(
+        "--pruned_spec_file",
+        help="File to write the pruned spec to, for reuse as a cache artifact",
+        required=False,
+    )
+    parser.add_argument(
+        "--ir_out",
+        help="File to write the extracted data to as an intermediate representation",
+        required=False,
+    )
+    parser.add_argument(
+        "--template",
+        help="Template to render, optionally as template_file=output_file; may be given multiple times",
+        action="append",
+        required=False,
+    )
+    parser.add_argument(
+        "--out_dir",
+        help="Directory for the output of templates given without an output file",
+        required=False,
+    )
+    parser.add_argument(
+        "--parallel",
+        help="Render multiple templates concurrently; with --changed_since, also generate the specs concurrently",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--serve_mock",
+        help="After generating, serve a local mock of the API on --port for running the generated tests",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--diff_against",
+        help="URL of a previous version of the spec; report the affected tests instead of generating",
+        required=False,
+    )
+    parser.add_argument(
+        "--diff_out",
+        help="File to write the --diff_against report to",
+        required=False,
+    )
+    parser.add_argument(
+        "--all_responses",
+        help="Also generate a test per documented error/alternate response and per request body example",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--no_response_assertions",
+        help="Only assert the response status, not the shape of the response body",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--extract_workers",
+        help="Processes to extract the operations with; the spec is shared with them through shared memory",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--no_shared_fixtures",
+        help="Declare every request object inside its test instead of sharing identical ones at module level",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--no_validation",
+        help="Skip checking the spec for everything the extraction needs before generating",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--timeout",
+        help="Seconds to wait for a spec server to respond (and between bytes of the response)",
+        type=float,
+        default=DownloadPolicy.read_timeout,
+    )
+    parser.add_argument(
+        "--retries",
+        help="Further attempts, with exponential backoff, after a download fails with a timeout, connection "
+        "error or retryable status",
+        type=int,
+        default=DownloadPolicy.retries,
+    )
+    parser.add_argument(
+        "--max_per_host",
+        help="Concurrent downloads allowed from the same host",
+        type=int,
+        default=DownloadPolicy.max_per_host,
+    )
+    parser.add_argument(
+        "--metrics_file",
+        help="File to write per-spec counts and durations to, as JSON",
+        required=False,
+    )
+    parser.add_argument(
+        "--log_level",
+        help="Level of the JSON log lines written to stderr",
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+    )
+    parser.add_argument(
+        "--max_ref_depth",
+        help="Nested $refs expanded into a request object before using a placeholder",
+        type=int,
+        default=GenerationLimits.max_ref_depth,
+    )
+    parser.add_argument(
+        "--max_literal_size",
+        help="Largest request object literal (in characters) generated per operation",
+        type=int,
+        default=GenerationLimits.max_literal_size,
+    )
+    parser.add_argument(
+        "--time_budget",
+        help="Seconds allowed for extracting the whole spec; later operations get placeholder values",
+        type=float,
+        required=False,
+    )
     args = parser.parse_args()
-    spec_url = args.spec_url.strip("'")
     out_file = args.out_file
     port = args.port
+    # Progress goes to stderr so that stdout only carries rendered output
+    configure_logging(args.log_level)
 
-    print(f"Spec url given was: {spec_url}")
-    print(f"Output file is: {out_file}")
-
-    print("Downloading spec ...")
     try:
-        spec = download_specfile(spec_url)
-    except SpecDownloadError as e:
-        print(f"Error downloading spec from {spec_url}")
+        template_outputs = parse_template_args(
+            args.template, out_file, args.out_dir, parallel=args.parallel
+        )
+    except TemplateArgumentError as e:
+        logger.error("Invalid --template", extra={"error": str(e)})
         exit(1)
-
-    template_file = "test_template.mustache"
-    if not os.path.isfile(template_file):
-        print(f"{template_file} is not a file")
+    if args.changed_since:
+        if not args.manifest:
+            logger.error("--changed_since needs a --manifest")
+            exit(1)
+        try:
+            manifest = load_manifest(args.manifest, list(template_outputs)[0])
+            changed = changed_files(args.changed_since, args.repo_dir)
+        except ChangeDetectionError as e:
+            logger.error("Cannot detect changes", extra={"error": str(e)})
+            exit(1)
+        # Every template used in the manifest is compiled once and shared by all the specs
+        template_outputs = {
+            template: None for outputs in manifest.values() for template in outputs
+        }
+    for template_file in template_outputs:
+        if not os.path.isfile(template_file):
+            logger.error("Template is not a file", extra={"template": template_file})
+            exit(1)
+    if args.serve_mock and args.ir_in:
+        logger.error(
+            "--serve_mock needs the spec to build response bodies; use --spec_url"
+        )
         exit(1)
 
-    api_title = spec["info"]["title"]
-    api_version = spec["info"]["version"]
-    test_targets: list[ApiClientTarget] = []
-
-    resolved_deps = []
-    # Scan through all the paths and verbs building test target info along the way
-    for path in spec["paths"]:
-        verbs = list(spec["paths"][path].keys())
-        for verb in verbs:
-            test_tgt_out = build_test_target(spec, path, verb)
-            resolved_deps.extend(test_tgt_out.resolved_params)
-            test_targets.append(test_tgt_out)
-
-    api_prefix = f"{api_title}Resource{api_version.upper().rstrip('.0')}"
-    import_classes = build_imports(
-        api_title,
-        api_version=f"{api_version.upper().rstrip('.0')}",
-        test_target_data=test_targets,
-        resolved=resolved_deps,
-    )
-
-    print("Rendering the data into the template ...")
-    # Render the template with the data extracted from the JSON spec
-    render_data = {
-        "api_title": api_title,
-        "api_title_lower": api_title.lower(),
-        "api_version": api_version,
-        "import_data": import_classes,
-        "port": port,
-        "test_data": [
-            {
-                "endpoint_summary": test_target.summary,
-                "endpoint_operation": f"{test_target.request_class[0].lower()}{test_target.request_class[1:]}",
-                "endpoint_params": f"{test_target.request_class}Params",
-                "endpoint_param_values": test_target.parameter_api_client_call,
-                "endpoint_dependent_param_values": test_target.parameter_dependent_objects,
-                "expected_response": test_target.expected_response,
-            }
-            for test_target in test_targets
-        ],
-    }
-    render_template(template_file, render_data, dest_file=out_file)
-    if out_file is None:
-        print("Success!")
+    generator = Generator(
+        templates=list(template_outputs),
+        port=port,
+        cache_dir=args.cache_dir,
+        limits=GenerationLimits(
+            max_ref_depth=args.max_ref_depth,
+            max_literal_size=args.max_literal_size,
+            time_budget=args.time_budget,
+        ),
+        all_responses=args.all_responses,
+        response_assertions=not args.no_response_assertions,
+        parallel=args.parallel,
+        validate=not args.no_validation,
+        shared_fixtures=not args.no_shared_fixtures,
+        extract_workers=args.extract_workers,
+        download_policy=DownloadPolicy(
+            read_timeout=args.timeout,
+            retries=args.retries,
+            max_per_host=args.max_per_host,
+        ),
+    )
+
+    if args.changed_since:
+        jobs = affected_jobs(manifest, changed, args.repo_dir)
+        logger.info(
+            "Regenerating specs changed in revision range",
+            extra={
+                "revision_range": args.changed_since,
+                "changed_files": len(changed),
+                "specs": list(jobs),
+            },
+        )
+        for dest_files in jobs.values():
+            for dest in dest_files.values():
+                os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+        results = generator.generate_many(
+            jobs, workers=(os.cpu_count() or 1) if args.parallel else 1
+        )
+        generated = [
+            result for result in results.values() if not isinstance(result, Exception)
+        ]
+        logger.info(
+            "Regenerated changed specs",
+            extra={
+                "written": [
+                    dest
+                    for result in generated
+                    for dest in jobs[result.spec_url].values()
+                ],
+                "failed": len(results) - len(generated),
+            },
+        )
+        if args.metrics_file:
+            write_metrics(args.metrics_file, [result.metrics for result in generated])
+        exit(0 if len(generated) == len(results) else 1)
+
+    if args.version_spec:
+        if len(template_outputs) > 1:
+            logger.error("--version_spec renders a single template per version")
+            exit(1)
+        template_file = list(template_outputs)[0]
+        jobs = {}
+        for version_arg in args.version_spec:
+            # Split at the last "=", as spec URLs may have query strings of their own
+            spec_url, _, dest_file = version_arg.strip("'").rpartition("=")
+            if not spec_url or not dest_file:
+                logger.error(
+                    "--version_spec needs spec_url=output_file",
+                    extra={"version_spec": version_arg},
+                )
+                exit(1)
+            jobs[spec_url] = {template_file: dest_file}
+        try:
+            results = generator.generate_versions(jobs)
+        except (SpecDownloadError, SpecValidationError) as e:
+            logger.error("Error loading the versions", extra={"error": str(e)})
+            exit(1)
+        logger.info(
+            "Success! You may want to run a linter or formatter against the generated source",
+            extra={
+                "written": [dest_files[template_file] for dest_files in jobs.values()]
+            },
+        )
+        if args.metrics_file:
+            write_metrics(
+                args.metrics_file, [result.metrics for result in results.values()]
+            )
+            logger.info("Metrics written", extra={"metrics_file": args.metrics_file})
+        exit(0)
+
+    if args.ir_in:
+        logger.info(
+            "Loading intermediate representation",
+            extra={"ir_in": args.ir_in, "out_file": out_file},
+        )
+        generator.metrics = SpecMetrics(args.ir_in)
+        try:
+            extraction = load_ir(args.ir_in)
+        except (OSError, IntermediateFormatError) as e:
+            logger.error(
+                "Error loading intermediate representation",
+                extra={"ir_in": args.ir_in, "error": str(e)},
+            )
+            exit(1)
     else:
-        print(f"Success! Test source written to {out_file}")
+        spec_url = args.spec_url.strip("'")
+        logger.info(
+            "Downloading spec", extra={"spec_url": spec_url, "out_file": out_file}
+        )
+        try:
+            # Drops everything the extraction below never reads
+            spec = generator.load(spec_url)
+        except SpecDownloadError as e:
+            logger.error(
+                "Error downloading spec", extra={"spec_url": spec_url, "error": str(e)}
+            )
+            exit(1)
+        except SpecValidationError as e:
+            logger.error(
+                "Spec cannot be used to generate tests",
+                extra={
+                    "spec_url": spec_url,
+                    "problems": [str(problem) for problem in e.problems],
+                },
+            )
+            exit(1)
+
+        if args.pruned_spec_file:
+            with open(args.pruned_spec_file, "wt") as pruned_file:
+                json.dump(spec, pruned_file)
+
+        if args.diff_against:
+            # Only report which tests a spec update affects, without rendering anything
+            logger.info(
+                "Downloading previous spec", extra={"spec_url": args.diff_against}
+            )
+            try:
+                old_spec, _ = generator.fetch(args.diff_against.strip("'"))
+            except (SpecDownloadError, SpecValidationError) as e:
+                logger.error(
+                    "Error downloading spec",
+                    extra={"spec_url": args.diff_against, "error": str(e)},
+                )
+                exit(1)
+            spec_diff = diff_specs(old_spec, spec)
+            report = json.dumps(build_diff_report(spec_diff), indent=2)
+            if args.diff_out:
+                with open(args.diff_out, "wt") as diff_file:
+                    diff_file.write(report)
+                logger.info("Diff report written", extra={"diff_out": args.diff_out})
+            else:
+                print(report)
+            exit(0)
+
+        extraction = generator.extract()
+
+    if args.ir_out:
+        dump_ir(args.ir_out, extraction)
+        logger.info(
+            "Intermediate representation written", extra={"ir_out": args.ir_out}
+        )
+
+    logger.info("Rendering the data into the template")
+    # Render the template(s) with the data extracted from the JSON spec
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+    generator.render(extraction, template_outputs)
+    written = [dest for dest in template_outputs.values() if dest is not None]
+    logger.info(
+        "Success! You may want to run a linter or formatter against the generated source",
+        extra={"written": written},
+    )
+
+    if args.metrics_file:
+        write_metrics(args.metrics_file, [generator.metrics])
+        logger.info("Metrics written", extra={"metrics_file": args.metrics_file})
 
-    print("You may want to run a linter or formatter against the generated source")
+    if args.serve_mock:
+        base_path = f"/api/{extraction.api_title.lower()}/{extraction.api_version}"
+        routes = build_routes(spec, extraction.test_targets, base_path)
+        logger.info(
+            "Serving mock API", extra={"url": f"http://localhost:{port}{base_path}"}
+        )
+        try:
+            asyncio.run(MockApiServer(routes).serve_forever("localhost", int(port)))
+        except KeyboardInterrupt:
+            pass
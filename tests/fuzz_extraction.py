@@ -0,0 +1,296 @@
+"""
+Property-based fuzzing of the extraction over generated OpenAPI specs.
+
+Specs are drawn from hypothesis strategies covering shapes the fixture spec does not have: schemas without
+properties or types, required names that are not declared, nested and cyclic $refs, non-JSON request bodies,
+$ref parameters and responses, and operationIds in every style. Every operation is run through extraction and
+test case building, which must never raise or hang. Throughput (operations per second) is measured over the
+whole run so slowdowns on odd shapes show up too. To fuzz with more examples than the test suite does:
+
+    python -m tests.fuzz_extraction --examples 2000 [--seed 5]
+"""
+
+import json
+import sys
+import time
+from dataclasses import dataclass, asdict
+
+from hypothesis import (
+    given,
+    seed as hypothesis_seed,
+    settings,
+    strategies as st,
+    HealthCheck,
+)
+
+from generator import build_render_data, get_operation_keys
+from target_conversion import (
+    build_test_target,
+    ExtractionResult,
+    GenerationLimits,
+    LimitTracker,
+    SCHEMAS_PREFIX,
+)
+
+# Longest a single generated spec may take through the extraction, in milliseconds. Extracting a drawn spec
+# takes a few milliseconds, so this only catches runaway extraction (e.g. exponential $ref expansion). The
+# deadline is wall-clock time, though: at 2s, examples failed when other processes saturated the CPU (the golden
+# corpus workers, a fuzz campaign running alongside), as a descheduled example counts as a slow one.
+EXAMPLE_DEADLINE = 5000
+
+SCHEMA_NAMES = st.sampled_from(
+    ["Thing", "CreateThingRequest", "Node", "Id", "Status", "A", "Uuid", "X1"]
+)
+PROPERTY_NAMES = st.sampled_from(
+    ["id", "name", "child", "display_name", "X-Request-Id", "with space", "class"]
+    + ["ünïcode", "$dollar"]
+)
+OPERATION_IDS = st.builds(
+    # e.g. Resource$V2_createThing as in the fixture spec, but also without any underscore, kebab-case, dotted,
+    # or starting with a digit
+    lambda prefix, words, separator: prefix + separator.join(words),
+    st.sampled_from(["", "Resource$V2_", "2", "_"]),
+    st.lists(
+        st.sampled_from(["get", "create", "thing", "Things", "byId"]),
+        min_size=1,
+        max_size=3,
+    ),
+    st.sampled_from(["", "_", "-", ".", " "]),
+)
+MEDIA_TYPES = st.sampled_from(
+    [
+        "application/json",
+        "application/merge-patch+json",
+        "application/vnd.api+json",
+        "multipart/form-data",
+        "application/x-www-form-urlencoded",
+        "text/plain",
+        "*/*",
+    ]
+)
+STATUS_CODES = st.sampled_from(["200", "201", "204", "400", "404", "default", "2XX"])
+BASIC_TYPES = st.sampled_from(["string", "integer", "number", "boolean", "array"])
+SCALARS = (
+    st.none()
+    | st.booleans()
+    | st.integers()
+    | st.sampled_from(["", "a", 'q"uo\\te', "ü"])
+)
+JSON_VALUES = (
+    SCALARS
+    | st.lists(SCALARS, max_size=2)
+    | st.dictionaries(PROPERTY_NAMES, SCALARS, max_size=2)
+)
+
+
+@st.composite
+def basic_schemas(draw) -> dict:
+    schema = {"type": draw(BASIC_TYPES)}
+    if schema["type"] == "string":
+        fmt = draw(st.sampled_from([None, "uuid", "date-time", "date", "time"]))
+        if fmt is not None:
+            schema["format"] = fmt
+    if schema["type"] == "array" and draw(st.booleans()):
+        schema["uniqueItems"] = True
+    if draw(st.booleans()):
+        schema["enum"] = draw(st.lists(JSON_VALUES, min_size=1, max_size=3))
+    if draw(st.booleans()):
+        schema["examples"] = draw(st.lists(JSON_VALUES, max_size=2))
+    if draw(st.booleans()):
+        schema["nullable"] = True
+    return schema
+
+
+@st.composite
+def object_schemas(draw, children: st.SearchStrategy) -> dict:
+    schema = {}
+    if draw(st.booleans()):
+        schema["type"] = "object"
+    properties = draw(st.dictionaries(PROPERTY_NAMES, children, max_size=4))
+    # Objects without any "properties" key at all are common in the wild
+    if properties or draw(st.booleans()):
+        schema["properties"] = properties
+    candidates = list(properties) + ["undeclared"]
+    required = [name for name in candidates if draw(st.booleans())]
+    if required:
+        schema["required"] = required
+    return schema
+
+
+# Schemas whose $refs hold the index of a component schema, linked to the actual names by link_refs once the
+# spec is drawn; the strategies are built once, as building them per spec costs more than drawing from them
+SCHEMAS = st.recursive(
+    basic_schemas() | st.just({}) | st.builds(lambda i: {"$ref": i}, st.integers(0, 4)),
+    lambda children: object_schemas(children)
+    | st.builds(lambda items: {"type": "array", "items": items}, children),
+    max_leaves=5,
+)
+
+
+def link_refs(value, names: list[str]):
+    """Points the $ref indexes drawn by SCHEMAS at the component names (or drops them without components)"""
+    if isinstance(value, list):
+        return [link_refs(child, names) for child in value]
+    if not isinstance(value, dict):
+        return value
+    if isinstance(value.get("$ref", None), int):
+        return (
+            {"$ref": SCHEMAS_PREFIX + names[value["$ref"] % len(names)]}
+            if names
+            else {}
+        )
+    return {key: link_refs(child, names) for key, child in value.items()}
+
+
+@st.composite
+def parameters(draw) -> dict:
+    location = draw(st.sampled_from(["path", "query", "header", "cookie"]))
+    param = {"name": draw(PROPERTY_NAMES), "in": location}
+    if location == "path" or draw(st.booleans()):
+        param["required"] = True
+    if draw(st.booleans()):
+        param["schema"] = draw(SCHEMAS)
+    return param
+
+
+RESPONSES = st.fixed_dictionaries(
+    {"description": st.just("")},
+    optional={
+        "content": st.dictionaries(
+            MEDIA_TYPES, st.fixed_dictionaries({"schema": SCHEMAS}), max_size=2
+        )
+    },
+) | st.just({"$ref": "#/components/responses/NotFound"})
+# Everything in an operation but its operationId, which has to be unique in the spec
+OPERATIONS = st.fixed_dictionaries(
+    {
+        "summary": st.sampled_from(["", "Gets things", "Quote ' and \\ backslash"]),
+        "responses": st.dictionaries(STATUS_CODES, RESPONSES, min_size=1, max_size=3),
+    },
+    optional={
+        "parameters": st.lists(
+            parameters() | st.just({"$ref": "#/components/parameters/Limit"}),
+            max_size=3,
+        ),
+        "requestBody": st.fixed_dictionaries(
+            {
+                "content": st.dictionaries(
+                    MEDIA_TYPES,
+                    st.fixed_dictionaries(
+                        {"schema": SCHEMAS}, optional={"example": JSON_VALUES}
+                    ),
+                    max_size=2,
+                )
+            },
+            optional={"required": st.booleans()},
+        ),
+    },
+)
+
+
+@st.composite
+def specs(draw) -> dict:
+    """OpenAPI 3 specs with a handful of component schemas and operations referencing them"""
+    names = draw(st.lists(SCHEMA_NAMES, max_size=5, unique=True))
+    component_schemas = {name: draw(SCHEMAS) for name in names}
+    operation_ids = draw(st.lists(OPERATION_IDS, min_size=1, max_size=5, unique=True))
+    paths = {}
+    for i, operation_id in enumerate(operation_ids):
+        path = draw(st.sampled_from(["/things", "/things/{id}", f"/path{i}"]))
+        verb = draw(st.sampled_from(["get", "put", "post", "delete", "patch"]))
+        path_item = paths.setdefault(path, {})
+        if verb in path_item:
+            continue
+        path_item[verb] = {"operationId": operation_id} | draw(OPERATIONS)
+        if path.endswith("{id}") and "parameters" not in path_item:
+            path_item["parameters"] = [
+                {"name": "id", "in": "path", "schema": draw(SCHEMAS)}
+            ]
+    spec = {
+        "openapi": "3.0.1",
+        "info": {"title": "Things", "version": "v1"},
+        "paths": paths,
+        "components": {
+            "schemas": component_schemas,
+            "parameters": {
+                "Limit": {"name": "limit", "in": "query", "schema": {"type": "integer"}}
+            },
+            "responses": {
+                "NotFound": {
+                    "description": "",
+                    "content": {
+                        "application/json": {"schema": {"type": "object"}},
+                    },
+                }
+            },
+        },
+    }
+    return link_refs(spec, names)
+
+
+@dataclass
+class FuzzReport(object):
+    """What a fuzzing run covered and how fast the extraction went"""
+
+    examples: int = 0
+    operations: int = 0
+    # Time spent in the extraction itself, not in generating the specs
+    seconds: float = 0.0
+
+    @property
+    def operations_per_second(self) -> float:
+        return self.operations / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self) | {"operations_per_second": self.operations_per_second}
+
+
+def extract_everything(spec: dict) -> int:
+    """
+    Runs every operation of the spec through the extraction and test case building
+    :return: the number of operations
+    """
+    limits = LimitTracker(GenerationLimits(max_literal_size=10_000))
+    test_targets = [
+        build_test_target(spec, path, verb, limits=limits)
+        for path, verb in get_operation_keys(spec)
+    ]
+    extraction = ExtractionResult("Things", "v1", [], test_targets)
+    build_render_data(extraction, 3001, all_responses=True)
+    return len(test_targets)
+
+
+def run_fuzz(examples: int, seed: int | None = 0) -> FuzzReport:
+    """
+    Fuzzes the extraction with the given number of generated specs; any failure is raised
+    :param seed: draws the same specs on every run with the same seed; None draws new ones each time
+    """
+    report = FuzzReport()
+
+    @settings(
+        max_examples=examples,
+        deadline=EXAMPLE_DEADLINE,
+        database=None,
+        suppress_health_check=[HealthCheck.too_slow, HealthCheck.data_too_large],
+    )
+    @given(specs())
+    def fuzz(spec: dict):
+        started = time.perf_counter()
+        report.operations += extract_everything(spec)
+        report.seconds += time.perf_counter() - started
+        report.examples += 1
+
+    if seed is not None:
+        fuzz = hypothesis_seed(seed)(fuzz)
+    fuzz()
+    return report
+
+
+if __name__ == "__main__":
+    examples = 500
+    if "--examples" in sys.argv:
+        examples = int(sys.argv[sys.argv.index("--examples") + 1])
+    seed = None
+    if "--seed" in sys.argv:
+        seed = int(sys.argv[sys.argv.index("--seed") + 1])
+    print(json.dumps(run_fuzz(examples, seed=seed).to_dict(), indent=2))
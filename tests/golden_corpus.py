@@ -0,0 +1,118 @@
+"""
+Golden snapshots of the full pipeline (validate, prune, extract, render) over a corpus of specs.
+
+Only the sha256 of each output is stored, in tests/data/corpus/goldens.json. Outputs are reproducible because
+UUIDs are seeded. To accept intentional output changes, regenerate the goldens with:
+
+    python -m tests.golden_corpus --update
+"""
+
+import glob
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from generator import Generator
+from target_conversion import (
+    validate_spec,
+    prune_spec,
+    SpecValidationError,
+)
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_DIR = os.path.join(REPO_DIR, "tests", "data", "corpus")
+GOLDENS_FILE = os.path.join(CORPUS_DIR, "goldens.json")
+# Everything the output depends on besides the spec itself
+GENERATOR_SOURCES = ["generator", "target_conversion", "spec_download"]
+GENERATOR_FILES = ["test_template.mustache"]
+
+# Generator options each corpus spec is rendered with
+VARIANTS = {
+    "default": {},
+    "all_responses": {"all_responses": True},
+}
+
+
+def corpus_specs() -> list[str]:
+    """Spec files of the corpus, relative to the repo"""
+    specs = [
+        os.path.relpath(path, REPO_DIR)
+        for path in glob.glob(os.path.join(CORPUS_DIR, "*.json"))
+        if path != GOLDENS_FILE
+    ]
+    return sorted(specs + [os.path.join("tests", "data", "notif_v2_spec.json")])
+
+
+def corpus_cases() -> list[str]:
+    """Snapshot names, e.g. tests/data/corpus/things_v1.json:all_responses"""
+    return [f"{spec}:{variant}" for spec in corpus_specs() for variant in VARIANTS]
+
+
+def hash_file(file_path: str) -> str:
+    with open(file_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def generator_code_hash() -> str:
+    """Hash of the generator source and template, so snapshots are only re-rendered when they change"""
+    digest = hashlib.sha256()
+    files = [os.path.join(REPO_DIR, name) for name in GENERATOR_FILES]
+    for package in GENERATOR_SOURCES:
+        files.extend(
+            glob.glob(os.path.join(REPO_DIR, package, "**", "*.py"), recursive=True)
+        )
+    for file_path in sorted(files):
+        digest.update(os.path.relpath(file_path, REPO_DIR).encode("utf-8"))
+        digest.update(hash_file(file_path).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def render_case(case: str) -> str:
+    """Runs the whole pipeline for a snapshot and returns the rendered source"""
+    spec_file, _, variant = case.rpartition(":")
+    with open(os.path.join(REPO_DIR, spec_file), "r") as f:
+        spec = json.load(f)
+    problems = validate_spec(spec)
+    if problems:
+        raise SpecValidationError(problems)
+    spec, _ = prune_spec(spec)
+
+    generator = Generator(uuid_seed=0, **VARIANTS[variant])
+    return list(generator.render(generator.extract(spec)).values())[0]
+
+
+def hash_case(case: str) -> str:
+    return hashlib.sha256(render_case(case).encode("utf-8")).hexdigest()
+
+
+def hash_cases(cases: list[str], workers: int | None = None) -> dict[str, str]:
+    """Renders the snapshots in parallel, one process per CPU by default"""
+    if len(cases) <= 1:
+        return {case: hash_case(case) for case in cases}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(cases, executor.map(hash_case, cases)))
+
+
+def load_goldens() -> dict[str, str]:
+    if not os.path.isfile(GOLDENS_FILE):
+        return {}
+    with open(GOLDENS_FILE, "r") as f:
+        return json.load(f)
+
+
+def update_goldens():
+    goldens = hash_cases(corpus_cases())
+    with open(GOLDENS_FILE, "wt") as f:
+        json.dump(goldens, f, indent=2, sort_keys=True)
+        f.write("\n")
+    return goldens
+
+
+if __name__ == "__main__":
+    if "--update" in sys.argv:
+        for case, output_hash in update_goldens().items():
+            print(f"{output_hash}  {case}")
+    else:
+        print(__doc__)
@@ -22,6 +22,7 @@ one_test_target = ApiClientTarget(
     'CreateBehaviorGroupRequest = { displayName: "" };',
     expected_response="200",
     resolved_params=[],
+    request_import_class="CreateBehaviorGroupRequest",
 )
 
 
@@ -38,7 +39,10 @@ def test_build_param_imports():
 
 
 def test_build_request_imports():
-    imports_out = build_request_imports("Notification", "V2", [one_test_target])
+    imports_out = build_request_imports(
+        "Notification", "V2", [one_test_target, one_test_target]
+    )
+    # Operations sending the same request object import it once
     assert len(imports_out) == 1
     assert imports_out[0]["importClass"] == "CreateBehaviorGroupRequest"
     assert imports_out[0]["importPackage"] == "types"
@@ -0,0 +1,64 @@
+import copy
+import json
+
+from target_conversion import build_response_assertions, build_test_target
+
+full_spec = json.load(open("./tests/data/notif_v2_spec.json"))
+
+
+def test_build_response_assertions_for_object():
+    assertions = build_response_assertions(
+        full_spec, {"$ref": "#/components/schemas/Facet"}
+    )
+    assert assertions[0] == "expect(typeof resp.data).toBe('object');"
+    assert 'expect(resp.data).toHaveProperty(["name"]);' in assertions
+    assert "expect(typeof resp.data[\"name\"]).toBe('string');" in assertions
+
+
+def test_build_response_assertions_for_array_and_basic_types():
+    array_schema = {"type": "array", "items": {"$ref": "#/components/schemas/Facet"}}
+    assert build_response_assertions(full_spec, array_schema) == [
+        "expect(Array.isArray(resp.data)).toBe(true);"
+    ]
+    assert build_response_assertions(full_spec, {"type": "boolean"}) == [
+        "expect(typeof resp.data).toBe('boolean');"
+    ]
+    assert build_response_assertions(full_spec, None) == []
+
+
+def test_build_response_assertions_for_type_lists():
+    assert build_response_assertions(full_spec, {"type": ["boolean"]}) == [
+        "expect(typeof resp.data).toBe('boolean');"
+    ]
+    assert build_response_assertions(full_spec, {"type": ["string", "null"]}) == []
+    assert build_response_assertions(full_spec, {"type": ["string", "integer"]}) == []
+
+    spec = copy.deepcopy(full_spec)
+    bundle = spec["components"]["schemas"]["Bundle"]
+    bundle["properties"]["name"]["type"] = ["string", "null"]
+    bundle["properties"]["display_name"]["type"] = ["string"]
+    target = build_test_target(spec, "/notifications/bundles/{bundleName}", "get")
+    assertions = target.response_assertions["200"]
+    assert "expect(typeof resp.data[\"display_name\"]).toBe('string');" in assertions
+    assert not any('typeof resp.data["name"]' in line for line in assertions)
+
+
+def test_response_assertions_are_shared_across_operations():
+    by_bundle = build_test_target(
+        full_spec, "/notifications/bundles/{bundleId}/behaviorGroups", "get"
+    )
+    by_endpoint = build_test_target(
+        full_spec,
+        "/notifications/behaviorGroups/affectedByRemovalOfEndpoint/{endpointId}",
+        "get",
+    )
+    assert (
+        by_bundle.response_assertions["200"] is by_endpoint.response_assertions["200"]
+    )
+
+    no_content = build_test_target(
+        full_spec,
+        "/notifications/eventTypes/{eventTypeId}/behaviorGroups/{behaviorGroupId}",
+        "delete",
+    )
+    assert no_content.response_assertions == {"204": []}
@@ -0,0 +1,89 @@
+import copy
+import json
+
+from target_conversion import build_test_target, build_test_cases, hoist_shared_fixtures
+
+full_spec = json.load(open("./tests/data/notif_v2_spec.json"))
+
+
+def test_build_test_cases_happy_path_only():
+    target = build_test_target(full_spec, "/notifications/behaviorGroups/{id}", "put")
+    test_cases = build_test_cases(target)
+    assert len(test_cases) == 1
+    assert test_cases[0]["endpoint_summary"] == "Update a behavior group"
+    assert test_cases[0]["expected_response"] == "200"
+    assert test_cases[0]["request_options"] is None
+    assert test_cases[0]["request_media_type"] == "application/json"
+    assert (
+        test_cases[0]["endpoint_params"]
+        == "NotificationResourceV2UpdateBehaviorGroupParams"
+    )
+
+
+def test_build_test_cases_all_responses():
+    target = build_test_target(full_spec, "/notifications/behaviorGroups/{id}", "put")
+    assert list(target.responses) == ["200", "400", "404"]
+    assert target.responses["200"] == {"type": "boolean"}
+
+    test_cases = build_test_cases(target, all_responses=True)
+    assert [test_case["expected_response"] for test_case in test_cases] == [
+        "200",
+        "400",
+        "404",
+    ]
+    assert test_cases[2]["endpoint_summary"] == "Update a behavior group (404 response)"
+    assert "Prefer: 'code=404'" in test_cases[2]["request_options"]
+    # Error cases reuse the literals built for the happy path
+    assert (
+        test_cases[2]["endpoint_param_values"] == test_cases[0]["endpoint_param_values"]
+    )
+
+
+def test_build_test_cases_request_body_examples():
+    spec = copy.deepcopy(full_spec)
+    spec["paths"]["/notifications/behaviorGroups"]["post"]["requestBody"]["content"][
+        "application/json"
+    ]["examples"] = {"minimal": {"value": {"display_name": "It's a group"}}}
+    target = build_test_target(spec, "/notifications/behaviorGroups", "post")
+    assert target.request_body_examples == {"minimal": {"display_name": "It's a group"}}
+
+    test_cases = build_test_cases(target, all_responses=True)
+    assert (
+        test_cases[-1]["endpoint_summary"]
+        == "Create a behavior group (example minimal)"
+    )
+    assert test_cases[-1]["endpoint_dependent_param_values"] == (
+        "const createBehaviorGroupRequest : CreateBehaviorGroupRequest = "
+        '{"display_name": "It\'s a group"};'
+    )
+
+
+def test_hoist_shared_fixtures():
+    spec = copy.deepcopy(full_spec)
+    # A second operation sending the same request object as "Create a behavior group"
+    spec["paths"]["/notifications/behaviorGroups"]["put"] = copy.deepcopy(
+        spec["paths"]["/notifications/behaviorGroups"]["post"]
+    ) | {"operationId": "NotificationResource$V2_replaceBehaviorGroup"}
+
+    test_cases = [
+        test_case
+        for verb in ["post", "put"]
+        for test_case in build_test_cases(
+            build_test_target(spec, "/notifications/behaviorGroups", verb)
+        )
+    ]
+    declaration = test_cases[0]["endpoint_dependent_param_values"]
+    assert declaration.startswith("const createBehaviorGroupRequest")
+    assert test_cases[1]["endpoint_dependent_param_values"] == declaration
+
+    other = build_test_cases(
+        build_test_target(spec, "/notifications/behaviorGroups/{id}", "put")
+    )
+    fixtures, hoisted = hoist_shared_fixtures(test_cases + other)
+    assert fixtures == [declaration]
+    assert [test_case["endpoint_dependent_param_values"] for test_case in hoisted] == [
+        "",
+        "",
+        other[0]["endpoint_dependent_param_values"],
+    ]
+    assert hoisted[0]["endpoint_param_values"] == "createBehaviorGroupRequest"
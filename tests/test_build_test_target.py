@@ -52,3 +52,67 @@ def test_build_test_target_neither():
     target = build_test_target(full_spec, spec_path, spec_verb)
     assert "" == target.parameter_dependent_objects
     assert "" == target.parameter_api_client_call
+
+
+def test_build_test_target_optional_alias_body():
+    """An optional request body that is a basic type alias is still passed as the body value"""
+    spec = {
+        "paths": {
+            "/things": {
+                "put": {
+                    "operationId": "updateThing",
+                    "summary": "Update a thing",
+                    "requestBody": {
+                        "content": {
+                            "application/json": {
+                                "schema": {"$ref": "#/components/schemas/Label"}
+                            }
+                        }
+                    },
+                    "responses": {"204": {"description": ""}},
+                }
+            }
+        },
+        "components": {"schemas": {"Label": {"type": "string"}}},
+    }
+
+    target = build_test_target(spec, "/things", "put")
+    assert target.parameter_api_client_call == 'body: ""'
+    assert target.expected_response == "204"
+
+
+def test_build_test_target_form_bodies():
+    """Form fields are passed to the client one by one, and multipart files as Blobs"""
+    uploads_spec = json.load(open("./tests/data/corpus/uploads_v1.json"))
+
+    target = build_test_target(uploads_spec, "/uploads", "post")
+    assert target.request_media_type == "multipart/form-data"
+    assert target.parameter_dependent_objects == ""
+    assert target.request_import_class == ""
+    assert (
+        target.parameter_api_client_call
+        == 'file: new Blob([""]), label: "", tags: new Set<string>()'
+    )
+
+    target = build_test_target(uploads_spec, "/uploads/search", "post")
+    assert target.request_media_type == "application/x-www-form-urlencoded"
+    assert target.parameter_api_client_call == 'query: "", limit: 0'
+
+    # JSON bodies are still declared as a request object
+    target = build_test_target(uploads_spec, "/uploads/{uploadId}", "patch")
+    assert target.request_media_type == "application/merge-patch+json"
+    assert target.request_import_class == "UploadPatch"
+    assert target.parameter_dependent_objects.startswith("const uploadPatch")
+
+
+def test_build_test_target_binary_body():
+    spec = json.loads(json.dumps(full_spec))
+    spec["paths"]["/notifications/behaviorGroups"]["post"]["requestBody"] = {
+        "content": {
+            "application/octet-stream": {
+                "schema": {"type": "string", "format": "binary"}
+            }
+        }
+    }
+    target = build_test_target(spec, "/notifications/behaviorGroups", "post")
+    assert target.parameter_api_client_call == 'requestBody: new Blob([""])'
@@ -0,0 +1,120 @@
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from generator import Generator, GenerationResult
+from generator.changes import (
+    load_manifest,
+    changed_files,
+    affected_jobs,
+    ChangeDetectionError,
+)
+
+full_spec = json.load(open("./tests/data/notif_v2_spec.json"))
+
+
+def git(repo_dir, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=repo_dir,
+        check=True,
+        capture_output=True,
+    )
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """A repository with two specs and a manifest, where only the first spec changed in the last commit"""
+    (tmp_path / "specs").mkdir()
+    shutil.copy("./tests/data/notif_v2_spec.json", tmp_path / "specs" / "notif.json")
+    shutil.copy(
+        "./tests/data/corpus/things_v1.json", tmp_path / "specs" / "things.json"
+    )
+    (tmp_path / "manifest.json").write_text(
+        json.dumps(
+            {
+                "specs/notif.json": "packages/notifications/notifications.test.ts",
+                "specs/things.json": "packages/things/things.test.ts",
+                "specs/removed.json": "packages/removed/removed.test.ts",
+            }
+        )
+    )
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-q", "-m", "Add specs")
+
+    changed_spec = dict(full_spec, info=dict(full_spec["info"], description="Changed"))
+    (tmp_path / "specs" / "notif.json").write_text(json.dumps(changed_spec))
+    git(tmp_path, "commit", "-q", "-am", "Change the notifications spec")
+    return tmp_path
+
+
+def test_regenerates_only_changed_specs(repo):
+    generator = Generator()
+    template = list(generator.templates)[0]
+    manifest = load_manifest(str(repo / "manifest.json"), template)
+    changed = changed_files("HEAD~1..HEAD", str(repo))
+    assert changed == {"specs/notif.json"}
+
+    jobs = affected_jobs(manifest, changed, str(repo))
+    assert jobs == {
+        str(repo / "specs" / "notif.json"): {
+            template: str(repo / "packages" / "notifications" / "notifications.test.ts")
+        }
+    }
+
+    (repo / "packages" / "notifications").mkdir(parents=True)
+    results = generator.generate_many(jobs, workers=2)
+    assert all(isinstance(result, GenerationResult) for result in results.values())
+    assert (repo / "packages" / "notifications" / "notifications.test.ts").exists()
+    assert not (repo / "packages" / "things").exists()
+
+
+def test_changed_template_regenerates_its_specs(repo):
+    manifest = load_manifest(str(repo / "manifest.json"), "test_template.mustache")
+    jobs = affected_jobs(manifest, {"test_template.mustache"}, str(repo))
+    # Rendered with a template outside the repository, so nothing is affected
+    assert jobs == {}
+
+    manifest = {
+        "specs/things.json": {
+            str(repo / "templates" / "things.mustache"): "things.test.ts"
+        }
+    }
+    jobs = affected_jobs(manifest, {"templates/things.mustache"}, str(repo))
+    assert list(jobs) == [str(repo / "specs" / "things.json")]
+
+
+def test_change_detection_errors(repo, tmp_path):
+    with pytest.raises(ChangeDetectionError):
+        changed_files("no-such-revision..HEAD", str(repo))
+    (tmp_path / "bad_manifest.json").write_text(json.dumps({"specs/a.json": 1}))
+    with pytest.raises(ChangeDetectionError):
+        load_manifest(str(tmp_path / "bad_manifest.json"), "test_template.mustache")
+
+
+def test_repo_dir_in_a_subdirectory(tmp_path):
+    api_dir = tmp_path / "apis" / "notifications"
+    (api_dir / "specs").mkdir(parents=True)
+    shutil.copy("./tests/data/notif_v2_spec.json", api_dir / "specs" / "notif.json")
+    shutil.copy("./tests/data/corpus/things_v1.json", api_dir / "specs" / "thïngs.json")
+    (tmp_path / "README.md").write_text("Specs")
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-q", "-m", "Add specs")
+    (api_dir / "specs" / "thïngs.json").write_text(json.dumps(full_spec))
+    (tmp_path / "README.md").write_text("Changed")
+    git(tmp_path, "commit", "-q", "-am", "Change the things spec")
+
+    # Paths are relative to the subdirectory, non-ASCII names unquoted, and changes outside it left out
+    changed = changed_files("HEAD~1..HEAD", str(api_dir))
+    assert changed == {"specs/thïngs.json"}
+    manifest = {
+        "specs/notif.json": {"test_template.mustache": "notif.test.ts"},
+        "specs/thïngs.json": {"test_template.mustache": "things.test.ts"},
+    }
+    assert list(affected_jobs(manifest, changed, str(api_dir))) == [
+        str(api_dir / "specs" / "thïngs.json")
+    ]
@@ -0,0 +1,52 @@
+import functools
+import subprocess
+import sys
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def spec_server():
+    """Serves tests/data; the query string of a request is ignored"""
+    server = ThreadingHTTPServer(
+        ("localhost", 0), functools.partial(QuietHandler, directory="tests/data")
+    )
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://localhost:{server.server_port}"
+    finally:
+        server.shutdown()
+
+
+def run_cli(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "test-generator.py", *args],
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+
+
+def test_version_spec_urls_with_query_strings(spec_server, tmp_path):
+    out_file = tmp_path / "notifications.test.ts"
+    result = run_cli(
+        "--version_spec",
+        f"{spec_server}/notif_v2_spec.json?format=json={out_file}",
+        "--no_response_assertions",
+    )
+    assert result.returncode == 0, result.stderr
+    assert "describe(" in out_file.read_text()
+
+
+def test_version_spec_needs_an_output_file(spec_server):
+    result = run_cli("--version_spec", f"{spec_server}/notif_v2_spec.json")
+    assert result.returncode == 1
+    assert "--version_spec needs spec_url=output_file" in result.stderr
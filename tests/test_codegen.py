@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from target_conversion import (
+    build_dependent_param_string,
+    request_body_parameter_as_string,
+    RequestBodyParameter,
+)
+from target_conversion.codegen import (
+    Const,
+    Node,
+    Literal,
+    ObjectLiteral,
+    Property,
+    Raw,
+    serialize,
+)
+
+full_spec = json.load(open("./tests/data/notif_v2_spec.json"))
+
+
+def test_serialize_nodes():
+    node = Const(
+        "thing",
+        "Thing",
+        ObjectLiteral(
+            [
+                Property("name", Literal('say "hi"\n')),
+                Property("X-Request-Id", Literal("abc")),
+                Property("tags", Raw("new Set<string>()")),
+                Property("nested", ObjectLiteral()),
+                Raw("shorthand"),
+            ]
+        ),
+    )
+    assert (
+        serialize(node)
+        == 'const thing : Thing = { name: "say \\"hi\\"\\n", "X-Request-Id": "abc", tags: new Set<string>(), '
+        "nested: {  }, shorthand };"
+    )
+    assert serialize([Raw("a"), Raw("b")], ", ") == "a, b"
+
+    # Every node has to say how it is written
+    class Unwritable(Node):
+        pass
+
+    with pytest.raises(TypeError):
+        Unwritable()
+
+
+def test_examples_are_escaped():
+    param = RequestBodyParameter("time", "string", None, None, None, 'a "quoted" value')
+    assert request_body_parameter_as_string(param) == 'time: "a \\"quoted\\" value"'
+
+
+def test_nested_uuid_is_a_property():
+    ref = "#/components/schemas/CreateBehaviorGroupRequest"
+    result = build_dependent_param_string(
+        full_spec,
+        [RequestBodyParameter(None, None, ref, None, None, None)],
+        include_all=True,
+    )
+    assert result.startswith(
+        'const createBehaviorGroupRequest : CreateBehaviorGroupRequest = { bundle_id: "'
+    )
+    assert result.count("bundle_id") == 1
+    assert result.endswith(" };")
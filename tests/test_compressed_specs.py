@@ -0,0 +1,75 @@
+import functools
+import gzip
+import json
+import threading
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+
+import pytest
+
+from spec_download import get_spec
+
+full_spec = json.load(open("./tests/data/notif_v2_spec.json"))
+spec_bytes = json.dumps(full_spec).encode("utf-8")
+
+
+class GzipEncodingHandler(SimpleHTTPRequestHandler):
+    """
+    Serves /encoded.json gzipped with a Content-Encoding header, .gz files as they are but with a
+    Content-Encoding: gzip header (as many static file servers do), and other files as they are
+    """
+
+    def do_GET(self):
+        if self.path != "/encoded.json":
+            return super().do_GET()
+        body = gzip.compress(spec_bytes)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def end_headers(self):
+        if self.path.endswith(".gz"):
+            self.send_header("Content-Encoding", "gzip")
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def spec_server(tmp_path):
+    handler = functools.partial(GzipEncodingHandler, directory=str(tmp_path))
+    server = HTTPServer(("localhost", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://localhost:{server.server_port}"
+    finally:
+        server.shutdown()
+
+
+def test_local_compressed_specs(tmp_path):
+    (tmp_path / "spec.json").write_bytes(spec_bytes)
+    (tmp_path / "spec.json.gz").write_bytes(gzip.compress(spec_bytes))
+
+    assert get_spec(str(tmp_path / "spec.json")) == full_spec
+    assert get_spec(str(tmp_path / "spec.json.gz")) == full_spec
+    assert get_spec((tmp_path / "spec.json.gz").as_uri()) == full_spec
+
+
+def test_http_compressed_specs(tmp_path, spec_server):
+    (tmp_path / "spec.json.gz").write_bytes(gzip.compress(spec_bytes))
+
+    assert get_spec(f"{spec_server}/encoded.json") == full_spec
+    # The .gz extension and the Content-Encoding describe the same compression, which is only undone once
+    assert get_spec(f"{spec_server}/spec.json.gz") == full_spec
+
+
+def test_zstd_compressed_specs(tmp_path, spec_server):
+    # zstd support is optional
+    zstandard = pytest.importorskip("zstandard")
+    (tmp_path / "spec.json.zst").write_bytes(zstandard.compress(spec_bytes))
+
+    assert get_spec(str(tmp_path / "spec.json.zst")) == full_spec
+    assert get_spec(f"{spec_server}/spec.json.zst") == full_spec
@@ -0,0 +1,118 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from spec_download import (
+    download_specfile,
+    get_spec,
+    DocumentStore,
+    DownloadPolicy,
+    SpecDownloadError,
+)
+
+full_spec = json.load(open("./tests/data/notif_v2_spec.json"))
+spec_bytes = json.dumps(full_spec).encode("utf-8")
+
+# Quick retries so the tests do not wait on the backoff
+fast_policy = DownloadPolicy(
+    read_timeout=1.0, retries=2, backoff=0.01, max_backoff=0.02
+)
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """
+    Stub spec server: /flaky.json fails with 503 a couple of times before serving the spec, /missing.json is a
+    404, /slow.json never answers in time and /spec.json is served after a short delay
+    """
+
+    requests_seen: dict[str, int] = {}
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.requests_seen[self.path] = cls.requests_seen.get(self.path, 0) + 1
+            seen = cls.requests_seen[self.path]
+            if self.path == "/spec.json":
+                cls.in_flight += 1
+                cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            if self.path == "/flaky.json" and seen <= 2:
+                self.send_error(503)
+            elif self.path == "/missing.json":
+                self.send_error(404)
+            elif self.path == "/slow.json":
+                time.sleep(1.5)
+                self.send_error(504)
+            else:
+                time.sleep(0.05)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(spec_bytes)))
+                self.end_headers()
+                self.wfile.write(spec_bytes)
+        finally:
+            if self.path == "/spec.json":
+                with cls.lock:
+                    cls.in_flight -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    FlakyHandler.requests_seen = {}
+    FlakyHandler.max_in_flight = 0
+    server = ThreadingHTTPServer(("localhost", 0), FlakyHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://localhost:{server.server_port}"
+    finally:
+        server.shutdown()
+
+
+def test_retries_transient_failures(stub_server):
+    assert get_spec(f"{stub_server}/flaky.json", fast_policy) == full_spec
+    assert FlakyHandler.requests_seen["/flaky.json"] == 3
+
+
+def test_fails_fast_and_keeps_the_cause(stub_server):
+    with pytest.raises(SpecDownloadError) as e:
+        download_specfile(
+            f"{stub_server}/missing.json", DocumentStore(), policy=fast_policy
+        )
+    assert isinstance(e.value.__cause__, requests.HTTPError)
+    assert e.value.__cause__.response.status_code == 404
+    assert FlakyHandler.requests_seen["/missing.json"] == 1
+
+
+def test_times_out_hung_servers(stub_server):
+    policy = DownloadPolicy(read_timeout=0.2, retries=1, backoff=0.01)
+    started = time.monotonic()
+    with pytest.raises(SpecDownloadError) as e:
+        download_specfile(f"{stub_server}/slow.json", DocumentStore(), policy=policy)
+    assert isinstance(e.value.__cause__, requests.Timeout)
+    assert FlakyHandler.requests_seen["/slow.json"] == 2
+    assert time.monotonic() - started < 1.5
+
+
+def test_limits_concurrent_downloads_per_host(stub_server):
+    policy = DownloadPolicy(max_per_host=2)
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        specs = list(
+            executor.map(
+                lambda _: get_spec(f"{stub_server}/spec.json", policy), range(6)
+            )
+        )
+    assert specs == [full_spec] * 6
+    # How many requests overlap depends on timing; the limit only bounds it
+    assert 1 <= FlakyHandler.max_in_flight <= 2
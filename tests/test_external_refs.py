@@ -0,0 +1,96 @@
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from spec_download import DocumentStore
+from target_conversion import get_request_body_parameters_from_ref
+from target_conversion.ref_handling import get_ref_from_spec
+
+common_doc = {
+    "components": {
+        "schemas": {
+            "Error": {
+                "type": "object",
+                "required": ["message", "details"],
+                "properties": {
+                    "message": {"type": "string"},
+                    "details": {"$ref": "#/components/schemas/ErrorDetails"},
+                },
+            },
+            "ErrorDetails": {"type": "object", "properties": {}},
+        }
+    }
+}
+
+
+def make_spec():
+    return {
+        "paths": {},
+        "components": {
+            "schemas": {
+                "Local": {"$ref": "common.json#/components/schemas/Error"},
+            }
+        },
+    }
+
+
+def test_external_ref_is_fetched_once_and_resolved():
+    fetched = []
+
+    def fetch(url):
+        fetched.append(url)
+        return copy.deepcopy(common_doc)
+
+    store = DocumentStore(fetch=fetch)
+    spec = make_spec()
+    store.resolve_external_refs(spec, "https://example.com/specs/notif.json")
+    store.resolve_external_refs(make_spec(), "https://example.com/specs/other.json")
+
+    assert fetched == ["https://example.com/specs/common.json"]
+
+    ref = spec["components"]["schemas"]["Local"]["$ref"]
+    assert ref == "https://example.com/specs/common.json#/components/schemas/Error"
+    assert get_ref_from_spec(spec, ref)["required"] == ["message", "details"]
+
+    # Local refs inside the external document keep pointing into that document
+    params = get_request_body_parameters_from_ref(spec, ref)
+    assert params[1].ref == (
+        "https://example.com/specs/common.json#/components/schemas/ErrorDetails"
+    )
+    assert get_ref_from_spec(spec, params[1].ref) == {
+        "type": "object",
+        "properties": {},
+    }
+
+
+def test_external_documents_are_cached_on_disk(tmp_path):
+    DocumentStore(
+        cache_dir=str(tmp_path), fetch=lambda url: copy.deepcopy(common_doc)
+    ).get("https://example.com/specs/common.json")
+
+    def fail(url):
+        raise AssertionError("document should have come from the disk cache")
+
+    document = DocumentStore(cache_dir=str(tmp_path), fetch=fail).get(
+        "https://example.com/specs/common.json"
+    )
+    assert "Error" in document["components"]["schemas"]
+
+
+def test_concurrent_gets_fetch_once():
+    fetched = []
+
+    def fetch(url):
+        fetched.append(url)
+        # Slow enough for every thread to miss the memory cache
+        time.sleep(0.2)
+        return copy.deepcopy(common_doc)
+
+    store = DocumentStore(fetch=fetch)
+    url = "https://example.com/specs/common.json"
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        documents = list(executor.map(store.get, [url] * 8))
+
+    assert fetched == [url]
+    assert all(document is documents[0] for document in documents)
+    assert store.stats == {"memory_hits": 7, "disk_hits": 0, "fetches": 1}
@@ -0,0 +1,30 @@
+import warnings
+
+from tests.fuzz_extraction import run_fuzz
+
+# Generated specs per test run; python -m tests.fuzz_extraction runs longer, randomized campaigns
+EXAMPLES = 50
+
+
+def test_extraction_survives_generated_specs(request):
+    report = run_fuzz(EXAMPLES)
+    assert report.examples == EXAMPLES
+    assert report.operations >= EXAMPLES
+
+    # Throughput is compared with the previous run (kept in the pytest cache) rather than a fixed floor, as it
+    # depends on the machine
+    cache = getattr(request.config, "cache", None)
+    if cache is None:
+        return
+    previous = cache.get("fuzz_extraction/operations_per_second", None)
+    cache.set("fuzz_extraction/operations_per_second", report.operations_per_second)
+    if previous and report.operations_per_second < previous / 2:
+        warnings.warn(
+            f"Extraction throughput dropped from {previous:.0f} to "
+            f"{report.operations_per_second:.0f} operations per second"
+        )
+
+
+def test_seed_selects_the_generated_specs():
+    assert run_fuzz(10, seed=5).operations == run_fuzz(10, seed=5).operations
+    assert run_fuzz(10, seed=5).operations != run_fuzz(10, seed=0).operations
@@ -0,0 +1,110 @@
+import copy
+import json
+import time
+
+from target_conversion import (
+    build_dependent_param_string,
+    build_test_target,
+    GenerationLimits,
+    LimitTracker,
+    RequestBodyParameter,
+)
+
+full_spec = json.load(open("./tests/data/notif_v2_spec.json"))
+
+cyclic_spec = {
+    "paths": {
+        "/nodes": {
+            "post": {
+                "operationId": "Node_create",
+                "summary": "Create a node",
+                "requestBody": {
+                    "required": False,
+                    "content": {
+                        "application/json": {
+                            "schema": {"$ref": "#/components/schemas/Node"}
+                        }
+                    },
+                },
+                "responses": {"200": {}},
+            }
+        }
+    },
+    "components": {
+        "schemas": {
+            "Node": {
+                "type": "object",
+                "required": ["name", "child"],
+                "properties": {
+                    "name": {"type": "string"},
+                    "child": {"$ref": "#/components/schemas/Node"},
+                },
+            }
+        }
+    },
+}
+
+
+def test_cyclic_ref_is_cut_at_max_depth():
+    limits = LimitTracker(GenerationLimits(max_ref_depth=2))
+    target = build_test_target(cyclic_spec, "/nodes", "post", limits=limits)
+
+    # Nested objects are inline literals, cut with a placeholder below the depth limit
+    assert (
+        target.parameter_dependent_objects
+        == 'const node : Node = { name: "", child: { name: "", child: { name: "", child: {} as Node } } };'
+    )
+    assert limits.hit_operations() == ["Node_create"]
+    assert limits.hits[0].limit == "max_ref_depth"
+
+
+def test_cyclic_ref_terminates_without_limits():
+    target = build_test_target(cyclic_spec, "/nodes", "post")
+    assert target.parameter_dependent_objects.endswith(" };")
+
+
+def test_branching_cyclic_ref_stops_at_literal_size():
+    branching_spec = copy.deepcopy(cyclic_spec)
+    node = branching_spec["components"]["schemas"]["Node"]
+    node["required"] = ["left", "middle", "right"]
+    node["properties"] = {
+        name: {"$ref": "#/components/schemas/Node"} for name in node["required"]
+    }
+
+    # 3^16 objects at the default ref depth; expansion stops once the literal is over the size limit instead
+    limits = LimitTracker()
+    started = time.monotonic()
+    target = build_test_target(branching_spec, "/nodes", "post", limits=limits)
+    assert time.monotonic() - started < 5
+    assert target.parameter_dependent_objects == "const node : Node = {} as Node;"
+    assert "max_literal_size" in [hit.limit for hit in limits.hits]
+
+
+def test_literal_size_limit():
+    limits = LimitTracker(GenerationLimits(max_literal_size=20))
+    ref = "#/components/schemas/CreateBehaviorGroupRequest"
+    result = build_dependent_param_string(
+        full_spec,
+        [RequestBodyParameter(None, None, ref, None, None, None)],
+        include_all=True,
+        limits=limits,
+    )
+    assert (
+        result
+        == "const createBehaviorGroupRequest : CreateBehaviorGroupRequest = {} as CreateBehaviorGroupRequest;"
+    )
+    assert limits.hits[0].limit == "max_literal_size"
+
+
+def test_time_budget():
+    limits = LimitTracker(GenerationLimits(time_budget=0))
+    limits.started -= 1
+    target = build_test_target(
+        full_spec, "/notifications/behaviorGroups", "post", limits=limits
+    )
+    assert target.parameter_dependent_objects.endswith(
+        "= {} as CreateBehaviorGroupRequest;"
+    )
+    # The rest of the test target is still usable
+    assert target.parameter_api_client_call == "createBehaviorGroupRequest"
+    assert limits.hit_operations() == ["NotificationResource$V2_createBehaviorGroup"]
@@ -0,0 +1,203 @@
+import copy
+import functools
+import json
+import threading
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+
+import pytest
+
+from generator import (
+    Generator,
+    GenerationResult,
+    parse_template_args,
+    TemplateArgumentError,
+    DEFAULT_TEMPLATE,
+)
+from generator.metrics import SpecMetrics, ref_stats_snapshot
+from spec_download import SpecDownloadError
+from target_conversion.ref_handling import (
+    _document_caches,
+    document_caches_scope,
+    get_document_cache,
+    MAX_INDEXED_DOCUMENTS,
+)
+
+full_spec = json.load(open("./tests/data/notif_v2_spec.json"))
+
+
+def test_generator_reuses_compiled_templates():
+    generator = Generator()
+    extraction = generator.extract(full_spec)
+    rendered = list(generator.render(extraction).values())
+    assert len(rendered) == 1
+    assert "describe(" in rendered[0]
+    assert generator.limit_tracker.hits == []
+
+    # A second render uses the same compiled template and produces the same source, apart from the uuids
+    assert len(list(generator.render(extraction).values())[0]) == len(rendered[0])
+
+
+def test_parse_template_args():
+    assert parse_template_args(None, "out.ts", None) == {DEFAULT_TEMPLATE: "out.ts"}
+    assert parse_template_args(["tests.mustache"], "out.ts", None) == {
+        "tests.mustache": "out.ts"
+    }
+    assert parse_template_args(
+        ["tests.mustache=tests.ts", "mocks.mustache", "fixtures.mustache"],
+        None,
+        "out",
+        parallel=True,
+    ) == {
+        "tests.mustache": "tests.ts",
+        "mocks.mustache": "out/mocks",
+        "fixtures.mustache": "out/fixtures",
+    }
+    # Rendered one after the other, several templates may share stdout
+    assert parse_template_args(["a.mustache", "b.mustache"], None, None) == {
+        "a.mustache": None,
+        "b.mustache": None,
+    }
+
+    with pytest.raises(TemplateArgumentError):
+        parse_template_args(["a.mustache=a.ts", "a.mustache=b.ts"], None, None)
+    with pytest.raises(TemplateArgumentError):
+        parse_template_args(["a.mustache", "b.mustache"], None, None, parallel=True)
+
+
+def test_render_templates_in_parallel(tmp_path):
+    (tmp_path / "title.mustache").write_text("{{api_title}} {{api_version}}")
+    templates = [DEFAULT_TEMPLATE, str(tmp_path / "title.mustache")]
+    dest_files = {
+        DEFAULT_TEMPLATE: str(tmp_path / "tests.ts"),
+        str(tmp_path / "title.mustache"): str(tmp_path / "title.txt"),
+    }
+    generator = Generator(templates=templates, parallel=True)
+    rendered = generator.render(generator.extract(full_spec), dest_files)
+
+    assert list(rendered) == templates
+    assert "describe(" in (tmp_path / "tests.ts").read_text()
+    assert (tmp_path / "title.txt").read_text() == "Notifications v2.0"
+    assert rendered[str(tmp_path / "title.mustache")] == "Notifications v2.0"
+
+
+def test_seeded_uuids_under_concurrency(tmp_path):
+    jobs = {}
+    for i in range(4):
+        (tmp_path / f"spec{i}.json").write_text(json.dumps(full_spec))
+        jobs[str(tmp_path / f"spec{i}.json")] = {DEFAULT_TEMPLATE: None}
+    results = Generator(uuid_seed=0).generate_many(jobs, workers=4)
+
+    # Each spec draws its UUIDs from its own seeded sequence, whichever thread generated it
+    rendered = {result.rendered[DEFAULT_TEMPLATE] for result in results.values()}
+    assert len(rendered) == 1
+    generator = Generator(uuid_seed=0)
+    spec = copy.deepcopy(full_spec)
+    assert rendered == set(generator.render(generator.extract(spec)).values())
+
+
+def test_metrics_count_each_extraction_once():
+    spec = copy.deepcopy(full_spec)
+    generator = Generator()
+    generator.metrics = SpecMetrics("")
+    generator.extract(spec)
+    generator.extract(spec)
+    # The spec's ref stats are cumulative; extracting it again only adds the lookups of that extraction
+    totals = ref_stats_snapshot(spec)
+    assert generator.metrics.ref_cache_hits == totals["hits"]
+    assert generator.metrics.ref_cache_misses == totals["misses"]
+    assert generator.metrics.schemas_resolved == totals["schemas_resolved"]
+    assert generator.metrics.operations == 42
+
+
+def test_generation_drops_its_spec_caches(tmp_path):
+    cached_documents = set(_document_caches)
+    generator = Generator()
+    result = generator.generate("./tests/data/notif_v2_spec.json")
+    assert result.metrics.ref_cache_misses > 0
+    # Neither the downloaded spec nor the pruned one outlive the generation through their caches (caches of
+    # documents used before may have been evicted meanwhile)
+    assert set(_document_caches) <= cached_documents
+
+    spec = copy.deepcopy(full_spec)
+    with document_caches_scope(spec):
+        get_document_cache(spec, "request_objects")["key"] = "declaration"
+        # Caches in use are not evicted, whatever else is used meanwhile
+        others = [{} for _ in range(MAX_INDEXED_DOCUMENTS + 1)]
+        for other in others:
+            get_document_cache(other, "refs")
+        assert get_document_cache(spec, "request_objects") == {"key": "declaration"}
+    assert id(spec) not in _document_caches
+
+
+def test_generate_many(tmp_path):
+    handler = functools.partial(SimpleHTTPRequestHandler, directory="./tests/data")
+    server = HTTPServer(("localhost", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://localhost:{server.server_port}"
+    try:
+        generator = Generator()
+        template = list(generator.templates)[0]
+        good_url = f"{base_url}/notif_v2_spec.json"
+        bad_url = f"{base_url}/missing_spec.json"
+        results = generator.generate_many(
+            {
+                good_url: {template: str(tmp_path / "notifications.ts")},
+                bad_url: {template: str(tmp_path / "missing.ts")},
+            },
+            workers=2,
+        )
+    finally:
+        server.shutdown()
+
+    assert isinstance(results[good_url], GenerationResult)
+    assert results[good_url].extraction.api_title == "Notifications"
+    assert (tmp_path / "notifications.ts").read_text() == results[good_url].rendered[
+        template
+    ]
+    metrics = results[good_url].metrics
+    assert metrics.operations == 21
+    assert metrics.ref_cache_misses > 0
+    assert metrics.bytes_written == len(
+        (tmp_path / "notifications.ts").read_text().encode("utf-8")
+    )
+    assert set(metrics.durations) == {
+        "download",
+        "validate",
+        "prune",
+        "extract",
+        "render",
+    }
+    # The failing spec is reported without stopping the other one
+    assert isinstance(results[bad_url], SpecDownloadError)
+    assert not (tmp_path / "missing.ts").exists()
+
+
+def test_generate_versions(tmp_path):
+    v3_spec = copy.deepcopy(full_spec)
+    v3_spec["info"]["version"] = "v3"
+    v3_spec["components"]["schemas"]["Application"]["description"] = "Changed in v3"
+    v3_file = tmp_path / "notif_v3_spec.json"
+    v3_file.write_text(json.dumps(v3_spec))
+
+    generator = Generator()
+    template = list(generator.templates)[0]
+    v2_url = "./tests/data/notif_v2_spec.json"
+    results = generator.generate_versions(
+        {
+            v2_url: {template: str(tmp_path / "v2.ts")},
+            str(v3_file): {template: str(tmp_path / "v3.ts")},
+        }
+    )
+
+    v2_source = (tmp_path / "v2.ts").read_text()
+    v3_source = (tmp_path / "v3.ts").read_text()
+    assert results[str(v3_file)].extraction.api_version == "v3"
+    assert "/api/notifications/v3'" in v3_source
+    assert "/api/notifications/v2.0'" in v2_source
+    # Request objects of schemas identical in both versions are built once, down to their UUIDs
+    declaration = next(
+        line.strip()
+        for line in v2_source.splitlines()
+        if "const createBehaviorGroupRequest" in line
+    )
+    assert declaration in v3_source
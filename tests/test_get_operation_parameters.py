@@ -0,0 +1,96 @@
+import json
+
+from target_conversion import (
+    get_operation_parameters,
+    build_test_target,
+    build_parameter_values,
+)
+
+full_spec = json.load(open("./tests/data/notif_v2_spec.json"))
+
+spec_with_shared_params = {
+    "paths": {
+        "/things/{thingId}": {
+            "parameters": [
+                {"name": "thingId", "in": "path", "schema": {"type": "string"}},
+                {"$ref": "#/components/parameters/RequestId"},
+            ],
+            "get": {
+                "operationId": "Thing_get",
+                "summary": "Get a thing",
+                "parameters": [
+                    {
+                        "name": "limit",
+                        "in": "query",
+                        "required": True,
+                        "schema": {"type": "integer"},
+                    },
+                    {"name": "sort", "in": "query", "schema": {"type": "string"}},
+                    {
+                        "name": "status",
+                        "in": "query",
+                        "required": True,
+                        "schema": {"$ref": "#/components/schemas/Status"},
+                    },
+                    {"name": "session", "in": "cookie", "schema": {"type": "string"}},
+                ],
+                "responses": {"200": {}},
+            },
+        }
+    },
+    "components": {
+        "parameters": {
+            "RequestId": {
+                "name": "X-Request-Id",
+                "in": "header",
+                "required": True,
+                "schema": {"type": "string"},
+            }
+        },
+        "schemas": {"Status": {"type": "string", "enum": ["OPEN", "CLOSED"]}},
+    },
+}
+
+
+def test_get_operation_parameters_all_locations():
+    params = get_operation_parameters(full_spec, "/notifications/eventTypes", "get")
+    assert len(params) == 9
+    assert {param.location for param in params} == {"query"}
+    assert params[0].name == "applicationIds"
+    assert params[0].required is False
+
+    params = get_operation_parameters(
+        spec_with_shared_params, "/things/{thingId}", "get"
+    )
+    assert [(param.name, param.location) for param in params] == [
+        ("thingId", "path"),
+        ("X-Request-Id", "header"),
+        ("limit", "query"),
+        ("sort", "query"),
+        ("status", "query"),
+        ("session", "cookie"),
+    ]
+    # path parameters are required even when the spec does not say so
+    assert params[0].required is True
+
+
+def test_build_parameter_values():
+    params = get_operation_parameters(
+        spec_with_shared_params, "/things/{thingId}", "get"
+    )
+    values = build_parameter_values(spec_with_shared_params, params)
+    assert values == [
+        'thingId: ""',
+        '"X-Request-Id": ""',
+        "limit: 0",
+        'sort: ""',
+        'status: "OPEN"',
+        'session: ""',
+    ]
+
+
+def test_build_test_target_includes_required_non_path_params():
+    target = build_test_target(spec_with_shared_params, "/things/{thingId}", "get")
+    assert target.parameter_api_client_call == (
+        'thingId: "", "X-Request-Id": "", limit: 0, status: "OPEN"'
+    )
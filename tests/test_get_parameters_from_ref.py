@@ -60,3 +60,29 @@ def test_get_parameters_from_ref_with_all_required():
     assert params[0].aggregate_info is None
     assert params[0].type == "string"
     assert params[0].example == "13:45:30.123456789"
+
+
+def test_get_parameters_from_ref_loose_object_schemas():
+    """Objects without a type or properties, and required names that are not declared, do not break extraction"""
+    spec = {
+        "components": {
+            "schemas": {
+                "Untyped": {"properties": {"name": {"type": "string"}}},
+                "Bare": {"required": ["name"]},
+            }
+        }
+    }
+
+    params = get_request_body_parameters_from_ref(
+        spec, ref="#/components/schemas/Untyped", include_optional=True
+    )
+    assert [(param.name, param.type) for param in params] == [("name", "string")]
+
+    assert (
+        get_request_body_parameters_from_ref(
+            spec, ref="#/components/schemas/Bare", include_optional=True
+        )
+        == []
+    )
+    params = get_request_body_parameters_from_ref(spec, ref="#/components/schemas/Bare")
+    assert [(param.name, param.type) for param in params] == [("name", None)]
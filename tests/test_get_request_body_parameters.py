@@ -52,3 +52,78 @@ def test_get_request_body_parameters_unnamed():
 
     # Now the case where unique is True
     # TODO
+
+
+def test_get_request_body_parameters_media_types():
+    """Bodies are read from any supported media type; unsupported ones give no parameters"""
+
+    def spec_with_body(content: dict, required: bool = False) -> dict:
+        return {
+            "paths": {
+                "/upload": {
+                    "post": {"requestBody": {"content": content, "required": required}}
+                }
+            },
+            "components": {
+                "schemas": {
+                    "Upload": {
+                        "type": "object",
+                        "required": ["file"],
+                        "properties": {
+                            "file": {"type": "string", "format": "binary"},
+                            "label": {"type": "string"},
+                        },
+                    }
+                }
+            },
+        }
+
+    ref_schema = {"schema": {"$ref": "#/components/schemas/Upload"}}
+    for media_type in [
+        "application/merge-patch+json",
+        "application/json; charset=utf-8",
+    ]:
+        params = get_request_body_parameters(
+            spec_with_body({media_type: ref_schema}), "/upload", "post"
+        )
+        assert [param.ref for param in params] == ["#/components/schemas/Upload"]
+
+    # Forms are read as their fields, only the required ones unless the whole body is required
+    for media_type in ["multipart/form-data", "application/x-www-form-urlencoded"]:
+        params = get_request_body_parameters(
+            spec_with_body({media_type: ref_schema}), "/upload", "post"
+        )
+        assert [(param.name, param.format) for param in params] == [("file", "binary")]
+        params = get_request_body_parameters(
+            spec_with_body({media_type: ref_schema}, required=True), "/upload", "post"
+        )
+        assert [param.name for param in params] == ["file", "label"]
+    inline_form = {
+        "schema": {"type": "object", "properties": {"query": {"type": "string"}}}
+    }
+    params = get_request_body_parameters(
+        spec_with_body({"application/x-www-form-urlencoded": inline_form}, True),
+        "/upload",
+        "post",
+    )
+    assert [param.name for param in params] == ["query"]
+
+    # JSON is preferred when a body is documented in several media types
+    params = get_request_body_parameters(
+        spec_with_body(
+            {
+                "text/plain": {"schema": {"type": "string"}},
+                "application/json": ref_schema,
+            }
+        ),
+        "/upload",
+        "post",
+    )
+    assert [param.ref for param in params] == ["#/components/schemas/Upload"]
+
+    assert (
+        get_request_body_parameters(
+            spec_with_body({"application/xml": ref_schema}), "/upload", "post"
+        )
+        == []
+    )
@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from tests.golden_corpus import (
+    REPO_DIR,
+    corpus_cases,
+    generator_code_hash,
+    hash_cases,
+    hash_file,
+    load_goldens,
+)
+
+CASES = corpus_cases()
+
+
+@pytest.fixture(scope="module")
+def output_hashes(request) -> dict[str, str]:
+    """
+    Output hash per snapshot. Snapshots already verified against their golden with the same spec and generator
+    code (remembered in the pytest cache) are not rendered again; the rest are rendered in parallel.
+    """
+    cache = getattr(request.config, "cache", None)
+    goldens = load_goldens()
+    code_hash = generator_code_hash()
+
+    def state(case: str) -> dict:
+        spec_file = case.rpartition(":")[0]
+        return {
+            "input": hash_file(os.path.join(REPO_DIR, spec_file)),
+            "code": code_hash,
+            "output": goldens.get(case, None),
+        }
+
+    hashes = {}
+    stale = []
+    for case in CASES:
+        if cache is not None and cache.get(f"golden_corpus/{case}", None) == state(
+            case
+        ):
+            hashes[case] = goldens[case]
+        else:
+            stale.append(case)
+
+    hashes.update(hash_cases(stale))
+    for case in stale:
+        if cache is not None and hashes[case] == goldens.get(case, None):
+            cache.set(f"golden_corpus/{case}", state(case))
+    return hashes
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_golden_snapshot(case, output_hashes):
+    goldens = load_goldens()
+    assert (
+        case in goldens
+    ), f"No golden for {case}; run python -m tests.golden_corpus --update"
+    assert output_hashes[case] == goldens[case], (
+        f"Output for {case} changed; if that is intended, "
+        "run python -m tests.golden_corpus --update"
+    )
@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+from target_conversion import (
+    build_test_target,
+    dump_ir,
+    load_ir,
+    ExtractionResult,
+    IntermediateFormatError,
+)
+
+full_spec = json.load(open("./tests/data/notif_v2_spec.json"))
+
+
+def test_ir_round_trip(tmp_path):
+    test_targets = [
+        build_test_target(full_spec, "/notifications/behaviorGroups", "post"),
+        build_test_target(full_spec, "/notifications/behaviorGroups/{id}", "put"),
+    ]
+    extraction = ExtractionResult(
+        api_title="Notifications",
+        api_version="v2.0",
+        import_data=[{"importClass": "NotificationsClient", "importPackage": "api"}],
+        test_targets=test_targets,
+    )
+    ir_file = str(tmp_path / "notifications.jsonl")
+    dump_ir(ir_file, extraction)
+
+    # One header line plus one line per test target
+    with open(ir_file) as f:
+        assert len(f.readlines()) == 3
+
+    assert load_ir(ir_file) == extraction
+
+
+def test_load_ir_rejects_other_files(tmp_path):
+    not_ir = tmp_path / "spec.json"
+    not_ir.write_text(json.dumps({"openapi": "3.0.3"}) + "\n")
+    with pytest.raises(IntermediateFormatError):
+        load_ir(str(not_ir))
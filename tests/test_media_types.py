@@ -0,0 +1,43 @@
+from target_conversion import media_types
+from target_conversion.media_types import MEDIA_TYPE_HANDLERS
+from target_conversion import (
+    get_media_type_handler,
+    register_media_type,
+    select_media,
+    MediaTypeHandler,
+)
+
+
+def test_get_media_type_handler():
+    assert get_media_type_handler("application/json").name == "json"
+    assert get_media_type_handler("Application/JSON; charset=utf-8").name == "json"
+    # Structured syntax suffix
+    assert get_media_type_handler("application/merge-patch+json").name == "json"
+    assert get_media_type_handler("application/vnd.api+json").name == "json"
+    assert get_media_type_handler("multipart/form-data").name == "multipart"
+    assert get_media_type_handler("application/x-www-form-urlencoded").name == "form"
+    # Wildcards
+    assert get_media_type_handler("text/csv").name == "text"
+    assert get_media_type_handler("*/*").name == "json"
+    assert get_media_type_handler("application/xml") is None
+
+
+def test_register_media_type(monkeypatch):
+    monkeypatch.setattr(media_types, "MEDIA_TYPE_HANDLERS", dict(MEDIA_TYPE_HANDLERS))
+    assert get_media_type_handler("application/x-ndjson") is None
+    register_media_type("application/x-ndjson", MediaTypeHandler("ndjson", priority=5))
+    assert get_media_type_handler("application/x-ndjson").name == "ndjson"
+    get_media_type_handler.cache_clear()
+
+
+def test_select_media():
+    content = {
+        "text/plain": {"schema": {"type": "string"}},
+        "multipart/form-data": {"schema": {"type": "object"}},
+        "application/xml": {"schema": {"type": "object"}},
+    }
+    selected = select_media(content)
+    assert selected.media_type == "multipart/form-data"
+    assert selected.schema == {"type": "object"}
+    assert select_media({"application/xml": {}}) is None
+    assert select_media(None) is None
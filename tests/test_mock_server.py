@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+from mock_server import MockApiServer, build_routes, sample_from_schema
+from target_conversion import build_test_target
+
+full_spec = json.load(open("./tests/data/notif_v2_spec.json"))
+
+BASE_PATH = "/api/notifications/v2.0"
+
+
+def test_sample_from_schema():
+    sample = sample_from_schema(
+        full_spec, {"$ref": "#/components/schemas/BehaviorGroup"}
+    )
+    assert sample["bundle_id"] == "00000000-0000-0000-0000-000000000000"
+    assert isinstance(sample["display_name"], str)
+    assert isinstance(sample["actions"], list)
+
+    assert sample_from_schema(
+        full_spec, {"$ref": "#/components/schemas/LocalTime"}
+    ) == ("13:45:30.123456789")
+
+
+async def request(port: int, verb: str, path: str, headers: str = "") -> (bytes, bytes):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"{verb} {path} HTTP/1.1\r\nHost: localhost\r\n{headers}Connection: close\r\n\r\n".encode()
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return head.split(b"\r\n")[0], body
+
+
+def test_mock_server_serves_expected_responses():
+    test_targets = [
+        build_test_target(full_spec, "/notifications/bundles/{bundleName}", "get"),
+        build_test_target(full_spec, "/notifications/behaviorGroups/{id}", "put"),
+        build_test_target(
+            full_spec,
+            "/notifications/eventTypes/{eventTypeUuid}/behaviorGroups/{behaviorGroupUuid}",
+            "put",
+        ),
+    ]
+    routes = build_routes(full_spec, test_targets, BASE_PATH)
+
+    async def run():
+        server = await MockApiServer(routes).start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            status, body = await request(
+                port, "GET", f"{BASE_PATH}/notifications/bundles/rhel"
+            )
+            assert status == b"HTTP/1.1 200 OK"
+            assert "display_name" in json.loads(body)
+
+            status, _ = await request(
+                port,
+                "GET",
+                f"{BASE_PATH}/notifications/bundles/rhel",
+                headers="Prefer: code=404\r\n",
+            )
+            # Only documented codes can be preferred
+            assert status == b"HTTP/1.1 200 OK"
+
+            status, body = await request(
+                port, "PUT", f"{BASE_PATH}/notifications/behaviorGroups/a"
+            )
+            assert status == b"HTTP/1.1 200 OK"
+            assert json.loads(body) is True
+
+            status, body = await request(
+                port,
+                "PUT",
+                f"{BASE_PATH}/notifications/behaviorGroups/a",
+                headers="Prefer: code=404\r\n",
+            )
+            assert status == b"HTTP/1.1 404 Not Found"
+            # The documented 404 body is a text/plain string
+            assert body == b"string"
+
+            status, body = await request(
+                port, "PUT", f"{BASE_PATH}/notifications/eventTypes/a/behaviorGroups/b"
+            )
+            assert status == b"HTTP/1.1 204 No Content"
+            assert body == b""
+
+            status, _ = await request(
+                port, "DELETE", f"{BASE_PATH}/notifications/bundles/rhel"
+            )
+            assert status == b"HTTP/1.1 404 Not Found"
+
+    asyncio.run(run())
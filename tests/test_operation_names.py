@@ -0,0 +1,33 @@
+import pytest
+
+from target_conversion import (
+    operation_names,
+    convert_operation_id_to_classname,
+    InvalidOperationIdError,
+)
+
+
+def test_operation_names():
+    names = operation_names("NotificationResource$V2_createBehaviorGroup")
+    assert names.class_name == "NotificationResourceV2CreateBehaviorGroup"
+    assert names.operation_method == "notificationResourceV2CreateBehaviorGroup"
+    assert names.params_class == "NotificationResourceV2CreateBehaviorGroupParams"
+    assert names.import_package == "NotificationResourceV2CreateBehaviorGroup"
+
+    # Computed once per operationId
+    assert operation_names("NotificationResource$V2_createBehaviorGroup") is names
+
+
+def test_operation_names_other_styles():
+    # No underscore at all used to raise a ValueError
+    assert operation_names("createBehaviorGroup").class_name == "CreateBehaviorGroup"
+    assert operation_names("create-behavior-group").class_name == "CreateBehaviorGroup"
+    assert operation_names("behaviorGroups.create").class_name == "BehaviorGroupsCreate"
+    assert operation_names("get__thing").class_name == "GetThing"
+    assert operation_names("2fa_enable").class_name == "Operation2faEnable"
+    assert convert_operation_id_to_classname("createThing") == "CreateThing"
+
+
+def test_operation_names_invalid():
+    with pytest.raises(InvalidOperationIdError):
+        operation_names("$_")
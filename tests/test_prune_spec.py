@@ -0,0 +1,79 @@
+import copy
+import json
+import re
+
+from target_conversion import build_test_target, prune_spec
+
+full_spec = json.load(open("./tests/data/notif_v2_spec.json"))
+
+UUID_PATTERN = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+)
+
+
+def test_prune_spec_drops_unreachable_components():
+    spec = copy.deepcopy(full_spec)
+    spec["components"]["schemas"]["Unreferenced"] = {"type": "string"}
+    pruned, report = prune_spec(spec)
+
+    assert report.operations == 21
+    assert report.bytes_after < report.bytes_before
+    assert report.components_dropped == ["#/components/schemas/Unreferenced"]
+    assert "Unreferenced" not in pruned["components"]["schemas"]
+    assert "CreateBehaviorGroupRequest" in pruned["components"]["schemas"]
+    assert report.components_kept == len(pruned["components"]["schemas"])
+    # Documentation is dropped, but the fields extraction relies on are kept
+    assert "description" not in pruned["info"]
+    assert pruned["components"]["schemas"]["LocalTime"]["examples"] == [
+        "13:45:30.123456789"
+    ]
+
+
+def test_prune_spec_keeps_property_named_description():
+    spec = {
+        "paths": {
+            "/things": {
+                "post": {
+                    "operationId": "Thing_create",
+                    "summary": "Create a thing",
+                    "description": "Long operation docs",
+                    "requestBody": {
+                        "content": {
+                            "application/json": {
+                                "schema": {"$ref": "#/components/schemas/Thing"}
+                            }
+                        }
+                    },
+                    "responses": {"204": {"description": "No content"}},
+                }
+            }
+        },
+        "components": {
+            "schemas": {
+                "Thing": {
+                    "description": "A thing",
+                    "type": "object",
+                    "properties": {"description": {"type": "string"}},
+                },
+                "Unused": {"type": "string"},
+            }
+        },
+    }
+    pruned, report = prune_spec(spec)
+    operation = pruned["paths"]["/things"]["post"]
+    assert "description" not in operation
+    assert pruned["components"]["schemas"] == {
+        "Thing": {"type": "object", "properties": {"description": {"type": "string"}}}
+    }
+    assert report.components_dropped == ["#/components/schemas/Unused"]
+
+
+def test_pruned_spec_builds_the_same_test_targets():
+    pruned, _ = prune_spec(full_spec)
+    for path, path_item in full_spec["paths"].items():
+        for verb in path_item:
+            original = build_test_target(full_spec, path, verb)
+            slimmed = build_test_target(pruned, path, verb)
+            assert UUID_PATTERN.sub("UUID", repr(original)) == UUID_PATTERN.sub(
+                "UUID", repr(slimmed)
+            )
@@ -0,0 +1,46 @@
+import copy
+import json
+
+from target_conversion import get_ref_info, ref_is_basic_type_alias, RefInfo
+from target_conversion.ref_handling import get_ref_table
+
+full_spec = json.load(open("./tests/data/notif_v2_spec.json"))
+
+
+def test_ref_table():
+    spec = copy.deepcopy(full_spec)
+    table = get_ref_table(spec)
+    # Refs are classified as they are looked up
+    assert table == {}
+    assert get_ref_info(spec, "#/components/schemas/UUID") == RefInfo(
+        "uuid", "UUID", None
+    )
+    assert get_ref_info(spec, "#/components/schemas/EndpointType").kind == "alias"
+    assert get_ref_info(spec, "#/components/schemas/LocalTime") == RefInfo(
+        "alias", "LocalTime", None
+    )
+    assert get_ref_info(
+        spec, "#/components/schemas/CreateBehaviorGroupRequest"
+    ) == RefInfo("object", "CreateBehaviorGroupRequest", "CreateBehaviorGroupRequest")
+    assert len(table) == 4
+    # The table is kept per spec, so each ref is classified once
+    assert get_ref_table(spec) is table
+
+    assert ref_is_basic_type_alias(full_spec, "#/components/schemas/LocalDate")
+    assert not ref_is_basic_type_alias(full_spec, "#/components/schemas/Bundle")
+
+
+def test_uuid_detected_by_format():
+    spec = {
+        "components": {
+            "schemas": {
+                "Id": {"type": "string", "format": "uuid"},
+                "Ids": {"type": "array", "items": {"$ref": "#/components/schemas/Id"}},
+            },
+            "parameters": {"id": {"schema": {"$ref": "#/components/schemas/Id"}}},
+        }
+    }
+    assert get_ref_info(spec, "#/components/schemas/Id").kind == "uuid"
+    assert get_ref_info(spec, "#/components/schemas/Ids").kind == "alias"
+    # Refs outside components/schemas are classified when first looked up
+    assert get_ref_info(spec, "#/components/parameters/id").kind == "object"
@@ -0,0 +1,76 @@
+import json
+import multiprocessing
+import os
+
+import pytest
+
+from generator import extract, extract_parallel
+from generator.shared_spec import SharedSpec, SharedSpecView, attach_spec
+from target_conversion import build_test_target
+
+full_spec = json.load(open("./tests/data/notif_v2_spec.json"))
+
+
+def test_shared_spec_view():
+    with SharedSpec(full_spec) as shared_spec:
+        view = attach_spec(shared_spec.name)
+        assert list(view) == list(full_spec)
+        assert list(view["paths"]) == list(full_spec["paths"])
+        assert view["info"] == full_spec["info"]
+        for path, path_item in full_spec["paths"].items():
+            assert view["paths"][path] == path_item
+        schemas = full_spec["components"]["schemas"]
+        assert dict(view["components"]["schemas"]) == schemas
+        # Decoded values are reused
+        name = list(schemas)[0]
+        assert (
+            view["components"]["schemas"][name] is view["components"]["schemas"][name]
+        )
+        assert view.get("webhooks") is None
+        view.close()
+
+
+def test_extraction_decodes_only_what_it_uses():
+    with SharedSpec(full_spec) as shared_spec:
+        with attach_spec(shared_spec.name) as view:
+            build_test_target(view, "/notifications/behaviorGroups", "post")
+            decoded_schemas = {
+                pointer
+                for pointer in view._decoded
+                if pointer.startswith("/components/schemas/")
+            }
+    assert decoded_schemas == {
+        "/components/schemas/CreateBehaviorGroupRequest",
+        "/components/schemas/CreateBehaviorGroupResponse",
+        "/components/schemas/LocalDateTime",
+        "/components/schemas/UUID",
+    }
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork",
+    reason="workers only see the patched close() when forked",
+)
+def test_workers_detach_from_the_shared_spec(tmp_path, monkeypatch):
+    close = SharedSpecView.close
+
+    def recording_close(self):
+        (tmp_path / str(os.getpid())).touch()
+        close(self)
+
+    monkeypatch.setattr(SharedSpecView, "close", recording_close)
+    extract_parallel(full_spec, workers=3)
+    assert len(list(tmp_path.iterdir())) == 3
+
+
+def test_extract_parallel_matches_extract():
+    serial = extract(full_spec)
+    parallel = extract_parallel(full_spec, workers=2)
+    assert [t.operation_id for t in parallel.test_targets] == [
+        t.operation_id for t in serial.test_targets
+    ]
+    assert [t.summary for t in parallel.test_targets] == [
+        t.summary for t in serial.test_targets
+    ]
+    assert parallel.import_data == serial.import_data
+    assert parallel.api_title == serial.api_title
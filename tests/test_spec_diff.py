@@ -0,0 +1,55 @@
+import copy
+import json
+
+from target_conversion.spec_diff import diff_specs, hash_subtree
+
+full_spec = json.load(open("./tests/data/notif_v2_spec.json"))
+
+
+def test_hash_subtree_ignores_key_order():
+    assert hash_subtree({"a": 1, "b": [1, 2]}) == hash_subtree({"b": [1, 2], "a": 1})
+    assert hash_subtree({"a": 1}) != hash_subtree({"a": 2})
+
+
+def test_diff_identical_specs():
+    diff = diff_specs(full_spec, copy.deepcopy(full_spec))
+    assert diff.added_operations == []
+    assert diff.removed_operations == []
+    assert diff.changed_operations == []
+    assert diff.changed_components == []
+    assert diff.affected_targets == []
+
+
+def test_diff_operation_changes():
+    new_spec = copy.deepcopy(full_spec)
+    new_spec["paths"]["/notifications/facets/bundles"]["get"]["summary"] = "Renamed"
+    new_spec["paths"]["/notifications/things"] = {
+        "get": copy.deepcopy(new_spec["paths"]["/notifications/facets/bundles"]["get"])
+    }
+    del new_spec["paths"]["/notifications/facets/applications"]
+
+    diff = diff_specs(full_spec, new_spec)
+    assert diff.changed_operations == [("/notifications/facets/bundles", "get")]
+    assert diff.added_operations == [("/notifications/things", "get")]
+    assert diff.removed_operations == [("/notifications/facets/applications", "get")]
+    assert [target.summary for target in diff.affected_targets] == [
+        "Renamed",
+        "Renamed",
+    ]
+    assert diff.removed_targets[0].url_path == "/notifications/facets/applications"
+
+
+def test_diff_schema_change_propagates_to_dependents():
+    new_spec = copy.deepcopy(full_spec)
+    new_spec["components"]["schemas"]["BehaviorGroupAction"]["required"] = ["id"]
+
+    diff = diff_specs(full_spec, new_spec)
+    # BehaviorGroup references BehaviorGroupAction, PageBehaviorGroup references BehaviorGroup
+    assert "#/components/schemas/BehaviorGroup" in diff.changed_components
+    assert "#/components/schemas/PageBehaviorGroup" in diff.changed_components
+    assert (
+        "/notifications/eventTypes/{eventTypeId}/behaviorGroups",
+        "get",
+    ) in diff.changed_operations
+    # Operations that never reach BehaviorGroupAction are unaffected
+    assert ("/notifications/facets/bundles", "get") not in diff.changed_operations
@@ -0,0 +1,26 @@
+import io
+import json
+import logging
+
+from generator.structured_logging import configure_logging
+
+
+def test_json_log_lines():
+    stream = io.StringIO()
+    root = logging.getLogger()
+    handlers, level = root.handlers, root.level
+    try:
+        configure_logging("INFO", stream=stream)
+        logger = logging.getLogger("test-generator")
+        logger.info("Downloading spec", extra={"spec_url": "http://example.com/a.json"})
+        logger.debug("Not shown")
+    finally:
+        root.handlers, root.level = handlers, level
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 1
+    entry = json.loads(lines[0])
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "test-generator"
+    assert entry["message"] == "Downloading spec"
+    assert entry["spec_url"] == "http://example.com/a.json"
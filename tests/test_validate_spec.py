@@ -0,0 +1,65 @@
+import copy
+import json
+
+from target_conversion import validate_spec, SpecValidationError
+
+full_spec = json.load(open("./tests/data/notif_v2_spec.json"))
+
+
+def test_validate_spec():
+    assert validate_spec(full_spec) == []
+
+
+def test_validate_spec_collects_all_problems():
+    spec = copy.deepcopy(full_spec)
+    operation = spec["paths"]["/notifications/behaviorGroups"]["post"]
+    del operation["summary"]
+    del operation["operationId"]
+    operation["requestBody"]["content"]["application/json"]["schema"] = {
+        "$ref": "#/components/schemas/DoesNotExist"
+    }
+    spec["paths"]["/notifications/behaviorGroups/{id}"]["put"]["parameters"].append(
+        {"in": "query"}
+    )
+    del spec["info"]["version"]
+
+    problems = {str(problem) for problem in validate_spec(spec)}
+    assert problems == {
+        "/info/version: missing version string",
+        "/paths/~1notifications~1behaviorGroups/post/operationId: missing operationId",
+        "/paths/~1notifications~1behaviorGroups/post/summary: missing summary",
+        "/paths/~1notifications~1behaviorGroups/post/requestBody/content/application~1json/schema/$ref: "
+        "$ref '#/components/schemas/DoesNotExist' does not resolve",
+        "/paths/~1notifications~1behaviorGroups~1{id}/put/parameters/1: parameter is missing name",
+    }
+
+    error = SpecValidationError(validate_spec(spec))
+    assert len(error.problems) == 5
+
+
+def test_validate_spec_duplicate_operation_ids():
+    spec = copy.deepcopy(full_spec)
+    spec["paths"]["/notifications/behaviorGroups"]["post"]["operationId"] = spec[
+        "paths"
+    ]["/notifications/behaviorGroups/{id}"]["put"]["operationId"]
+    problems = validate_spec(spec)
+    assert len(problems) == 1
+    assert "is already used by" in problems[0].message
+
+
+def test_validate_spec_request_body_media_types(caplog):
+    spec = copy.deepcopy(full_spec)
+    content = spec["paths"]["/notifications/behaviorGroups"]["post"]["requestBody"][
+        "content"
+    ]
+    content["application/xml"] = content.pop("application/json")
+    # Operations without a supported media type are generated without a body, so only a warning is logged
+    assert validate_spec(spec) == []
+    assert "no supported media type" in caplog.text
+
+    content["application/json"] = {}
+    problems = [str(problem) for problem in validate_spec(spec)]
+    assert problems == [
+        "/paths/~1notifications~1behaviorGroups/post/requestBody/content/application~1json: "
+        "request body has no schema"
+    ]